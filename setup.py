@@ -14,6 +14,7 @@ setup(
         "cairosvg",
         "jinja2",
         "lxml",
+        "numpy",
     ],
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -1,6 +1,12 @@
 from .query import *
 from .svgapp import SVGApplication
+from .hover import HoverTracker
 from .templatedapp import TemplatedSVGApplication
+from .app_async import AsyncApplication
+from .concurrentapp import ConcurrentSVGApplication
+from .vectorapp import VectorTemplatedSVGApplication
+from .variables import VariableStore, DictVariableStore, OmegaConfVariableStore
+from .parser import ParserOptions, set_default_parser_options
 
 ENGINE_NAMESPACE = 'xmlns:svgre="svg_render_engine"'
 
@@ -0,0 +1,162 @@
+""" Module defining the AsyncApplication class, an asyncio front-end for the synchronous applications. """
+
+import asyncio
+from typing import Any, Callable, List, Tuple
+
+from ..event import Event
+
+__all__ = ("AsyncApplication",)
+
+
+class AsyncApplication:
+    """Asyncio wrapper around a synchronous application (`SVGApplication`, `TemplatedSVGApplication` or `XMLApplication`).
+
+    Any number of coroutines may submit queries concurrently. Queries are placed on a single queue and are applied
+    by one owner task, which drains everything that is waiting each tick and applies it as a batch. Because the
+    wrapped application is only ever touched by the owner task, no locking is required and the ordering of queries
+    is the order in which they were submitted.
+
+    Example:
+        ```
+        async with AsyncApplication(SVGApplication(svg_code=svg_code)) as app:
+            response = await app.query(query_event)
+        ```
+
+    Attributes:
+        application (Any): the wrapped application, anything with a synchronous `query(query_event)` method.
+        max_batch_size (int): the maximum number of queries to apply in a single tick, `None` for no limit.
+        on_tick (Callable): optional callback `on_tick(batch)` that is called by the owner task after each batch has been applied, `batch` is a list of (query, response) pairs. This is a convenient place to render. If it raises, the owner task stops, queries that are still waiting fail with the exception and it is raised again by `stop`.
+    """
+
+    def __init__(
+        self,
+        application: Any,
+        max_batch_size: int = None,
+        on_tick: Callable[[List[Tuple[Event, Any]]], None] = None,
+    ):
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError(
+                f"`max_batch_size` must be at least 1, got {max_batch_size}."
+            )
+        self.application = application
+        self.max_batch_size = max_batch_size
+        self.on_tick = on_tick
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the owner task is currently running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Starts the owner task on the running event loop. Queries submitted before this call will raise."""
+        if self.running:
+            raise RuntimeError(f"{type(self).__name__} is already running.")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stops the owner task once all queries that have already been submitted are applied.
+
+        Raises:
+            Exception: the exception raised by `on_tick`, if the owner task has stopped because of it.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        if not task.done():
+            await self._queue.put(
+                None
+            )  # sentinel, everything before it is applied first
+        await task
+
+    def submit(self, query_event: Event) -> asyncio.Future:
+        """Submits a query without waiting for it to be applied.
+
+        Args:
+            query_event (Event): the query to apply to the wrapped application.
+
+        Returns:
+            asyncio.Future: a future that resolves to the response of the wrapped application (or its exception).
+        """
+        if not self.running:
+            raise RuntimeError(
+                f"{type(self).__name__} is not running, call `start` (or use `async with`) first."
+            )
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((query_event, future))
+        return future
+
+    async def query(self, query_event: Event) -> Any:
+        """Submits a query and waits for its response.
+
+        Args:
+            query_event (Event): the query to apply to the wrapped application.
+
+        Returns:
+            Any: the response of the wrapped application, typically a `ResponseEvent` (or `Response` for `XMLApplication`).
+        """
+        return await self.submit(query_event)
+
+    async def query_many(self, query_events: List[Event]) -> List[Any]:
+        """Submits a collection of queries at once (they will be applied in the same tick) and waits for all responses.
+
+        Args:
+            query_events (List[Event]): the queries to apply, in order.
+
+        Returns:
+            List[Any]: the responses, in the same order as `query_events`.
+        """
+        futures = [self.submit(query_event) for query_event in query_events]
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            # drain everything that is waiting, this is what makes up a tick.
+            while not self._queue.empty() and (
+                self.max_batch_size is None or len(batch) < self.max_batch_size
+            ):
+                batch.append(self._queue.get_nowait())
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            applied = self._apply(batch)
+            if self.on_tick is not None and applied:
+                try:
+                    self.on_tick(applied)
+                except Exception as e:
+                    # nothing is left to apply the waiting queries, callers must not hang.
+                    self._fail_pending(e)
+                    raise
+            # yield to the producers so that the next tick can fill up.
+            await asyncio.sleep(0)
+
+    def _apply(self, batch):
+        applied = []
+        for query_event, future in batch:
+            if future.cancelled():
+                continue
+            try:
+                response = self.application.query(query_event)
+            except Exception as e:  # pylint: disable=broad-except
+                future.set_exception(e)
+            else:
+                future.set_result(response)
+                applied.append((query_event, response))
+        return applied
+
+    def _fail_pending(self, exception: Exception):
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(exception)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
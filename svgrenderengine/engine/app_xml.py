@@ -1,15 +1,81 @@
 import ast
+import asyncio
+from collections import OrderedDict
 from dataclasses import dataclass, astuple
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Iterator
 
 from svgrenderengine.event import Event
 
 # from .app import Application
 from svgrenderengine.engine.app import Application
+from svgrenderengine.engine.parser import ParserOptions, parse_xml
+from svgrenderengine.engine.index import Indexes, find_elements
+from svgrenderengine.engine.planner import QueryPlanner
 
 from lxml import etree as ET
 import html
 
+XPATH_CACHE_SIZE = 256
+
+
+class XPathCache:
+    """An LRU cache of compiled XPath expressions, keyed by expression and namespaces."""
+
+    def __init__(self, maxsize: int = XPATH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, xpath: str, namespaces: Dict[str, str] = None) -> ET.XPath:
+        """Gets the compiled expression, compiling it if it is not cached.
+
+        Args:
+            xpath (str): the XPath expression, it may contain variables (e.g. `$id`) that are given when it is evaluated.
+            namespaces (Dict[str, str], optional): namespace prefixes used in the expression.
+
+        Returns:
+            ET.XPath: the compiled expression.
+        """
+        key = (xpath, tuple(sorted(namespaces.items())) if namespaces else ())
+        compiled = self._cache.get(key)
+        if compiled is None:
+            compiled = ET.XPath(xpath, namespaces=namespaces)
+            self._cache[key] = compiled
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return compiled
+
+    def clear(self):
+        self._cache.clear()
+
+
+_XPATH_CACHE = XPathCache()  # used when no cache is given
+
+
+def _get_xpath_cache(xpath_cache: XPathCache) -> XPathCache:
+    return _XPATH_CACHE if xpath_cache is None else xpath_cache
+
+
+def _evaluate(
+    root: ET._Element,
+    xpath: str,
+    namespaces: Dict[str, str] = None,
+    xpath_cache: XPathCache = None,
+    planner: QueryPlanner = None,
+    **variables,
+):
+    """Evaluates an XPath expression, from the indexes of `planner` if it can be planned, otherwise with lxml."""
+    if planner is not None:
+        elements = planner.select(root, xpath, namespaces, **variables)
+        if elements is not None:
+            return elements
+    return _get_xpath_cache(xpath_cache).get(xpath, namespaces)(root, **variables)
+
 
 @dataclass
 class QueryXPath(Event):
@@ -21,11 +87,31 @@ class QueryXPath(Event):
         return QueryXPath(*Event.new(), xpath, attributes)
 
     @staticmethod
-    def _query(root: ET._Element, query: "QueryXPath", namespaces: Dict[str, str] = {}):
+    def _query(
+        root: ET._Element,
+        query: "QueryXPath",
+        namespaces: Dict[str, str] = {},
+        xpath_cache: XPathCache = None,
+        on_change: Callable = None,
+        planner: QueryPlanner = None,
+    ):
         if isinstance(query.attributes, list):
-            return QueryXPath._select(root, query, namespaces=namespaces)
+            return QueryXPath._select(
+                root,
+                query,
+                namespaces=namespaces,
+                xpath_cache=xpath_cache,
+                planner=planner,
+            )
         elif isinstance(query.attributes, dict):
-            pass  # return QueryXPath._update(root, query)
+            return QueryXPath._update(
+                root,
+                query,
+                namespaces=namespaces,
+                xpath_cache=xpath_cache,
+                on_change=on_change,
+                planner=planner,
+            )
         else:
             raise ValueError(
                 f"Invalid type {type(query.attributes)} for query attributes."
@@ -33,11 +119,90 @@ class QueryXPath(Event):
 
     @staticmethod
     def _select(
-        root: ET._Element, query: "QueryXPath", namespaces: Dict[str, str] = dict()
+        root: ET._Element,
+        query: "QueryXPath",
+        namespaces: Dict[str, str] = dict(),
+        xpath_cache: XPathCache = None,
+        planner: QueryPlanner = None,
     ):
-        elements = root.xpath(query.xpath, namespaces=namespaces)
-        results = []
+        results = [
+            result.xml if isinstance(result, XPathMatch) else result
+            for result in QueryXPath._iter_select(
+                root,
+                query,
+                namespaces=namespaces,
+                xpath_cache=xpath_cache,
+                planner=planner,
+            )
+        ]
+        return Response.new(query, success=True, data=results)
+
+    @staticmethod
+    def _update(
+        root: ET._Element,
+        query: "QueryXPath",
+        namespaces: Dict[str, str] = dict(),
+        xpath_cache: XPathCache = None,
+        on_change: Callable = None,
+        planner: QueryPlanner = None,
+    ):
+        """Applies the attributes of `query` to every element that matches its xpath in a single pass.
+
+        A value of `None` removes the attribute. The response data is `{"count": n, "old": {attribute: {old_value: count}}}`,
+        where `n` is the number of elements that were updated and old values are raw strings (`None` if the attribute was absent).
+        `on_change(element, key, old_value, new_value)` is called after each attribute is changed, if given.
+        """
+        elements = _evaluate(
+            root, query.xpath, namespaces, xpath_cache=xpath_cache, planner=planner
+        )
+        if not all(isinstance(element, ET._Element) for element in elements):
+            raise ValueError(
+                f"XPath query {query.xpath} must only match elements to be used in an update."
+            )
+        updates = [
+            (key, None if value is None else str(value))
+            for key, value in query.attributes.items()
+        ]
+        old = {key: {} for key, _ in updates}
         for element in elements:
+            attrib = element.attrib
+            for key, value in updates:
+                old_value = attrib.get(key)
+                counts = old[key]
+                counts[old_value] = counts.get(old_value, 0) + 1
+                if value is None:
+                    attrib.pop(key, None)
+                else:
+                    attrib[key] = value
+                if on_change is not None:
+                    on_change(element, key, old_value, value)
+        return Response.new(
+            query, success=True, data=dict(count=len(elements), old=old)
+        )
+
+    @staticmethod
+    def _iter_select(
+        root: ET._Element,
+        query: "QueryXPath",
+        namespaces: Dict[str, str] = dict(),
+        xpath_cache: XPathCache = None,
+        offset: int = 0,
+        limit: int = None,
+        planner: QueryPlanner = None,
+        stream: bool = False,
+    ) -> Iterator[Any]:
+        elements = None
+        if stream and planner is not None:
+            # simple selectors are matched while the tree is walked, so a page only costs the elements up to its end.
+            elements = planner.iter_select(root, query.xpath, namespaces)
+        if elements is None:
+            # lxml builds the list of all matches first.
+            elements = _evaluate(
+                root, query.xpath, namespaces, xpath_cache=xpath_cache, planner=planner
+            )
+        stop = None if limit is None else offset + limit
+        # results are only built for the requested page, and elements are not serialised until asked.
+        for element in islice(elements, offset, stop):
             if isinstance(element, ET._Element):
                 if len(query.attributes) > 0:
                     # TODO rather than none, return a Missing object?
@@ -46,14 +211,39 @@ class QueryXPath(Event):
                     }
                 else:
                     # return the XML element itself!
-                    result = _tostring(element)
+                    result = XPathMatch(element)
             elif isinstance(element, ET._ElementUnicodeResult):
                 result = str(element)
             else:
                 raise ValueError(f"Unknown element type {type(element)}")
+            yield result
 
-            results.append(result)
-        return Response.new(query, success=True, data=results)
+
+class XPathMatch:
+    """An element that was matched by a streaming XPath query, see `XMLApplication.iter_query`. The element is only serialised when `xml` is first accessed."""
+
+    __slots__ = ("element", "_xml")
+
+    def __init__(self, element: ET._Element):
+        self.element = element
+        self._xml = None
+
+    @property
+    def xml(self) -> str:
+        """The (unescaped) XML of the element."""
+        if self._xml is None:
+            self._xml = _tostring(self.element)
+        return self._xml
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gets the value of an attribute of the element."""
+        return self.element.get(key, default)
+
+    def __str__(self):
+        return self.xml
+
+    def __repr__(self):
+        return f"XPathMatch({self.element.tag}, id={self.element.get('id')!r})"
 
 
 @dataclass
@@ -63,35 +253,67 @@ class QueryXML(QueryXPath):
     @staticmethod
     def new(element_id: str, attributes: List[str] | Dict[str, Any]) -> "QueryXML":
         assert isinstance(attributes, (list, dict))
-        xpath = f".//*[@id='%s']"
+        # the id is passed as an XPath variable when the query is evaluated, so it never needs quoting.
+        xpath = ".//*[@id=$id]"
         return QueryXML(*astuple(QueryXPath.new(xpath, attributes)), element_id)
 
     @staticmethod
-    def _xpath(root: ET._Element, xpath: str):
-        elements = root.xpath(xpath)
+    def _xpath(
+        root: ET._Element,
+        query: "QueryXML",
+        xpath_cache: XPathCache = None,
+        planner: QueryPlanner = None,
+    ):
+        elements = _evaluate(
+            root,
+            query.xpath,
+            xpath_cache=xpath_cache,
+            planner=planner,
+            id=query.element_id,
+        )
         if len(elements) == 0:
-            raise ValueError(f"No element was found with xpath query: {xpath}.")
+            raise ValueError(
+                f"No element was found with xpath query: {query.xpath} (id={query.element_id!r})."
+            )
         if len(elements) > 1:
             raise ValueError(
-                f"More than one element was found with xpath query {xpath}, '@id' should be a unique identifier."
+                f"More than one element was found with xpath query {query.xpath} (id={query.element_id!r}), '@id' should be a unique identifier."
             )
         return elements[0]
 
     @staticmethod
-    def _query(root: ET._Element, query: "QueryXML") -> "Response":
+    def _query(
+        root: ET._Element,
+        query: "QueryXML",
+        xpath_cache: XPathCache = None,
+        on_change: Callable = None,
+        planner: QueryPlanner = None,
+    ) -> "Response":
         if isinstance(query.attributes, list):
-            return QueryXML._select(root, query)
+            return QueryXML._select(
+                root, query, xpath_cache=xpath_cache, planner=planner
+            )
         elif isinstance(query.attributes, dict):
-            return QueryXML._update(root, query)
+            return QueryXML._update(
+                root,
+                query,
+                xpath_cache=xpath_cache,
+                on_change=on_change,
+                planner=planner,
+            )
         else:
             raise ValueError(
                 f"Invalid type {type(query.attributes)} for query attributes."
             )
 
     @staticmethod
-    def _select(root: ET._Element, query: "QueryXML"):
-        xpath = query.xpath % query.element_id
-        element = QueryXML._xpath(root, xpath)
+    def _select(
+        root: ET._Element,
+        query: "QueryXML",
+        xpath_cache: XPathCache = None,
+        planner: QueryPlanner = None,
+    ):
+        element = QueryXML._xpath(root, query, xpath_cache=xpath_cache, planner=planner)
         result = {}
         # TODO select element itself!
         for key in query.attributes:
@@ -101,14 +323,22 @@ class QueryXML(QueryXPath):
         return Response.new(query, True, result)
 
     @staticmethod
-    def _update(root: ET._Element, query: "QueryXML"):
-        xpath = query.xpath % query.element_id
-        element = QueryXML._xpath(root, xpath)
+    def _update(
+        root: ET._Element,
+        query: "QueryXML",
+        xpath_cache: XPathCache = None,
+        on_change: Callable = None,
+        planner: QueryPlanner = None,
+    ):
+        element = QueryXML._xpath(root, query, xpath_cache=xpath_cache, planner=planner)
         result = {}
         for key, value in query.attributes.items():
             # TODO re raise the exception?
-            result[key] = _xml_to_primitive(element.get(key))
+            old_value = element.get(key)
+            result[key] = _xml_to_primitive(old_value)
             element.set(key, str(value))
+            if on_change is not None:
+                on_change(element, key, old_value, str(value))
         result = {query.element_id: result}
         return Response.new(query, True, result)
 
@@ -147,24 +377,117 @@ class Response(Event):
 
 
 class XMLApplication(Application):
-    def __init__(self, xml):
-        self._root = ET.fromstring(xml)
+    def __init__(
+        self,
+        xml,
+        parser_options: ParserOptions = None,
+        xpath_cache_size: int = XPATH_CACHE_SIZE,
+        indexes: Iterable[str] = ("id",),
+        query_planner: bool = True,
+    ):
+        """Constructor.
+
+        Args:
+            xml (str | bytes): the XML code of the document.
+            parser_options (ParserOptions, optional): options for the XML parser.
+            xpath_cache_size (int, optional): the maximum number of compiled XPath expressions that are cached.
+            indexes (Iterable[str], optional): attributes to maintain secondary indexes for, see `find_elements`.
+            query_planner (bool, optional): whether simple selectors (e.g. `//svg:rect[@class='c']`) are answered from the indexes, see `planner.QueryPlanner`.
+        """
+        self._root = parse_xml(xml, parser_options)
         self._namespaces = {"svg": "http://www.w3.org/2000/svg"}
+        self._xpath_cache = XPathCache(xpath_cache_size)
+        # secondary indexes over attribute values, e.g. `class`, kept current by updates
+        self._indexes = Indexes(self._root, indexes)
+        self._planner = QueryPlanner(self._indexes) if query_planner else None
+
+    @property
+    def indexes(self) -> Indexes:
+        return self._indexes
+
+    def find_elements(self, attribute: str, value: str) -> List[ET._Element]:
+        """Finds all elements whose `attribute` has `value` (or contains the token `value` for `class`), using the index if `attribute` is indexed."""
+        if attribute in self._indexes:
+            return self._indexes.get(attribute, value)
+        return find_elements(self._root, attribute, value)
 
     def query(self, query: QueryXML):
+        on_change = self._indexes.on_change if self._indexes else None
         if isinstance(query, QueryXML):
             try:
-                return QueryXML._query(self._root, query)
+                return QueryXML._query(
+                    self._root,
+                    query,
+                    xpath_cache=self._xpath_cache,
+                    on_change=on_change,
+                    planner=self._planner,
+                )
             except Exception as e:
                 return Response.new(query, False, {"exception": e})
         elif isinstance(query, QueryXPath):
             try:
-                return QueryXPath._query(self._root, query, namespaces=self._namespaces)
+                return QueryXPath._query(
+                    self._root,
+                    query,
+                    namespaces=self._namespaces,
+                    xpath_cache=self._xpath_cache,
+                    on_change=on_change,
+                    planner=self._planner,
+                )
             except Exception as e:
                 raise e  # return ResponseXML.new(query, False, {"exception": e})
         else:
             raise ValueError(f"Unknown query type: {type(query)}.")
 
+    def iter_query(
+        self, query: QueryXPath, offset: int = 0, limit: int = None
+    ) -> Iterator[Any]:
+        """Streams the results of a select query one at a time, rather than building a single `Response`.
+
+        Simple selectors (`//tag`, `//tag[@attribute]` and `//tag[@attribute='value']`, see `planner.QueryPlanner.iter_select`) are matched
+        one element at a time, so a page costs time proportional to its end rather than to the number of matches. Other XPath expressions
+        (and all expressions if the application has no query planner) are evaluated by lxml, which builds the list of all matches first.
+
+        Args:
+            query (QueryXPath): the select query, its attributes must be a list.
+            offset (int, optional): the number of results to skip, for paging.
+            limit (int, optional): the maximum number of results, defaults to all.
+
+        Yields:
+            Any: for each match, a dict of the selected attributes if any are given, otherwise an `XPathMatch` for elements (which serialises lazily) or a `str` for text and attribute results.
+        """
+        if not isinstance(query.attributes, list):
+            raise ValueError(
+                "Only select queries (with list attributes) can be streamed."
+            )
+        if isinstance(query, QueryXML):
+            raise ValueError(
+                "`QueryXML` selects a single element and cannot be streamed."
+            )
+        yield from QueryXPath._iter_select(
+            self._root,
+            query,
+            namespaces=self._namespaces,
+            xpath_cache=self._xpath_cache,
+            offset=offset,
+            limit=limit,
+            planner=self._planner,
+            stream=True,
+        )
+
+    async def aiter_query(
+        self,
+        query: QueryXPath,
+        offset: int = 0,
+        limit: int = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Any]:
+        """Asynchronous version of `iter_query`, control is yielded to the event loop after every `batch_size` results."""
+        for i, result in enumerate(self.iter_query(query, offset=offset, limit=limit)):
+            yield result
+            if (i + 1) % batch_size == 0:
+                await asyncio.sleep(0)
+
 
 if __name__ == "__main__":
     import unittest
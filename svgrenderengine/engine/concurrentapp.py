@@ -0,0 +1,153 @@
+""" Module defining the ConcurrentSVGApplication class, a single writer / many reader front-end for SVGApplication. """
+
+import copy
+import threading
+from contextlib import contextmanager
+from typing import List
+
+from lxml import etree as ET
+
+from ..event import QueryEvent, QuerySVGEvent, ResponseEvent
+from .svgapp import SVGApplication
+
+__all__ = ("ConcurrentSVGApplication",)
+
+
+class ConcurrentSVGApplication:
+    """Wraps an `SVGApplication` so that `SELECT` queries may be served from many threads while a single writer applies `UPDATE` queries.
+
+    Updates are applied to the (private) element tree of the wrapped application. Readers never see this tree, instead they
+    read from an immutable copy (snapshot) that is published once an update batch is complete. Publishing swaps a single
+    reference, so a reader always sees either the complete previous state or the complete new state, never a partial update.
+    Publishing copies the whole element tree, so it costs O(size of the document): group updates with `batch` (or `update_many`)
+    to publish once per batch. Updates outside of a batch are published lazily (see `auto_publish`): the copy is made by the first
+    read after one or more updates, rather than by every update.
+    Selecting never waits for the writer, unless the wrapped application has lazy layers (see `SVGApplication.materialise`): then
+    `select` takes the writer lock to materialise the layer that holds the selected element, and waits for any update that
+    holds it.
+
+    Example:
+        ```
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=svg_code))
+        # simulation thread
+        with app.batch():
+            app.query(update_width)
+            app.query(update_height)
+        # any other thread
+        app.query(select_size)
+        ```
+
+    Attributes:
+        application (SVGApplication): the wrapped application, only the writer should use it directly.
+        auto_publish (bool): whether `UPDATE`s that are made outside of a `batch` are published automatically. They are published on the next read (`select`, `snapshot` or `version`), so consecutive updates without reads in between are published together. A read does not wait for a batch that is in progress, it is served from the current snapshot.
+    """
+
+    def __init__(self, application: SVGApplication, auto_publish: bool = True):
+        self.application = application
+        self.auto_publish = auto_publish
+        self._write_lock = threading.RLock()
+        self._batch_depth = 0
+        self._version = 0
+        self._stale = False  # whether there are updates to publish on the next read
+        self._snapshot = self._copy_tree()
+
+    @property
+    def snapshot(self) -> ET._Element:
+        """The most recently published element tree, this MUST be treated as read-only."""
+        if self._stale:
+            self._publish_stale()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """The number of snapshots that have been published since creation."""
+        if self._stale:
+            self._publish_stale()
+        return self._version
+
+    def query(self, query_event: QuerySVGEvent) -> ResponseEvent:
+        assert isinstance(query_event, QuerySVGEvent)
+        if query_event.action == QueryEvent.UPDATE:
+            return self.update(query_event)
+        elif query_event.action == QueryEvent.SELECT:
+            return self.select(query_event)
+
+    def select(self, query_event: QuerySVGEvent) -> ResponseEvent:
+        """Selects from the most recently published snapshot. This is safe to call from any thread. If the wrapped application has
+        lazy layers, the writer lock is taken to materialise the layer that holds the element.
+
+        Args:
+            query_event (QuerySVGEvent): the select query.
+
+        Returns:
+            ResponseEvent: see `SVGApplication.select`.
+        """
+        if self._stale:
+            self._publish_stale()
+        if self.application._lazy_layers:
+            with self._write_lock:
+                # the element may be in a lazy layer that has not yet been published, a partial batch is never published.
+                materialised = self.application._materialise_for(query_event)
+                if materialised and self._batch_depth == 0:
+                    self.publish()
+        return SVGApplication.select(self._snapshot, query_event)
+
+    def update(self, query_event: QuerySVGEvent) -> ResponseEvent:
+        """Applies an update to the writer tree. The update becomes visible to readers when the next snapshot is published, see `auto_publish`.
+
+        Args:
+            query_event (QuerySVGEvent): the update query.
+
+        Returns:
+            ResponseEvent: see `SVGApplication.update`.
+        """
+        with self._write_lock:
+            response = self.application.query(query_event)
+            if self.auto_publish and self._batch_depth == 0:
+                self._stale = True
+        return response
+
+    def update_many(self, query_events: List[QuerySVGEvent]) -> List[ResponseEvent]:
+        """Applies a collection of updates as a single batch, see `batch`."""
+        with self.batch():
+            return [self.update(query_event) for query_event in query_events]
+
+    @contextmanager
+    def batch(self):
+        """Context manager that groups updates, a single snapshot is published when the (outermost) batch exits."""
+        with self._write_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.publish()
+
+    def publish(self):
+        """Publishes the current state of the writer tree to readers."""
+        with self._write_lock:
+            snapshot = self._copy_tree()
+            self._version += 1
+            self._snapshot = snapshot  # single reference swap, readers hold on to the old tree until they are done.
+            self._stale = False
+
+    def _publish_stale(self):
+        # readers do not wait for the writer, if it holds the lock (e.g. in a batch) the current snapshot is read.
+        if self._write_lock.acquire(blocking=False):
+            try:
+                if self._stale and self._batch_depth == 0:
+                    self.publish()
+            finally:
+                self._write_lock.release()
+
+    def _copy_tree(self):
+        return copy.deepcopy(self.application.element_tree_root)
+
+    @property
+    def width(self):
+        return int(self.snapshot.get("width"))
+
+    @property
+    def height(self):
+        return int(self.snapshot.get("height"))
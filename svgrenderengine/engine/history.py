@@ -0,0 +1,163 @@
+"""
+    Module defining the change history that backs `snapshot` and `restore` on the applications.
+
+    Changes are recorded as a persistent (append-only) tree of nodes, each node holding a single change and a reference to its parent.
+    A snapshot is simply a reference to a node, so taking a snapshot is O(1) and all snapshots share their common history.
+    Restoring walks from the current node up to the common ancestor (undoing changes) and down to the target node (redoing changes),
+    so the cost of a restore is proportional to the number of changes that separate the two states, not to the size of the state.
+"""
+
+from typing import Any, List, Tuple
+
+from lxml import etree as ET
+
+from .variables import VariableStore, MISSING
+
+__all__ = ("History", "Snapshot", "MISSING")
+
+
+class AttributeChange:
+    """A change to a single attribute of an XML element, `None` values indicate that the attribute is absent."""
+
+    __slots__ = ("element", "key", "old", "new")
+
+    def __init__(self, element: ET._Element, key: str, old: str, new: str):
+        self.element = element
+        self.key = key
+        self.old = old
+        self.new = new
+
+    def apply(self, reverse: bool = False) -> Tuple[ET._Element, str, Any, Any]:
+        before, after = (self.new, self.old) if reverse else (self.old, self.new)
+        if after is None:
+            self.element.attrib.pop(self.key, None)
+        else:
+            self.element.set(self.key, after)
+        return self.element, self.key, before, after
+
+
+class ContentChange:
+    """A change to the content (text and children) of an XML element, content is given as a tuple `(text, children)`."""
+
+    __slots__ = ("element", "old", "new")
+
+    def __init__(self, element: ET._Element, old: tuple, new: tuple):
+        self.element = element
+        self.old = old
+        self.new = new
+
+    def apply(self, reverse: bool = False) -> Tuple[ET._Element, str, Any, Any]:
+        before, after = (self.new, self.old) if reverse else (self.old, self.new)
+        set_element_content(self.element, after)
+        return self.element, "_inner_xml", before, after
+
+
+class VariableChange:
+    """A change to a single (dot-separated) key of a variable store, `MISSING` indicates that the key is absent."""
+
+    __slots__ = ("variables", "key", "old", "new")
+
+    def __init__(self, variables: VariableStore, key: str, old: Any, new: Any):
+        self.variables = variables
+        self.key = key
+        self.old = old
+        self.new = new
+
+    def apply(self, reverse: bool = False) -> Tuple[VariableStore, str, Any, Any]:
+        before, after = (self.new, self.old) if reverse else (self.old, self.new)
+        if after is MISSING:
+            self.variables.delete(self.key)
+        else:
+            self.variables.set(self.key, after)
+        return self.variables, self.key, before, after
+
+
+class _Node:
+    __slots__ = ("parent", "change", "depth")
+
+    def __init__(self, parent: "_Node", change: Any):
+        self.parent = parent
+        self.change = change
+        self.depth = 0 if parent is None else parent.depth + 1
+
+
+class Snapshot:
+    """An opaque handle to a recorded application state, see `History.snapshot`."""
+
+    __slots__ = ("_history", "_node")
+
+    def __init__(self, history: "History", node: _Node):
+        self._history = history
+        self._node = node
+
+    @property
+    def depth(self) -> int:
+        """The number of changes recorded between the base state and this snapshot."""
+        return self._node.depth
+
+
+class History:
+    """A branching history of changes, see module documentation for details.
+
+    Recording only starts once the first snapshot is taken, before that there is nothing that could be restored so
+    changes are not kept.
+    """
+
+    def __init__(self):
+        self._head = _Node(None, None)
+        self._recording = False
+
+    @property
+    def recording(self) -> bool:
+        """Whether changes are currently being recorded."""
+        return self._recording
+
+    def record(self, change: Any):
+        """Records a change that has already been applied."""
+        if self._recording:
+            self._head = _Node(self._head, change)
+
+    def snapshot(self) -> Snapshot:
+        """Takes a snapshot of the current state, this is O(1)."""
+        self._recording = True
+        return Snapshot(self, self._head)
+
+    def restore(self, snapshot: Snapshot) -> List[Tuple[Any, str, Any, Any]]:
+        """Restores the state that was current when `snapshot` was taken.
+
+        Args:
+            snapshot (Snapshot): snapshot to restore, it must have been taken from this history.
+
+        Returns:
+            List[Tuple[Any, str, Any, Any]]: the changes that were made in order to restore, as (target, key, before, after) tuples.
+        """
+        if snapshot._history is not self:
+            raise ValueError("Snapshot was not taken from this application.")
+        undo, redo = [], []
+        source, target = self._head, snapshot._node
+        while source.depth > target.depth:
+            undo.append(source)
+            source = source.parent
+        while target.depth > source.depth:
+            redo.append(target)
+            target = target.parent
+        while source is not target:
+            undo.append(source)
+            redo.append(target)
+            source, target = source.parent, target.parent
+        applied = [node.change.apply(reverse=True) for node in undo]
+        applied.extend(node.change.apply() for node in reversed(redo))
+        self._head = snapshot._node
+        return applied
+
+
+def get_element_content(element: ET._Element) -> tuple:
+    """Gets the content of an element as a tuple `(text, children)`."""
+    return element.text, tuple(element)
+
+
+def set_element_content(element: ET._Element, content: tuple):
+    """Sets the content of an element from a tuple `(text, children)`, see `get_element_content`."""
+    text, children = content
+    element[:] = children
+    element.text = text
@@ -0,0 +1,246 @@
+"""
+    Module defining the HoverTracker class, which keeps track of the clickable elements that are under the mouse pointer.
+
+    Clickable elements (`svgre:clickable="true"`) are kept in a uniform grid of their bounds (see `GeometryCache`), which is kept current
+    with changes to the document. When the pointer moves, the elements that were hovered are checked again first, then the other
+    elements in the cell of the grid that the pointer is in. The cost of a move is therefore proportional to the number of elements
+    near the pointer rather than to the size of the document, and a pointer that has not moved costs nothing.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from lxml import etree as ET
+
+from ..event import Event, MouseEnterEvent, MouseLeaveEvent
+from ..render.geometry import NON_RENDERED_TAGS, GeometryCache, Point
+from .index import _document_position
+from .lazy import SVGRE_NAMESPACE
+
+__all__ = ("HoverTracker",)
+
+CLICKABLE_ATTRIBUTE = f"{{{SVGRE_NAMESPACE}}}clickable"
+MAX_CELLS = 256  # elements that cover more cells than this are checked at every move
+
+Cell = Tuple[int, int]
+
+
+class HoverTracker:
+    """Keeps track of the clickable elements under the mouse pointer and creates `MouseEnterEvent` and `MouseLeaveEvent` events when they change, see module documentation.
+
+    Example:
+        ```
+        hover = HoverTracker(app)
+        for event in hover.update((x, y)):  # position in the user space of the document
+            ...  # MouseEnterEvent or MouseLeaveEvent
+        app.query(...)
+        events = hover.refresh()  # elements may have moved under the pointer
+        ```
+    """
+
+    def __init__(self, application: Any, cell_size: float = 64.0):
+        """Constructor.
+
+        Args:
+            application (Any): the application (e.g. `SVGApplication`) whose clickable elements are tracked, changes are tracked with a listener.
+            cell_size (float, optional): size of the cells of the grid, in user units. Defaults to 64.
+        """
+        self.application = application
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Dict[ET._Element, None]] = {}
+        self._large: Dict[ET._Element, None] = {}  # elements that cover many cells
+        self._entries: Dict[ET._Element, Optional[Tuple[Cell, Cell]]] = {}
+        self._hovered: List[ET._Element] = []  # in document order
+        self._point: Optional[Point] = None
+        self._position = None  # position of the pointer that is given to events
+        self._changed: Dict[ET._Element, None] = {}
+        self._stale = True
+        application.add_listener(self.on_change)
+
+    @property
+    def geometry(self) -> GeometryCache:
+        return self.application.geometry
+
+    @property
+    def hovered(self) -> List[ET._Element]:
+        """The clickable elements that are under the pointer, in document order."""
+        return list(self._hovered)
+
+    def close(self):
+        """Stops tracking changes to the application."""
+        self.application.remove_listener(self.on_change)
+        self.clear()
+
+    def clear(self):
+        """Forgets the hovered elements and the grid, the grid is built again on the next update."""
+        self._cells.clear()
+        self._large.clear()
+        self._entries.clear()
+        self._changed.clear()
+        self._hovered = []
+        self._point = self._position = None
+        self._stale = True
+
+    def update(self, point: Optional[Point], position: tuple = None) -> List[Event]:
+        """Updates the hovered elements after the pointer has moved.
+
+        Args:
+            point (Point): position of the pointer in the user space of the document, `None` if the pointer is not over the document.
+            position (tuple, optional): position of the pointer that is given to the events (e.g. in window coordinates). Defaults to `point`.
+
+        Returns:
+            List[Event]: a `MouseLeaveEvent` for each element that is no longer hovered (innermost first), then a `MouseEnterEvent` for each element that is now hovered (outermost first).
+        """
+        changed = self._refresh()
+        if point is not None:
+            point = (float(point[0]), float(point[1]))
+        if point == self._point and not changed:
+            return []
+        self._point = point
+        self._position = point if position is None else position
+        return self._events([] if point is None else self._hit(point))
+
+    def refresh(self) -> List[Event]:
+        """Updates the hovered elements after the document has changed, with the pointer where it was last, see `update`."""
+        if not self._refresh() or self._point is None:
+            return []
+        return self._events(self._hit(self._point))
+
+    def _events(self, hovered: List[ET._Element]) -> List[Event]:
+        if hovered == self._hovered:
+            return []
+        position = self._position
+        now, before = set(hovered), set(self._hovered)
+        events = [
+            MouseLeaveEvent(*Event.new(), position=position, element_id=e.get("id"))
+            for e in reversed(self._hovered)
+            if e not in now
+        ]
+        events.extend(
+            MouseEnterEvent(*Event.new(), position=position, element_id=e.get("id"))
+            for e in hovered
+            if e not in before
+        )
+        self._hovered = hovered
+        return events
+
+    def on_change(self, element: ET._Element, key: str, old: Any, new: Any):
+        """Records a change to the document, called as a listener, see `SVGApplication.add_listener`."""
+        if key == "_inner_xml":
+            self._stale = True  # elements may have been removed
+        else:
+            self._changed[element] = None
+
+    def _hit(self, point: Point) -> List[ET._Element]:
+        geometry = self.geometry
+        # elements that were hovered are the most likely to still be hovered
+        hovered = [
+            e
+            for e in self._hovered
+            if e in self._entries and geometry.contains(e, point)
+        ]
+        checked = set(self._hovered)
+        candidates = list(self._cells.get(self._cell(point), ()))
+        candidates.extend(self._large)
+        for element in candidates:
+            if element not in checked:
+                checked.add(element)
+                if geometry.contains(element, point):
+                    hovered.append(element)
+        if len(hovered) > 1:
+            hovered.sort(key=_document_position)
+        return hovered
+
+    def _refresh(self) -> bool:
+        """Brings the grid up to date, returns whether anything changed."""
+        if self._stale:
+            self._rebuild()
+            return True
+        if not self._changed:
+            return False
+        changed, self._changed = self._changed, {}
+        update = {}
+        for element in changed:
+            if _is_shared(element, self.geometry):
+                # may be drawn by `<use>` elements anywhere in the document
+                self._rebuild()
+                return True
+            # the bounds of the element, its ancestors and its descendants may have changed
+            for ancestor in element.iterancestors():
+                if ancestor in self._entries:
+                    update[ancestor] = None
+            for descendant in element.iter():
+                if descendant in self._entries or _is_clickable(descendant):
+                    update[descendant] = None
+        for element in update:
+            self._remove(element)
+            if _is_clickable(element):
+                self._add(element)
+        return True
+
+    def _rebuild(self):
+        self._cells.clear()
+        self._large.clear()
+        self._entries.clear()
+        self._changed.clear()
+        self._stale = False
+        root = self.application.element_tree_root
+        indexes = getattr(self.application, "indexes", None)
+        if indexes is not None and "svgre:clickable" in indexes:
+            elements = indexes.get("svgre:clickable", "true", ordered=True)
+        else:
+            elements = root.iterfind(
+                ".//*[@svgre:clickable='true']", {"svgre": SVGRE_NAMESPACE}
+            )
+        for element in elements:
+            self._add(element)
+
+    def _add(self, element: ET._Element):
+        bounds = self.geometry.bounds(element)
+        if bounds is None:
+            self._entries[element] = None  # hidden, kept to be updated
+            return
+        first, last = self._cell(bounds[:2]), self._cell(bounds[2:])
+        if (last[0] - first[0] + 1) * (last[1] - first[1] + 1) > MAX_CELLS:
+            self._large[element] = None
+            self._entries[element] = None
+            return
+        self._entries[element] = (first, last)
+        for cell in _cells(first, last):
+            self._cells.setdefault(cell, {})[element] = None
+
+    def _remove(self, element: ET._Element):
+        entry = self._entries.pop(element, None)
+        self._large.pop(element, None)
+        if entry is not None:
+            for cell in _cells(*entry):
+                elements = self._cells[cell]
+                del elements[element]
+                if not elements:
+                    del self._cells[cell]
+
+    def _cell(self, point: Point) -> Cell:
+        size = self.cell_size
+        return (math.floor(point[0] / size), math.floor(point[1] / size))
+
+
+def _cells(first: Cell, last: Cell):
+    for i in range(first[0], last[0] + 1):
+        for j in range(first[1], last[1] + 1):
+            yield (i, j)
+
+
+def _is_clickable(element: ET._Element) -> bool:
+    return element.get(CLICKABLE_ATTRIBUTE) == "true"
+
+
+def _is_shared(element: ET._Element, geometry: GeometryCache) -> bool:
+    """Whether the element is (part of) an element that is not rendered where it is defined or that is referenced by a `<use>`."""
+    for node in element.iterancestors():
+        if geometry.is_referenced(node) or (
+            isinstance(node.tag, str) and ET.QName(node).localname in NON_RENDERED_TAGS
+        ):
+            return True
+    return geometry.is_referenced(element) or (
+        ET.QName(element).localname in NON_RENDERED_TAGS
+    )
@@ -0,0 +1,215 @@
+"""
+    Module defining secondary indexes, which map attribute values to the elements that have them.
+
+    Indexes are kept up to date with changes that are made through the application (they are driven by the same change
+    notifications as listeners, see `SVGApplication.add_listener`), so selecting elements by an indexed attribute does not
+    require a scan of the tree.
+"""
+
+from typing import Dict, Iterable, List
+
+from lxml import etree as ET
+
+from .lazy import SVGRE_NAMESPACE
+
+__all__ = ("AttributeIndex", "Indexes", "resolve_attribute", "find_elements")
+
+NAMESPACES = {"svgre": SVGRE_NAMESPACE}
+TOKEN_ATTRIBUTES = ("class",)  # attributes that hold whitespace-separated tokens
+
+
+def resolve_attribute(attribute: str) -> str:
+    """Resolves a prefixed attribute name (e.g. `svgre:clickable`) to its qualified name (`{svg_render_engine}clickable`)."""
+    prefix, sep, name = attribute.partition(":")
+    if sep and not attribute.startswith("{"):
+        if prefix not in NAMESPACES:
+            raise ValueError(f"Unknown namespace prefix {prefix} in {attribute}.")
+        return f"{{{NAMESPACES[prefix]}}}{name}"
+    return attribute
+
+
+def find_elements(root: ET._Element, attribute: str, value: str) -> List[ET._Element]:
+    """Finds all elements in the tree of `root` whose `attribute` has `value` (or contains the token `value` for `class`) by scanning the tree.
+
+    Args:
+        root (ET._Element): root of the tree.
+        attribute (str): the attribute, see `resolve_attribute`.
+        value (str): the value.
+
+    Returns:
+        List[ET._Element]: the elements, in document order.
+    """
+    attribute = resolve_attribute(attribute)
+    tokens = attribute in TOKEN_ATTRIBUTES
+    elements = []
+    for element in root.iter(ET.Element):
+        other = element.get(attribute)
+        if other is not None and (value in other.split() if tokens else other == value):
+            elements.append(element)
+    return elements
+
+
+class AttributeIndex:
+    """Maps each value of a single attribute to the elements that have that value.
+
+    Attributes:
+        attribute (str): the (qualified) name of the indexed attribute.
+        tokens (bool): whether values are split into whitespace-separated tokens that are indexed separately (as for `class`).
+    """
+
+    def __init__(self, attribute: str, tokens: bool = None):
+        self.attribute = resolve_attribute(attribute)
+        self.tokens = attribute in TOKEN_ATTRIBUTES if tokens is None else tokens
+        # value -> elements, dicts are used as ordered sets so that results are (mostly) in document order.
+        self._index: Dict[str, Dict[ET._Element, None]] = {}
+        # values whose elements may no longer be in document order, since an element was added after the index was built.
+        self._unordered = set()
+
+    def __len__(self):
+        return len(self._index)
+
+    def values(self) -> List[str]:
+        """The values that at least one element has."""
+        return list(self._index)
+
+    def get(self, value: str, ordered: bool = False) -> List[ET._Element]:
+        """Gets the elements that have `value` (or the token `value`).
+
+        Args:
+            value (str): the value.
+            ordered (bool, optional): whether the elements must be in document order, otherwise they are in the order in which they were indexed.
+
+        Returns:
+            List[ET._Element]: the elements.
+        """
+        elements = self._index.get(value)
+        if elements is None:
+            return []
+        if ordered and value in self._unordered:
+            # sorted once, the order is kept until another element is added.
+            elements = dict.fromkeys(sorted(elements, key=_document_position))
+            self._index[value] = elements
+            self._unordered.discard(value)
+        return list(elements)
+
+    def count(self, value: str) -> int:
+        return len(self._index.get(value, ()))
+
+    def build(self, root: ET._Element):
+        """Indexes every element in the tree of `root`."""
+        self._index.clear()
+        self.add_tree(root)
+        self._unordered.clear()
+
+    def add_tree(self, root: ET._Element):
+        for element in root.iter():
+            value = (
+                element.get(self.attribute) if isinstance(element.tag, str) else None
+            )
+            if value is not None:
+                self.add(element, value)
+
+    def remove_tree(self, root: ET._Element):
+        for element in root.iter():
+            value = (
+                element.get(self.attribute) if isinstance(element.tag, str) else None
+            )
+            if value is not None:
+                self.remove(element, value)
+
+    def add(self, element: ET._Element, value: str):
+        for key in self._keys(value):
+            elements = self._index.setdefault(key, {})
+            if elements and element not in elements:
+                self._unordered.add(key)
+            elements[element] = None
+
+    def remove(self, element: ET._Element, value: str):
+        for key in self._keys(value):
+            elements = self._index.get(key)
+            if elements is not None:
+                elements.pop(element, None)
+                if not elements:
+                    del self._index[key]
+                    self._unordered.discard(key)
+
+    def _keys(self, value: str) -> Iterable[str]:
+        return value.split() if self.tokens else (value,)
+
+
+class Indexes:
+    """A collection of `AttributeIndex`es over the same document."""
+
+    def __init__(self, root: ET._Element, attributes: Iterable[str] = ()):
+        """Constructor.
+
+        Args:
+            root (ET._Element): root of the document.
+            attributes (Iterable[str], optional): attributes to index, prefixed names such as `svgre:clickable` are resolved, see `resolve_attribute`.
+        """
+        self._root = root
+        self._indexes: Dict[str, AttributeIndex] = {}
+        for attribute in attributes:
+            self.add_index(attribute)
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def __contains__(self, attribute: str):
+        return resolve_attribute(attribute) in self._indexes
+
+    def __getitem__(self, attribute: str) -> AttributeIndex:
+        return self._indexes[resolve_attribute(attribute)]
+
+    def add_index(self, attribute: str, tokens: bool = None) -> AttributeIndex:
+        """Adds (and builds) an index for `attribute`, see `AttributeIndex`."""
+        index = AttributeIndex(attribute, tokens=tokens)
+        index.build(self._root)
+        self._indexes[index.attribute] = index
+        return index
+
+    def remove_index(self, attribute: str):
+        del self._indexes[resolve_attribute(attribute)]
+
+    def get(
+        self, attribute: str, value: str, ordered: bool = False
+    ) -> List[ET._Element]:
+        """Gets the elements whose `attribute` has `value`, the attribute must be indexed, see `AttributeIndex.get`."""
+        return self[attribute].get(value, ordered=ordered)
+
+    def add_tree(self, root: ET._Element):
+        """Indexes all elements in a subtree that has been added to the document."""
+        for index in self._indexes.values():
+            index.add_tree(root)
+
+    def remove_tree(self, root: ET._Element):
+        """Removes all elements in a subtree that has been removed from the document."""
+        for index in self._indexes.values():
+            index.remove_tree(root)
+
+    def on_change(self, element: ET._Element, key: str, old, new):
+        """Updates the indexes after a change, called as a listener, see `SVGApplication.add_listener`."""
+        if key == "_inner_xml":
+            for child in old[1]:
+                self.remove_tree(child)
+            for child in new[1]:
+                self.add_tree(child)
+            return
+        index = self._indexes.get(key)
+        if index is None or old == new:
+            return
+        if old is not None:
+            index.remove(element, old)
+        if new is not None:
+            index.add(element, new)
+
+
+def _document_position(element: ET._Element) -> List[int]:
+    """The position of `element` in its document, as the index of each of its ancestors (and itself) in its parent."""
+    position = []
+    parent = element.getparent()
+    while parent is not None:
+        position.append(parent.index(element))
+        element, parent = parent, parent.getparent()
+    position.reverse()
+    return position
@@ -0,0 +1,151 @@
+"""
+    Module defining lazy layers, subtrees of a document that are kept as serialized bytes until they are needed.
+
+    A layer is marked as lazy with the `svgre:lazy` attribute (`xmlns:svgre="svg_render_engine"`), e.g. `<g id="map" svgre:lazy="true" display="none">`.
+    Lazy layers that are hidden (`display="none"` or `visibility="hidden"`) when the document is loaded have their content
+    serialized and removed from the tree, so they cost neither tree memory nor serialisation time when rendering. The content
+    is parsed back into the tree (materialised) the first time the layer (or anything inside it) is queried, or when the layer is made visible.
+"""
+
+from typing import Callable, Dict, Iterable, List
+
+from lxml import etree as ET
+
+from .parser import ParserOptions, parse_wrapped
+
+__all__ = ("LazyLayers", "SVGRE_NAMESPACE", "LAZY_ATTRIBUTE", "is_hidden")
+
+SVGRE_NAMESPACE = "svg_render_engine"
+LAZY_ATTRIBUTE = f"{{{SVGRE_NAMESPACE}}}lazy"
+CONTENT_ATTRIBUTES = ("_inner_xml", "_xml")
+
+
+def is_hidden(element: ET._Element) -> bool:
+    """Whether the element is hidden by its own `display`, `visibility` or `style` attributes."""
+    if element.get("display") == "none" or element.get("visibility") == "hidden":
+        return True
+    style = element.get("style")
+    if style:
+        style = style.replace(" ", "")
+        return "display:none" in style or "visibility:hidden" in style
+    return False
+
+
+class _Payload:
+    __slots__ = ("text", "data", "ids")
+
+    def __init__(self, text: str, data: bytes, ids: List[str]):
+        self.text = text
+        self.data = data
+        self.ids = ids
+
+
+class LazyLayers:
+    """Keeps track of the lazy layers of a document, see module documentation for details."""
+
+    def __init__(
+        self,
+        root: ET._Element,
+        parser_options: ParserOptions = None,
+        on_materialise: Callable[[ET._Element], None] = None,
+    ):
+        """Constructor, dehydrates all hidden lazy layers of the document.
+
+        Args:
+            root (ET._Element): root of the document.
+            parser_options (ParserOptions, optional): options for the parser that is used to materialise layers.
+            on_materialise (Callable[[ET._Element], None], optional): called with a layer after its content has been parsed back into the tree.
+        """
+        self._root = root
+        self._parser_options = parser_options
+        self._on_materialise = on_materialise
+        self._payloads: Dict[ET._Element, _Payload] = {}
+        self._owners: Dict[str, ET._Element] = {}  # id -> dehydrated layer it is in
+        self._layers: Dict[str, ET._Element] = {}  # id -> dehydrated layer
+        self._scan(root)
+
+    def __len__(self) -> int:
+        """The number of layers that have not been materialised."""
+        return len(self._payloads)
+
+    def nbytes(self) -> int:
+        """The total size of the serialized content of layers that have not been materialised."""
+        return sum(len(payload.data) for payload in self._payloads.values())
+
+    def find(self, element_id: str, attributes: Iterable[str] = None) -> ET._Element:
+        """Finds the dehydrated layer that must be materialised in order to query an element.
+
+        Args:
+            element_id (str): id of the queried element.
+            attributes (Iterable[str], optional): the queried attributes, `None` or empty if the whole element is queried.
+
+        Returns:
+            ET._Element: the layer, or `None` if nothing needs to be materialised.
+        """
+        layer = self._owners.get(element_id)
+        if layer is not None:
+            return layer
+        layer = self._layers.get(element_id)
+        # attributes of the layer itself are always available.
+        if layer is not None and (
+            not attributes or any(a in CONTENT_ATTRIBUTES for a in attributes)
+        ):
+            return layer
+        return None
+
+    def materialise(self, layer: ET._Element = None):
+        """Parses the content of a dehydrated layer back into the tree.
+
+        Args:
+            layer (ET._Element, optional): the layer, all layers are materialised if not given.
+        """
+        if layer is None:
+            while self._payloads:
+                self.materialise(next(iter(self._payloads)))
+            return
+        payload = self._payloads.pop(layer)
+        self._layers.pop(layer.get("id"), None)
+        for element_id in payload.ids:
+            self._owners.pop(element_id, None)
+        wrapper = parse_wrapped(
+            payload.data, "<_lazy>", "</_lazy>", self._parser_options
+        )
+        layer[:] = list(wrapper)
+        layer.text = payload.text
+        # nested layers that are still hidden stay dehydrated.
+        self._scan(layer)
+        if self._on_materialise is not None:
+            self._on_materialise(layer)
+
+    def on_update(self, element_id: str):
+        """Materialises the layer `element_id` if it is a dehydrated layer that has been made visible."""
+        layer = self._layers.get(element_id)
+        if layer is not None and not is_hidden(layer):
+            self.materialise(layer)
+
+    def _scan(self, scope: ET._Element):
+        root = self._root
+        for layer in scope.xpath(
+            ".//*[@svgre:lazy]", namespaces={"svgre": SVGRE_NAMESPACE}
+        ):
+            if layer.get(LAZY_ATTRIBUTE) == "false" or not is_hidden(layer):
+                continue
+            top = layer
+            for top in layer.iterancestors():
+                pass
+            if top is not root:
+                continue  # inside a layer that has just been dehydrated
+            self._dehydrate(layer)
+
+    def _dehydrate(self, layer: ET._Element):
+        ids = [
+            element_id
+            for element_id in layer.xpath(".//@id", smart_strings=False)
+            if self._owners.setdefault(element_id, layer) is layer
+        ]
+        data = b"".join(ET.tostring(child, with_tail=True) for child in layer)
+        self._payloads[layer] = _Payload(layer.text, data, ids)
+        if layer.get("id") is not None:
+            self._layers[layer.get("id")] = layer
+        layer.text = None
+        layer[:] = []
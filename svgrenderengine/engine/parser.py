@@ -0,0 +1,201 @@
+"""
+    Module defining the XML parser that is shared by all parse sites in the engine.
+
+    Parsers are created once per set of options (and per thread, lxml parsers cannot be shared between threads) and then reused.
+    The options used by default can be changed engine-wide with `set_default_parser_options`, or per application by passing
+    `parser_options` on construction.
+"""
+
+import mmap
+import os
+import threading
+from dataclasses import dataclass, replace
+
+from typing import IO, Iterable
+
+from lxml import etree as ET
+
+__all__ = (
+    "ParserOptions",
+    "get_parser",
+    "parse_xml",
+    "parse_wrapped",
+    "parse_file",
+    "get_default_parser_options",
+    "set_default_parser_options",
+)
+
+
+@dataclass(frozen=True)
+class ParserOptions:
+    """Options for the XML parser used by the engine.
+
+    Attributes:
+        huge_tree (bool): disables libxml2 security limits on tree depth and text size, required for very large documents. Only enable for trusted documents.
+        remove_blank_text (bool): drops whitespace-only text between elements, this shrinks the tree (and speeds up parsing and serialisation) but changes the serialised output.
+        remove_comments (bool): drops comments.
+        remove_pis (bool): drops processing instructions.
+        resolve_entities (bool | str): whether to resolve entities, `None` uses the lxml default. Use `False` for untrusted documents.
+        no_network (bool): prevents network access when looking up external documents.
+    """
+
+    huge_tree: bool = False
+    remove_blank_text: bool = False
+    remove_comments: bool = False
+    remove_pis: bool = False
+    resolve_entities: bool | str = None
+    no_network: bool = True
+
+
+_DEFAULT_PARSER_OPTIONS = ParserOptions()
+_PARSERS = threading.local()
+
+
+def get_default_parser_options() -> ParserOptions:
+    """Gets the parser options that are used when none are given."""
+    return _DEFAULT_PARSER_OPTIONS
+
+
+def set_default_parser_options(options: ParserOptions = None, **kwargs):
+    """Sets the parser options that are used (engine-wide) when none are given.
+
+    Args:
+        options (ParserOptions, optional): the new default options, defaults to the current default options.
+        kwargs: individual options to change, see `ParserOptions`.
+    """
+    global _DEFAULT_PARSER_OPTIONS  # pylint: disable=global-statement
+    _DEFAULT_PARSER_OPTIONS = replace(options or _DEFAULT_PARSER_OPTIONS, **kwargs)
+
+
+def get_parser(options: ParserOptions = None) -> ET.XMLParser:
+    """Gets the (cached) parser for the given options.
+
+    Args:
+        options (ParserOptions, optional): parser options, defaults to `get_default_parser_options()`.
+
+    Returns:
+        ET.XMLParser: the parser, this must only be used on the calling thread.
+    """
+    if options is None:
+        options = _DEFAULT_PARSER_OPTIONS
+    parsers = getattr(_PARSERS, "parsers", None)
+    if parsers is None:
+        parsers = _PARSERS.parsers = {}
+    parser = parsers.get(options)
+    if parser is None:
+        parser = parsers[options] = ET.XMLParser(**_parser_kwargs(options))
+    return parser
+
+
+def _parser_kwargs(options: ParserOptions) -> dict:
+    kwargs = dict(
+        huge_tree=options.huge_tree,
+        remove_blank_text=options.remove_blank_text,
+        remove_comments=options.remove_comments,
+        remove_pis=options.remove_pis,
+        no_network=options.no_network,
+    )
+    if options.resolve_entities is not None:
+        kwargs["resolve_entities"] = options.resolve_entities
+    return kwargs
+
+
+def parse_xml(source: str | bytes, options: ParserOptions = None) -> ET._Element:
+    """Parses an XML document from a string using the shared parser.
+
+    Args:
+        source (str | bytes): the XML document.
+        options (ParserOptions, optional): parser options, see `get_parser`.
+
+    Returns:
+        ET._Element: the root element.
+    """
+    return ET.fromstring(source, parser=get_parser(options))
+
+
+def parse_wrapped(
+    content: str | bytes, open_tag: str, close_tag: str, options: ParserOptions = None
+) -> ET._Element:
+    """Parses content between a wrapping start and end tag, the pieces are fed to the shared parser rather than being copied into one string.
+
+    The parser is reset if parsing fails for any reason (not only a syntax error), so that it can be reused.
+
+    Args:
+        content (str | bytes): the content to parse, e.g. an XML fragment.
+        open_tag (str): the start tag of the wrapping element, e.g. `"<_wrapper>"`.
+        close_tag (str): the end tag of the wrapping element.
+        options (ParserOptions, optional): parser options, see `get_parser`.
+
+    Returns:
+        ET._Element: the wrapping element.
+    """
+    parser = get_parser(options)
+    if isinstance(content, bytes):
+        open_tag, close_tag = open_tag.encode(), close_tag.encode()
+    try:
+        parser.feed(open_tag)
+        parser.feed(content)
+        parser.feed(close_tag)
+    except BaseException:
+        try:
+            parser.close()  # resets the parser, the document is incomplete
+        except ET.XMLSyntaxError:
+            pass
+        raise
+    return parser.close()
+
+
+def parse_file(
+    file: str | os.PathLike | IO[bytes],
+    options: ParserOptions = None,
+    keep_ids: Iterable[str] = None,
+    use_mmap: bool = False,
+) -> ET._Element:
+    """Parses an XML document directly from a file.
+
+    The file is read in binary mode by the parser itself (the encoding is taken from the XML declaration), the document is never
+    held in memory as a python string, so peak memory during load is roughly the size of the resulting tree.
+
+    Args:
+        file (str | os.PathLike | IO[bytes]): path to the file, or a file opened in binary mode.
+        options (ParserOptions, optional): parser options, see `get_parser`.
+        keep_ids (Iterable[str], optional): if given, the tree is pruned while it is parsed, keeping only the elements with these ids (with all of their descendants) and their ancestors. The root element is always kept.
+        use_mmap (bool, optional): memory-map the file rather than reading it through a buffered file object. Only applies if `file` is a path.
+
+    Returns:
+        ET._Element: the root element.
+    """
+    if options is None:
+        options = _DEFAULT_PARSER_OPTIONS
+    if isinstance(file, (str, os.PathLike)):
+        file = os.fspath(file)
+        if use_mmap:
+            with open(file, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as source:
+                return _parse_file(source, options, keep_ids)
+    return _parse_file(file, options, keep_ids)
+
+
+def _parse_file(source, options, keep_ids):
+    if keep_ids is None:
+        return ET.parse(source, parser=get_parser(options)).getroot()
+    keep_ids = set(keep_ids)
+    root, kept = None, []  # `kept` is the stack of kept elements that are open
+    for event, element in ET.iterparse(
+        source, events=("start", "end"), **_parser_kwargs(options)
+    ):
+        if event == "start":
+            if root is None:
+                root = element
+            if element.get("id") in keep_ids:
+                kept.append(element)
+        elif kept:
+            if kept[-1] is element:
+                kept.pop()
+        elif element is not root and not any(
+            isinstance(child.tag, str) for child in element
+        ):
+            # nothing below this element is kept, all of its child elements have already been pruned (comments may remain).
+            element.getparent().remove(element)
+    return root
@@ -0,0 +1,247 @@
+"""
+    Module defining the QueryPlanner class, which answers simple XPath selectors from secondary indexes (see `index.Indexes`).
+
+    Selectors of the form `//tag[@attribute='value']` or `.//tag[@attribute='value']` (where `tag` may be `*` or prefixed, e.g. `svg:rect`,
+    and the value may be quoted or an XPath variable such as `$id`) are answered from the index of `attribute` if there is one. Every other
+    selector, and these selectors when `attribute` is not indexed, fall back to lxml. Results are the same as lxml's, in document order.
+
+    lxml builds the list of all matches before the first can be used. For streaming (see `XMLApplication.iter_query`), selectors of the
+    forms above, and `//tag` and `//tag[@attribute]`, are instead matched one element at a time while walking the tree (see `QueryPlanner.iter_select`).
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from lxml import etree as ET
+
+from .index import Indexes
+
+__all__ = ("QueryPlan", "QueryPlanner")
+
+_NAME = r"[A-Za-z_][\w.-]*"
+_PATTERN = re.compile(
+    rf"""^\s*(?P<relative>\.)?//(?P<tag>\*|(?:{_NAME}:)?{_NAME})
+    (?:\[\s*@(?P<attribute>(?:{_NAME}:)?{_NAME})(?:\s*=\s*
+    (?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"|\$(?P<variable>{_NAME})))?\s*\])?\s*$""",
+    re.VERBOSE,
+)
+
+
+class QueryPlan:
+    """An XPath selector that can be answered from an index (if it tests the value of an attribute) or streamed, see module documentation.
+
+    Attributes:
+        relative (bool): whether the selector is relative to the context element (`.//`), which is then excluded from the results.
+        tag (str): qualified tag of the selected elements, or `None` for any element.
+        attribute (str): qualified name of the attribute that is tested, or `None` if there is no predicate.
+        value (str): the value that is tested for, `None` if it is given by `variable` or if only the presence of `attribute` is tested.
+        variable (str): name of the XPath variable that holds the value.
+    """
+
+    __slots__ = ("relative", "tag", "attribute", "value", "variable")
+
+    def __init__(self, relative, tag, attribute, value, variable):
+        self.relative = relative
+        self.tag = tag
+        self.attribute = attribute
+        self.value = value
+        self.variable = variable
+
+    def __repr__(self):
+        predicate = ""
+        if self.attribute is not None:
+            value = f"${self.variable}" if self.variable else repr(self.value)
+            predicate = (
+                f"[@{self.attribute}]"
+                if value == "None"
+                else f"[@{self.attribute}={value}]"
+            )
+        return (
+            f"QueryPlan({'.' if self.relative else ''}//{self.tag or '*'}{predicate})"
+        )
+
+    def execute(
+        self, root: ET._Element, indexes: Indexes, variables: Dict[str, Any]
+    ) -> Optional[List[ET._Element]]:
+        """Selects the matching elements from the index, the elements must be in the indexed document.
+
+        Args:
+            root (ET._Element): the context element, it must be the root of the document.
+            indexes (Indexes): the indexes of the document.
+            variables (Dict[str, Any]): values of XPath variables.
+
+        Returns:
+            List[ET._Element]: the matching elements in document order, or `None` if the index cannot be used.
+        """
+        if self.value is None and self.variable is None:
+            return None  # no value is tested
+        if self.attribute not in indexes or root.getparent() is not None:
+            return None
+        value = self.value
+        if self.variable is not None:
+            value = variables.get(self.variable)
+            if not isinstance(value, str):
+                return None  # XPath comparisons with other types are left to lxml
+        index = indexes[self.attribute]
+        if index.tokens:
+            tokens = value.split()
+            if not tokens:
+                return None
+            key = tokens[0]  # every exact match has this token
+        else:
+            key = value
+        tag, attribute = self.tag, self.attribute
+        return [
+            element
+            for element in index.get(key, ordered=True)
+            if element.get(attribute) == value
+            and (tag is None or element.tag == tag)
+            and not (self.relative and element is root)
+        ]
+
+    def iterate(
+        self, root: ET._Element, variables: Dict[str, Any]
+    ) -> Optional[Iterator[ET._Element]]:
+        """Matches the elements one at a time while walking the tree, without an index.
+
+        Args:
+            root (ET._Element): the context element.
+            variables (Dict[str, Any]): values of XPath variables.
+
+        Returns:
+            Iterator[ET._Element]: the matching elements in document order, or `None` if the selector must be evaluated by lxml.
+        """
+        attribute, value = self.attribute, self.value
+        if self.variable is not None:
+            value = variables.get(self.variable)
+            if not isinstance(value, str):
+                return None
+        tag = (
+            ET.Element if self.tag is None else self.tag
+        )  # `ET.Element` skips comments and processing instructions
+        if self.relative:
+            elements = root.iterdescendants(tag)
+        else:
+            elements = root.getroottree().getroot().iter(tag)
+        if attribute is None:
+            return elements
+        if value is None:
+            return (element for element in elements if attribute in element.attrib)
+        return (element for element in elements if element.get(attribute) == value)
+
+
+class QueryPlanner:
+    """Plans XPath selectors against indexes and caches the plans, see module documentation."""
+
+    def __init__(self, indexes: Indexes, maxsize: int = 256):
+        """Constructor.
+
+        Args:
+            indexes (Indexes): the indexes of the document that is queried.
+            maxsize (int, optional): the maximum number of cached plans.
+        """
+        self.indexes = indexes
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+
+    def plan(self, xpath: str, namespaces: Dict[str, str] = None) -> QueryPlan:
+        """Plans an XPath selector.
+
+        Args:
+            xpath (str): the XPath expression.
+            namespaces (Dict[str, str], optional): namespace prefixes used in the expression.
+
+        Returns:
+            QueryPlan: the plan, or `None` if the selector must be evaluated by lxml.
+        """
+        key = (xpath, tuple(sorted(namespaces.items())) if namespaces else ())
+        if key in self._plans:
+            self._plans.move_to_end(key)
+            return self._plans[key]
+        plan = _parse(xpath, namespaces or {})
+        self._plans[key] = plan
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+        return plan
+
+    def select(
+        self,
+        root: ET._Element,
+        xpath: str,
+        namespaces: Dict[str, str] = None,
+        **variables,
+    ) -> Optional[List[ET._Element]]:
+        """Selects the elements that match an XPath selector using the indexes.
+
+        Args:
+            root (ET._Element): the context element.
+            xpath (str): the XPath expression.
+            namespaces (Dict[str, str], optional): namespace prefixes used in the expression.
+            variables: values of XPath variables.
+
+        Returns:
+            List[ET._Element]: the matching elements in document order, or `None` if the selector must be evaluated by lxml.
+        """
+        plan = self.plan(xpath, namespaces)
+        if plan is None:
+            return None
+        return plan.execute(root, self.indexes, variables)
+
+    def iter_select(
+        self,
+        root: ET._Element,
+        xpath: str,
+        namespaces: Dict[str, str] = None,
+        **variables,
+    ) -> Optional[Iterator[ET._Element]]:
+        """Streams the elements that match an XPath selector, from the indexes if they can be used, otherwise by walking the tree.
+
+        Args:
+            root (ET._Element): the context element.
+            xpath (str): the XPath expression.
+            namespaces (Dict[str, str], optional): namespace prefixes used in the expression.
+            variables: values of XPath variables.
+
+        Returns:
+            Iterator[ET._Element]: the matching elements in document order, or `None` if the selector must be evaluated by lxml.
+        """
+        plan = self.plan(xpath, namespaces)
+        if plan is None:
+            return None
+        elements = plan.execute(root, self.indexes, variables)
+        if elements is not None:
+            return iter(elements)
+        return plan.iterate(root, variables)
+
+
+def _parse(xpath: str, namespaces: Dict[str, str]) -> Optional[QueryPlan]:
+    match = _PATTERN.match(xpath)
+    if match is None:
+        return None
+    tag = match.group("tag")
+    attribute = match.group("attribute")
+    try:
+        tag = None if tag == "*" else _qualify(tag, namespaces)
+        if attribute is not None:
+            attribute = _qualify(attribute, namespaces)
+    except KeyError:
+        return None  # lxml reports the undefined prefix
+    value = match.group("single")
+    if value is None:
+        value = match.group("double")
+    return QueryPlan(
+        relative=match.group("relative") is not None,
+        tag=tag,
+        attribute=attribute,
+        value=value,
+        variable=match.group("variable"),
+    )
+
+
+def _qualify(name: str, namespaces: Dict[str, str]) -> str:
+    # unprefixed names are in no namespace, as in XPath 1.0
+    prefix, sep, local = name.partition(":")
+    if not sep:
+        return name
+    return f"{{{namespaces[prefix]}}}{local}"
@@ -1,4 +1,10 @@
-def find_all_clickable_elements(element_tree_root):
+from ..render.geometry import GeometryCache
+
+
+def find_all_clickable_elements(element_tree_root, indexes=None):
+    # use the secondary index if there is one (see `SVGApplication.indexes`), in document order like the tree scan
+    if indexes is not None and "svgre:clickable" in indexes:
+        return indexes.get("svgre:clickable", "true", ordered=True)
     # Define the namespace for 'svgre'
     namespaces = {"svgre": "svg_render_engine"}
     # Find all elements with the 'svgre:clickable' attribute
@@ -13,12 +19,17 @@ def find_all_clickable_elements(element_tree_root):
     return clickable_elements
 
 
-def find_all_clickable_elements_at(element_tree_root, click_position):
-    clickable_elements = find_all_clickable_elements(element_tree_root)
+def find_all_clickable_elements_at(
+    element_tree_root, click_position, indexes=None, geometry=None
+):
+    clickable_elements = find_all_clickable_elements(element_tree_root, indexes)
+    # share a cache between the elements (see `SVGApplication.geometry`)
+    if geometry is None:
+        geometry = GeometryCache(root=element_tree_root)
     return [
         clickable
         for clickable in clickable_elements
-        if in_bounds(clickable, click_position)
+        if in_bounds(clickable, click_position, geometry)
     ]
 
 
@@ -51,15 +62,8 @@ def in_bounds_ellipse(clickable, click_position):
     return ((click_x - cx) / rx) ** 2 + ((click_y - cy) / ry) ** 2 <= 1
 
 
-def in_bounds(clickable, click_position):
-    tag = clickable.tag.split("}")[-1]  # Get the tag name without the namespace
-
-    if tag == "rect":
-        return in_bounds_rect(clickable, click_position)
-    elif tag == "circle":
-        return in_bounds_circle(clickable, click_position)
-    elif tag == "ellipse":
-        return in_bounds_ellipse(clickable, click_position)
-    else:
-        # Add logic for other shapes as needed
-        return False
+def in_bounds(clickable, click_position, geometry=None):
+    # all shapes, transforms included, see `GeometryCache.contains`
+    if geometry is None:
+        geometry = GeometryCache()
+    return geometry.contains(clickable, click_position)
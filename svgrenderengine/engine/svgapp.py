@@ -1,41 +1,210 @@
 import ast
 from lxml import etree as ET
 import html
-from itertools import chain
 
 from svgrenderengine.event.queryevent import QueryEvent
 
 from ..event import QuerySVGEvent, ResponseEvent, Event
+from .history import History, Snapshot, AttributeChange, ContentChange
+from .history import get_element_content
+from .parser import ParserOptions, parse_xml, parse_file, parse_wrapped
+from .lazy import LazyLayers
+from .index import Indexes, find_elements
+from ..render.geometry import GeometryCache
 
 
 class SVGApplication:
-    def __init__(self, file=None, svg_code=None):
+    def __init__(
+        self,
+        file=None,
+        svg_code=None,
+        parser_options: ParserOptions = None,
+        keep_ids=None,
+        use_mmap: bool = False,
+        lazy_layers: bool = True,
+        indexes=(),
+    ):
+        """Constructor.
+
+        Args:
+            file (str | os.PathLike | IO[bytes], optional): SVG file to load, it is parsed directly from the file (see `parse_file`).
+            svg_code (str, optional): SVG code to load if no `file` is given.
+            parser_options (ParserOptions, optional): options for the XML parser, see `ParserOptions`.
+            keep_ids (Iterable[str], optional): only keep the elements with these ids (and their ancestors and descendants) when loading from `file`, this reduces the memory used by large documents.
+            use_mmap (bool, optional): memory-map `file` rather than reading it through a buffered file object.
+            lazy_layers (bool, optional): whether hidden layers that are marked with `svgre:lazy` are kept serialized until they are queried or made visible, see `lazy.LazyLayers`.
+            indexes (Iterable[str], optional): attributes to maintain secondary indexes for (e.g. `class` or `svgre:clickable`), see `find_elements`.
+        """
         if file:
-            with open(file, "r") as svg_file:
-                svg_code = svg_file.read()
+            self.element_tree_root = parse_file(
+                file, parser_options, keep_ids=keep_ids, use_mmap=use_mmap
+            )
         elif svg_code:
-            pass
+            self.element_tree_root = parse_xml(svg_code, parser_options)
         else:
             raise ValueError("Argument `file` or `svg_code` must be specified.")
-        self.element_tree_root = ET.fromstring(svg_code)
+        self._parser_options = parser_options
+        self._history = History()
+        self._listeners = []
+        self._lazy_layers = None
+        if lazy_layers:
+            self._lazy_layers = LazyLayers(
+                self.element_tree_root,
+                parser_options,
+                on_materialise=self._on_materialise,
+            )
+        self._indexes = Indexes(self.element_tree_root, indexes)
+        self._geometry = None
+
+    @property
+    def geometry(self) -> GeometryCache:
+        """The cached geometry (bounds and hit-testing) of the element tree, it is created on first use and kept current with changes, see `GeometryCache`."""
+        if self._geometry is None:
+            self._geometry = GeometryCache(self)
+        return self._geometry
+
+    @property
+    def indexes(self) -> Indexes:
+        """The secondary indexes of the element tree, use `indexes.add_index(attribute)` to index further attributes."""
+        return self._indexes
+
+    def find_elements(self, attribute: str, value: str):
+        """Finds all elements whose `attribute` has `value` (or contains the token `value` for `class`). The index is used if `attribute` is indexed, otherwise the tree is scanned.
+
+        Args:
+            attribute (str): the attribute, prefixed names such as `svgre:clickable` are supported.
+            value (str): the value.
+
+        Returns:
+            List[ET._Element]: the elements.
+        """
+        if attribute in self._indexes:
+            return self._indexes.get(attribute, value)
+        return find_elements(self.element_tree_root, attribute, value)
+
+    def add_listener(self, listener):
+        """Adds a listener that is called whenever the element tree is changed (by an update or a restore).
+
+        Args:
+            listener (Callable): called as `listener(element, key, old_value, new_value)`. `key` is an attribute name (values are `str` or `None` if absent) or `_inner_xml` (values are `(text, children)` tuples).
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Removes a listener that was added with `add_listener`."""
+        self._listeners.remove(listener)
+
+    def snapshot(self) -> Snapshot:
+        """Takes a snapshot of the element tree that can later be restored with `restore`.
+
+        Snapshots share structure, only the changes made between snapshots are stored. Taking a snapshot is O(1) and restoring is proportional to the number of changes between the current state and the snapshot.
+
+        Returns:
+            Snapshot: the snapshot.
+        """
+        return self._history.snapshot()
+
+    def restore(self, snapshot: Snapshot):
+        """Restores the element tree to the state it was in when `snapshot` was taken, see `snapshot`.
+
+        Args:
+            snapshot (Snapshot): the snapshot to restore.
+        """
+        for change in self._history.restore(snapshot):
+            if self._indexes:
+                self._indexes.on_change(*change)
+            for listener in self._listeners:
+                listener(*change)
+
+    def materialise(self, element_id: str = None) -> bool:
+        """Materialises the lazy layer that holds the element `element_id`, or all lazy layers if no id is given. This is done automatically when an element is queried.
+
+        Args:
+            element_id (str, optional): id of the element.
+
+        Returns:
+            bool: whether any layer was materialised.
+        """
+        if not self._lazy_layers:
+            return False
+        if element_id is None:
+            self._lazy_layers.materialise()
+            return True
+        layer = self._lazy_layers.find(element_id)
+        if layer is None:
+            return False
+        self._lazy_layers.materialise(layer)
+        return True
+
+    def _materialise_for(self, query_event: QuerySVGEvent) -> bool:
+        if not self._lazy_layers:
+            return False
+        materialised = False
+        # keep going, a materialised layer may hold further (nested) lazy layers.
+        layer = self._lazy_layers.find(query_event.element_id, query_event.attributes)
+        while layer is not None:
+            self._lazy_layers.materialise(layer)
+            materialised = True
+            layer = self._lazy_layers.find(
+                query_event.element_id, query_event.attributes
+            )
+        return materialised
+
+    def _on_materialise(self, layer):
+        if self._geometry is not None:
+            self._geometry.on_change(
+                layer, "_inner_xml", (None, ()), (None, list(layer))
+            )
+        if self._indexes:
+            for child in layer:
+                self._indexes.add_tree(child)
+
+    def _on_change(self, element, key, old, new):
+        if key == "_inner_xml":
+            self._history.record(ContentChange(element, old, new))
+        else:
+            self._history.record(AttributeChange(element, key, old, new))
+        if self._indexes:
+            self._indexes.on_change(element, key, old, new)
+        for listener in self._listeners:
+            listener(element, key, old, new)
 
     def query(self, query_event: QuerySVGEvent):
         assert isinstance(query_event, QuerySVGEvent)
+        self._materialise_for(query_event)
         if query_event.action == QueryEvent.UPDATE:
-            return SVGApplication.update(self.element_tree_root, query_event)
+            on_change = None
+            if self._history.recording or self._listeners or self._indexes:
+                on_change = self._on_change
+            response = SVGApplication.update(
+                self.element_tree_root,
+                query_event,
+                on_change=on_change,
+                parser_options=self._parser_options,
+            )
+            if self._lazy_layers and response.success:
+                self._lazy_layers.on_update(query_event.element_id)
+            return response
         # elif query_event.action == QueryRawEvent.DELETE:
         #    return SVGApplication.delete(self.element_tree_root, query_event)
         elif query_event.action == QueryEvent.SELECT:
             return SVGApplication.select(self.element_tree_root, query_event)
 
     @staticmethod
-    def update(root: ET._Element, query_event: QuerySVGEvent) -> ResponseEvent:
+    def update(
+        root: ET._Element,
+        query_event: QuerySVGEvent,
+        on_change=None,
+        parser_options: ParserOptions = None,
+    ) -> ResponseEvent:
         """Updates an SVG element based on the details provided in a QueryEvent instance,
         and returns a ResponseEvent indicating the outcome.
 
         Args:
             root (ET.Element): The root of the SVG element tree.
             query_event (QueryEvent): The query event containing update details.
+            on_change (Callable, optional): called as `on_change(element, key, old_value, new_value)` after each change that is made, see `SVGApplication.add_listener`.
+            parser_options (ParserOptions, optional): options for the parser used for `_inner_xml` content, see `parse_fragment`.
 
         Returns:
             ResponseEvent: The response event indicating the outcome of the update operation.
@@ -47,13 +216,7 @@ class SVGApplication:
             data=dict(),
         )
 
-        # Check if the root itself is the element to be selected
-        if root.get("id", None) == query_event.element_id:
-            svg_element = root
-        else:
-            # Find the SVG element by ID among the children
-            svg_elements = root.xpath(f".//*[@id='{query_event.element_id}']")
-            svg_element = svg_elements[0] if svg_elements else None
+        svg_element = SVGApplication.find_element(root, query_event.element_id)
 
         # Check if the element exists
         if svg_element is None:
@@ -61,23 +224,50 @@ class SVGApplication:
             response.success = False
             return response
 
-        svg_element = svg_elements[0]
-
         # handle _inner_xml and _xml attributes...
         if "_inner_xml" in query_event.attributes:
             # TODO what happens if the element is not a container? test this
+            old_content = get_element_content(svg_element) if on_change else None
             replace_element_content(
-                svg_element, query_event.attributes.pop("_inner_xml")
+                svg_element, query_event.attributes.pop("_inner_xml"), parser_options
             )
+            if on_change:
+                on_change(
+                    svg_element,
+                    "_inner_xml",
+                    old_content,
+                    get_element_content(svg_element),
+                )
 
         # Update the attributes of the found element
         for attr, value in query_event.attributes.items():
             # response.data[attr] = svg_element.get(attr)
+            old_value = svg_element.get(attr) if on_change else None
             # TODO maybe we can make use of some serialisation method here rather than just using `str(...)`
             svg_element.set(attr, str(value))  # TODO handle set failures
+            if on_change:
+                on_change(svg_element, attr, old_value, svg_element.get(attr))
 
         return response
 
+    @staticmethod
+    def find_element(root: ET._Element, element_id: str) -> ET._Element:
+        """Finds the element with the given `id` attribute, `root` itself may be the element.
+
+        Args:
+            root (ET._Element): The root of the SVG element tree.
+            element_id (str): The id of the element to find.
+
+        Returns:
+            ET._Element: The element, or `None` if no such element exists.
+        """
+        # Check if the root itself is the element to be selected
+        if root.get("id", None) == element_id:
+            return root
+        # Find the SVG element by ID among the children
+        svg_elements = root.xpath(f".//*[@id='{element_id}']")
+        return svg_elements[0] if svg_elements else None
+
     @staticmethod
     def _tostring(element: ET._Element, unescape: bool = True, with_tail: bool = False):
         result = ET.tostring(
@@ -92,15 +282,12 @@ class SVGApplication:
 
     @staticmethod
     def _stringify_children(element: ET._Element, unescape: bool = True):
-        parts = [element.text] + list(
-            chain(
-                *(
-                    [SVGApplication._tostring(c, unescape=unescape, with_tail=True)]
-                    for c in element.getchildren()
-                )
-            )
+        parts = [element.text] if element.text else []
+        parts.extend(
+            SVGApplication._tostring(c, unescape=unescape, with_tail=True)
+            for c in element
         )
-        return "".join(filter(None, parts)).strip()
+        return "".join(parts).strip()
 
     @staticmethod
     def select(
@@ -123,13 +310,7 @@ class SVGApplication:
             data=dict(),
         )
 
-        # Check if the root itself is the element to be selected
-        if root.get("id", None) == query_event.element_id:
-            svg_element = root
-        else:
-            # Find the SVG element by ID among the children
-            svg_elements = root.xpath(f".//*[@id='{query_event.element_id}']")
-            svg_element = svg_elements[0] if svg_elements else None
+        svg_element = SVGApplication.find_element(root, query_event.element_id)
 
         # Check if the element exists
         if svg_element is None:
@@ -220,17 +401,43 @@ class SVGApplication:
         return int(self.element_tree_root.get("height"))
 
 
-def replace_element_content(original_element, new_content):
-    for child in original_element.getchildren():
-        original_element.remove(child)
-    # Parse the new content
-    new_elements = ET.fromstring(f"<_dummy> {new_content} </_dummy>")
-    # Append new elements to <g>
-    for new_child in new_elements.getchildren():
-        original_element.append(new_child)
-    # If there's text in the new content, append it as well
-    if new_elements.text:
-        original_element.text = new_elements.text
+def parse_fragment(
+    content: str | bytes, parser_options: ParserOptions = None
+) -> ET._Element:
+    """Parses an XML fragment (text and any number of elements) into a wrapper element, the fragment is fed to a reusable parser rather than being copied into a wrapping string.
+
+    Args:
+        content (str | bytes): the XML fragment, other values are converted with `str`.
+        parser_options (ParserOptions, optional): parser options, see `parser.get_parser`.
+
+    Returns:
+        ET._Element: a wrapper element whose text and children are the parsed fragment.
+    """
+    if not isinstance(content, (str, bytes)):
+        content = str(content)
+    return parse_wrapped(content, "<_dummy> ", " </_dummy>", parser_options)
+
+
+def replace_element_content(
+    original_element, new_content, parser_options: ParserOptions = None
+):
+    """Replaces the content (text and children) of `original_element`.
+
+    Args:
+        original_element (ET._Element): the element whose content is replaced.
+        new_content (str | bytes | ET._Element | List[ET._Element]): the new content, either an XML fragment (which is parsed, see `parse_fragment`), or pre-built element(s) which are moved into `original_element` as is.
+        parser_options (ParserOptions, optional): options for the parser used for an XML fragment, see `parse_fragment`.
+    """
+    if isinstance(new_content, ET._Element):
+        text, children = None, [new_content]
+    elif isinstance(new_content, (list, tuple)):
+        text, children = None, new_content
+    else:
+        wrapper = parse_fragment(new_content, parser_options)
+        text, children = wrapper.text, list(wrapper)
+    # swap all children in one go
+    original_element[:] = children
+    original_element.text = text
 
 
 def convert_attribute_value(value: str):
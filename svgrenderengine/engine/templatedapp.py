@@ -1,11 +1,16 @@
-import copy
 import logging
+import re
+from functools import lru_cache
 from jinja2 import Environment, Undefined
-from omegaconf import OmegaConf, DictConfig
+from omegaconf import DictConfig
 from lxml import etree as ET
 
 from ..event import QueryEvent, ResponseEvent, QuerySVGEvent
-from .svgapp import SVGApplication
+from ..event.queryevent import split_by_first_dot
+from .svgapp import SVGApplication, convert_attribute_value
+from .history import History, Snapshot, AttributeChange, ContentChange, VariableChange
+from .variables import VariableStore, DictVariableStore, MISSING
+from .parser import ParserOptions, parse_xml
 
 LOGGER = logging.getLogger("svg-render-engine")
 
@@ -23,6 +28,44 @@ class UndefinedReplace(Undefined):
         return f"{{{{{self._undefined_name}}}}}"
 
 
+class _DelimiterTranslator:
+    """Replaces the variable delimiters `open` and `close` in a string with `replace_open` and `replace_close` in a single pass.
+
+    Strings that contain neither delimiter are returned unchanged (without copying), values that are not `str` are returned as is.
+    """
+
+    def __init__(self, open, close, replace_open, replace_close):
+        self._open = open
+        self._close = close
+        if len(open) == 1 and len(close) == 1:
+            table = str.maketrans({open: replace_open, close: replace_close})
+            self._translate = lambda value: value.translate(table)
+        else:
+            replacements = {open: replace_open, close: replace_close}
+            # longest first, so that overlapping delimiters (e.g. `[` and `[[`) are matched correctly.
+            pattern = re.compile(
+                "|".join(
+                    re.escape(d) for d in sorted(replacements, key=len, reverse=True)
+                )
+            )
+            self._translate = lambda value: pattern.sub(
+                lambda match: replacements[match.group(0)], value
+            )
+
+    def __call__(self, value):
+        if isinstance(value, str) and (self._open in value or self._close in value):
+            return self._translate(value)
+        return value
+
+
+@lru_cache(maxsize=32)
+def _postprocessor(variable_open: str, variable_close: str) -> _DelimiterTranslator:
+    """Gets the (shared) translator from the internal delimiters to the delimiters `variable_open` and `variable_close`."""
+    return _DelimiterTranslator(
+        VARIABLE_OPEN, VARIABLE_CLOSE, variable_open, variable_close
+    )
+
+
 def _xml_compat(fun):
     def decorator(self, query_event: QueryEvent):
         query_event = self._xml_compatible_query_event(query_event)
@@ -39,21 +82,76 @@ class TemplatedSVGApplication:
         variables,
         variable_open=r"{{",
         variable_close=r"}}",
+        variable_store=DictVariableStore,
+        parser_options: ParserOptions = None,
     ):
+        """Constructor.
+
+        Args:
+            templated_svg_code (str): the templated SVG code.
+            variables (Dict[str, Any]): the initial values of the template variables.
+            variable_open (str, optional): start of a variable block in the template.
+            variable_close (str, optional): end of a variable block in the template.
+            variable_store (type, optional): the `VariableStore` implementation used to hold `variables`, e.g. `DictVariableStore` (default) or `OmegaConfVariableStore`.
+            parser_options (ParserOptions, optional): options for the XML parser used to parse the template (and `_inner_xml` template updates), see `parser.ParserOptions`.
+        """
         super().__init__()
         self._variable_open = variable_open
         self._variable_close = variable_close
 
         self._internal_variable_open = VARIABLE_OPEN
         self._internal_variable_close = VARIABLE_CLOSE
+        self._preprocess = _DelimiterTranslator(
+            self._variable_open,
+            self._variable_close,
+            self._internal_variable_open,
+            self._internal_variable_close,
+        )
+        self._postprocess = _DelimiterTranslator(
+            self._internal_variable_open,
+            self._internal_variable_close,
+            self._variable_open,
+            self._variable_close,
+        )
 
         self._environment = Environment(
             undefined=UndefinedWithError,
             variable_start_string=self._variable_open,
             variable_end_string=self._variable_close,
         )
-        self._variables = OmegaConf.create(copy.deepcopy(variables))
-        self._template_root = ET.fromstring(self._preprocess_xml(templated_svg_code))
+        self._variables = variable_store(variables)
+        self._parser_options = parser_options
+        self._template_root = parse_xml(
+            self._preprocess_xml(templated_svg_code), parser_options
+        )
+        self._history = History()
+
+    def snapshot(self) -> Snapshot:
+        """Takes a snapshot of the application state (template and variables) that can later be restored with `restore`.
+
+        Snapshots share structure, only the changes made between snapshots are stored. Taking a snapshot is O(1) and restoring is proportional to the number of changes between the current state and the snapshot.
+
+        Returns:
+            Snapshot: the snapshot.
+        """
+        return self._history.snapshot()
+
+    def restore(self, snapshot: Snapshot):
+        """Restores the application state (template and variables) to the state it was in when `snapshot` was taken, see `snapshot`.
+
+        Args:
+            snapshot (Snapshot): the snapshot to restore.
+        """
+        self._history.restore(snapshot)
+
+    def _on_template_change(self, element, key, old, new):
+        if key == "_inner_xml":
+            self._history.record(ContentChange(element, old, new))
+        else:
+            self._history.record(AttributeChange(element, key, old, new))
+
+    def _on_variable_change(self, key, old, new):
+        self._history.record(VariableChange(self._variables, key, old, new))
 
     def render_template(self):
         template = ET.tostring(
@@ -68,11 +166,18 @@ class TemplatedSVGApplication:
 
     @staticmethod
     def _render(
-        environment: Environment, template_root: ET._Element, variables: DictConfig
+        environment: Environment,
+        template_root: ET._Element,
+        variables: VariableStore,
     ):
-        return environment.from_string(
-            ET.tostring(template_root, encoding="unicode", pretty_print=True)
-        ).render(**OmegaConf.to_container(variables))
+        template = ET.tostring(template_root, encoding="unicode", pretty_print=True)
+        # the template is kept with internal delimiters, these must be translated back to the delimiters of `environment` before jinja2 can render it.
+        template = _postprocessor(
+            environment.variable_start_string, environment.variable_end_string
+        )(template)
+        return environment.from_string(template).render(
+            **variables.to_container(copy=False)
+        )
 
     def _query_template_select(self, query_event: QueryEvent):
         pass  # TODO check which query attributes contain template code, cache them, and make xml compatible.
@@ -82,19 +187,30 @@ class TemplatedSVGApplication:
         # this will ensure that the event uses proper template delimiters...
         # TODO an option to turn this off? its a bit expensive? better that the events are created with the correct delimiters?
         if isinstance(query_event, QueryEvent):
+            recording = self._history.recording
             if query_event.action == QueryEvent.UPDATE:
-                return TemplatedSVGApplication.update(self._variables, query_event)
+                return TemplatedSVGApplication.update(
+                    self._variables,
+                    query_event,
+                    on_change=self._on_variable_change if recording else None,
+                )
             elif query_event.action == QueryEvent.SELECT:
                 return TemplatedSVGApplication.select(self._variables, query_event)
             elif query_event.action == QueryEvent.UPDATE_TEMPLATE:
                 return TemplatedSVGApplication.update_template(
-                    self._template_root, query_event
+                    self._template_root,
+                    query_event,
+                    on_change=self._on_template_change if recording else None,
+                    parser_options=self._parser_options,
                 )
             elif query_event.action == QueryEvent.SELECT_TEMPLATE:
                 return self.select_template(query_event)
             elif query_event.action == QueryEvent.SELECT_RENDERED:
                 return TemplatedSVGApplication.select_rendered(
-                    self._environment, self._template_root, self._variables, query_event
+                    self._environment,
+                    self._template_root,
+                    self._variables,
+                    query_event,
                 )
             else:
                 raise ValueError(
@@ -104,12 +220,13 @@ class TemplatedSVGApplication:
             raise ValueError(f"Received unknown Event type {type(query_event)}")
 
     @staticmethod
-    def update(variables: DictConfig, query_event: QueryEvent):
+    def update(variables: VariableStore, query_event: QueryEvent, on_change=None):
         """Update `variables` using the `attributes` present in `query_event`. Each key in `query_event.attributes` should be a dot seperated key to the variable that should be updated.
 
         Args:
-            variables ([DictConfig]): variables to be updated.
+            variables ([VariableStore]): variables to be updated.
             query_event ([QueryEvent]): query containing update data.
+            on_change ([Callable], optional): called as `on_change(key, old_value, new_value)` after each variable update, `old_value` is `variables.MISSING` if the variable did not exist.
         """
         # Initialize a ResponseEvent
         response = ResponseEvent.create_event(
@@ -118,16 +235,22 @@ class TemplatedSVGApplication:
             data=dict(),  # TODO do we want to return the old values that were updated? is there any reason to?
         )
         for attr, value in query_event.attributes.items():
+            if on_change:
+                # if the update creates new keys, the first key created is the one to track.
+                key = variables.missing_prefix(attr)
+                old_value = variables.select(key)
             # TODO try except
-            OmegaConf.update(variables, attr, value)
+            variables.update(attr, value)
+            if on_change:
+                on_change(key, old_value, variables.select(key))
         return response
 
     @staticmethod
-    def select(variables: DictConfig, query_event: QueryEvent):
+    def select(variables: VariableStore, query_event: QueryEvent):
         """Select `variables` using the attributes present in `query_event`. Each key in `query_event.attributes` should be a dot seperated key to the variable that should be selected.
 
         Args:
-            variables ([DictConfig]): variables to be selected.
+            variables ([VariableStore]): variables to be selected.
             query_event ([QueryEvent]): query containing select keys.
         """
 
@@ -135,16 +258,16 @@ class TemplatedSVGApplication:
             return ResponseEvent.create_event(
                 query_event_id=query_event.id,
                 success=True,
-                data=OmegaConf.to_container(variables),
+                data=variables.to_container(),
             )
         else:
-            data = OmegaConf.create()
+            data = DictVariableStore({})
             try:
                 for attr in query_event.attributes:
                     # TODO support slice accessing? e.g. a.b[:2] assuming a.b is a list...
-                    OmegaConf.update(
-                        data, attr, OmegaConf.select(variables, attr), force_add=True
-                    )
+                    value = variables.select(attr)
+                    # missing parents are created as dicts, so list indices become `str` keys.
+                    data.update(attr, None if value is MISSING else value)
             except KeyError as e:
                 return ResponseEvent.create_event(
                     query_event_id=query_event.id, success=False, data=dict(error=e)
@@ -152,12 +275,15 @@ class TemplatedSVGApplication:
             return ResponseEvent.create_event(
                 query_event_id=query_event.id,
                 success=True,
-                data=OmegaConf.to_container(data),
+                data=data.to_container(copy=False),
             )
 
     @staticmethod
     def update_template(
-        template_root: ET._Element, query_event: QueryEvent | QuerySVGEvent
+        template_root: ET._Element,
+        query_event: QueryEvent | QuerySVGEvent,
+        on_change=None,
+        parser_options: ParserOptions = None,
     ):
         """Update the SVG (or XML) template that represents this application using the `attributes` in `query_event`. Each key in `query_event.attributes` should be a dot seperated key to the variable in the SVG template that should be updated.
         This update accepts two kinds of `Query`:
@@ -189,6 +315,8 @@ class TemplatedSVGApplication:
         Args:
             template_root (ET._Element): the root of the SVG template in use.
             query_event (QueryEvent): the query used to update the SVG template.
+            on_change (Callable, optional): see `SVGApplication.update`.
+            parser_options (ParserOptions, optional): see `SVGApplication.update`.
 
         Returns:
             [ResponseEvent]: the response event generated by the query.
@@ -199,7 +327,12 @@ class TemplatedSVGApplication:
         response_success = True
         response_data = {}
         for svg_event in svg_events:
-            response = SVGApplication.update(template_root, svg_event)
+            response = SVGApplication.update(
+                template_root,
+                svg_event,
+                on_change=on_change,
+                parser_options=parser_options,
+            )
             response_success &= response.success
             response_data = {
                 f"{svg_event.element_id}.{key}": value
@@ -225,15 +358,14 @@ class TemplatedSVGApplication:
             )
             response_success = True
             response_data = {}
+            postprocess = self._postprocess
             for svg_event in svg_events:
-                post_element_id = self._postprocess_xml(svg_event.element_id)
                 response = SVGApplication.select(self._template_root, svg_event)
                 response_success &= response.success
-                response_data[post_element_id] = {}
-                for key, value in response.data.items():
-                    response_data[post_element_id][
-                        self._postprocess_xml(key)
-                    ] = self._postprocess_xml(value)
+                response_data[postprocess(svg_event.element_id)] = {
+                    postprocess(key): postprocess(value)
+                    for key, value in response.data.items()
+                }
             return ResponseEvent.create_event(
                 query_event_id=query_event.id,
                 success=response_success,
@@ -242,11 +374,67 @@ class TemplatedSVGApplication:
         else:
             raise ValueError(f"Invalid query event type: {type(query_event)}.")
 
+    def iter_select_template(self, query_event: QueryEvent):
+        """Lazily selects from the SVG template, see `select_template`. Nothing is copied or serialised up-front, values are read
+        from the template as the generator is consumed, and subtrees are only serialised if `_xml` or `_inner_xml` is requested.
+
+        Each key in `query_event.attributes` is either `element_id.attribute`, or just `element_id` to select all attributes (and
+        `_inner_xml` if the element has content) of the element. Element ids, attribute names and values are given with the
+        template delimiters of this application.
+
+        Args:
+            query_event (QueryEvent): the query, `attributes` must be a list of keys.
+
+        Yields:
+            Tuple[str, str, Any]: (element_id, attribute, value) tuples in the order requested.
+
+        Raises:
+            KeyError: if an element cannot be found.
+        """
+        preprocess, postprocess = self._preprocess, self._postprocess
+        elements = {}
+        for key in query_event.attributes:
+            element_id, *attribute = split_by_first_dot(
+                preprocess(key),
+                self._internal_variable_open,
+                self._internal_variable_close,
+            )
+            element = elements.get(element_id)
+            if element is None:
+                element = SVGApplication.find_element(self._template_root, element_id)
+                if element is None:
+                    raise KeyError(postprocess(element_id))
+                elements[element_id] = element
+            post_element_id = postprocess(element_id)
+            if attribute:
+                attribute = attribute[0]
+                yield post_element_id, postprocess(
+                    attribute
+                ), self._select_template_value(element, attribute)
+            else:
+                for attribute, value in element.attrib.items():
+                    yield post_element_id, postprocess(attribute), postprocess(
+                        convert_attribute_value(value)
+                    )
+                if len(element) or element.text:
+                    yield post_element_id, "_inner_xml", self._select_template_value(
+                        element, "_inner_xml"
+                    )
+
+    def _select_template_value(self, element: ET._Element, attribute: str):
+        if attribute == "_inner_xml":
+            value = SVGApplication._stringify_children(element)
+        elif attribute == "_xml":
+            value = SVGApplication._tostring(element)
+        else:
+            value = convert_attribute_value(element.get(attribute, None))
+        return self._postprocess(value)
+
     @staticmethod
     def select_rendered(
         environment: Environment,
         template_root: ET._Element,
-        variables: DictConfig,
+        variables: VariableStore,
         query_event: QueryEvent | QuerySVGEvent,
     ):
         """Selects svg content from the fully rendered svg code associated with this application. This call is relatively expensive as it requires a full resolution of the template with all application state variables. TODO implement some kind of caching of the fully rendered SVG code?
@@ -287,35 +475,11 @@ class TemplatedSVGApplication:
             data=response_data,
         )
 
-    @staticmethod
-    def _process_xml(value, open, close, replace_open, replace_close):
-        value = value.replace(open, replace_open)
-        value = value.replace(close, replace_close)
-        return value
-
     def _preprocess_xml(self, value):
-        if isinstance(value, str):
-            return TemplatedSVGApplication._process_xml(
-                value,
-                self._variable_open,
-                self._variable_close,
-                self._internal_variable_open,
-                self._internal_variable_close,
-            )
-        else:
-            return value
+        return self._preprocess(value)
 
     def _postprocess_xml(self, value):
-        if isinstance(value, str):
-            return TemplatedSVGApplication._process_xml(
-                value,
-                self._internal_variable_open,
-                self._internal_variable_close,
-                self._variable_open,
-                self._variable_close,
-            )
-        else:
-            return value
+        return self._postprocess(value)
 
     def _xml_compatible_query_svg_event(self, query_event: QuerySVGEvent):
         """This function will convert the `attributes` of the given `query_event` to an xml compatible format.
@@ -329,9 +493,9 @@ class TemplatedSVGApplication:
         return self._xml_compatible_query_event(query_event)
 
     def _xml_compatible_response_event(self, response_event: ResponseEvent):
+        postprocess = self._postprocess
         new_data = {
-            self._postprocess_xml(k): self._postprocess_xml(v)
-            for k, v in response_event.attributes.items()
+            postprocess(k): postprocess(v) for k, v in response_event.data.items()
         }
         response_event.data = new_data
         return response_event
@@ -344,15 +508,15 @@ class TemplatedSVGApplication:
         Returns:
             QueryEvent: `query_event`, but with xml compatible `attributes`.
         """
+        preprocess = self._preprocess
         new_attributes = None
         if isinstance(query_event.attributes, dict):
             new_attributes = {
-                self._preprocess_xml(k): self._preprocess_xml(v)
-                for k, v in query_event.attributes.items()
+                preprocess(k): preprocess(v) for k, v in query_event.attributes.items()
             }
             query_event.attributes = new_attributes
         elif isinstance(query_event.attributes, list):
-            new_attributes = [self._preprocess_xml(x) for x in query_event.attributes]
+            new_attributes = [preprocess(x) for x in query_event.attributes]
             query_event.attributes = new_attributes
         else:
             raise ValueError(
@@ -0,0 +1,213 @@
+"""
+    Module defining the variable stores that hold the state of a `TemplatedSVGApplication`.
+
+    Keys are dot-separated paths into nested dicts and lists, list indices may be given as `a.0` or `a[0]`.
+    Two stores are provided, `DictVariableStore` (the default) keeps plain python containers and compiles each key once into a
+    tuple of accessors. `OmegaConfVariableStore` keeps an OmegaConf config and is provided for compatibility.
+"""
+
+import copy
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from omegaconf import OmegaConf, Container
+
+__all__ = (
+    "VariableStore",
+    "DictVariableStore",
+    "OmegaConfVariableStore",
+    "MISSING",
+    "compile_key",
+)
+
+_INDEX_PATTERN = re.compile(r"\[(\d+)\]")
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+# marks a value that is not present (e.g. a variable that did not exist before an update).
+MISSING = _Missing()
+
+
+@lru_cache(maxsize=4096)
+def compile_key(key: str) -> Tuple[Tuple[str, int], ...]:
+    """Compiles a dot-separated key into a tuple of accessors `(name, index)`, `index` is `None` if `name` cannot be a list index.
+
+    Args:
+        key (str): the dot-separated key, e.g. `rect.size.0` or `rect.size[0]`.
+
+    Returns:
+        Tuple[Tuple[str, int], ...]: the accessors.
+    """
+    key = _INDEX_PATTERN.sub(r".\1", key)
+    return tuple((k, int(k) if k.isdigit() else None) for k in key.split(".") if k)
+
+
+class VariableStore(ABC):
+    """Holds the (nested) variables of a `TemplatedSVGApplication`. Values that are given to or returned from a store are plain python values."""
+
+    @abstractmethod
+    def select(self, key: str) -> Any:
+        """Selects the value at `key`, `MISSING` if it does not exist."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update(self, key: str, value: Any):
+        """Updates the value at `key`, creating intermediate dicts as required. Dict values are merged into existing dicts."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        """Sets the value at `key`, replacing any existing value (no merging)."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Deletes the value at `key` if it exists."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def to_container(self, copy: bool = True) -> Dict[str, Any]:
+        """Gets all variables as a nested dict. If `copy` is False the result may share state with the store and must not be modified."""
+        raise NotImplementedError()
+
+    def missing_prefix(self, key: str) -> str:
+        """Gets the shortest prefix of `key` that does not exist, or `key` itself if no proper prefix is missing."""
+        parts = compile_key(key)
+        for i in range(1, len(parts)):
+            prefix = ".".join(k for k, _ in parts[:i])
+            if self.select(prefix) is MISSING:
+                return prefix
+        return key
+
+
+class DictVariableStore(VariableStore):
+    """A variable store backed by plain nested dicts and lists, keys are compiled once (see `compile_key`) and cached."""
+
+    def __init__(self, variables: Dict[str, Any]):
+        self._variables = _deepcopy(dict(variables))
+
+    def _get(self, parts):
+        node = self._variables
+        for name, index in parts:
+            if type(node) is list:  # pylint: disable=unidiomatic-typecheck
+                if index is None or index >= len(node):
+                    return MISSING
+                node = node[index]
+            elif isinstance(node, dict):
+                node = node.get(name, MISSING)
+                if node is MISSING:
+                    return MISSING
+            else:
+                return MISSING
+        return node
+
+    def _parent(self, parts, create):
+        node = self._variables
+        for name, index in parts[:-1]:
+            if type(node) is list:  # pylint: disable=unidiomatic-typecheck
+                node = node[index]
+            else:
+                child = node.get(name, MISSING)
+                if not isinstance(child, (dict, list)):
+                    if not create:
+                        return None
+                    child = node[name] = {}
+                node = child
+        return node
+
+    def select(self, key: str) -> Any:
+        return _deepcopy(self._get(compile_key(key)))
+
+    def update(self, key: str, value: Any):
+        parts = compile_key(key)
+        parent = self._parent(parts, True)
+        name, index = parts[-1]
+        if type(parent) is list:  # pylint: disable=unidiomatic-typecheck
+            name = index
+        elif isinstance(value, dict) and isinstance(parent.get(name), dict):
+            _merge(parent[name], value)
+            return
+        parent[name] = _deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        parts = compile_key(key)
+        parent = self._parent(parts, True)
+        name, index = parts[-1]
+        if type(parent) is list:  # pylint: disable=unidiomatic-typecheck
+            name = index
+        parent[name] = _deepcopy(value)
+
+    def delete(self, key: str):
+        parts = compile_key(key)
+        parent = self._parent(parts, False)
+        name, _ = parts[-1]
+        if isinstance(parent, dict):
+            parent.pop(name, None)
+
+    def to_container(
+        self, copy: bool = True  # pylint: disable=redefined-outer-name
+    ) -> Dict[str, Any]:
+        if copy:
+            return _deepcopy(self._variables)
+        return self._variables
+
+
+class OmegaConfVariableStore(VariableStore):
+    """A variable store backed by an OmegaConf `DictConfig`."""
+
+    def __init__(self, variables: Dict[str, Any]):
+        self._variables = OmegaConf.create(copy.deepcopy(variables))
+
+    @property
+    def config(self):
+        return self._variables
+
+    def select(self, key: str) -> Any:
+        value = OmegaConf.select(self._variables, key, default=MISSING)
+        if isinstance(value, Container):
+            return OmegaConf.to_container(value)
+        return value
+
+    def update(self, key: str, value: Any):
+        OmegaConf.update(self._variables, key, value)
+
+    def set(self, key: str, value: Any):
+        OmegaConf.update(self._variables, key, value, merge=False)
+
+    def delete(self, key: str):
+        parent_key, _, last = key.rpartition(".")
+        parent = (
+            OmegaConf.select(self._variables, parent_key)
+            if parent_key
+            else self._variables
+        )
+        if parent is not None and last in parent:
+            del parent[last]
+
+    def to_container(
+        self, copy: bool = True  # pylint: disable=redefined-outer-name
+    ) -> Dict[str, Any]:
+        return OmegaConf.to_container(self._variables)
+
+
+def _merge(target: dict, value: dict):
+    for k, v in value.items():
+        if isinstance(v, dict) and isinstance(target.get(k), dict):
+            _merge(target[k], v)
+        else:
+            target[k] = _deepcopy(v)
+
+
+def _deepcopy(value):
+    # faster than `copy.deepcopy` for the plain containers that are kept in a store.
+    if isinstance(value, dict):
+        return {k: _deepcopy(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_deepcopy(v) for v in value]
+    return value
@@ -0,0 +1,392 @@
+""" Module defining the VectorTemplatedSVGApplication class, many copies of the same templated application sharing one template. """
+
+import copy
+import re
+from numbers import Number
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from jinja2 import Environment
+
+from ..event import QueryEvent, ResponseEvent
+from .templatedapp import TemplatedSVGApplication
+
+__all__ = ("VectorTemplatedSVGApplication",)
+
+_INDEX_PATTERN = re.compile(r"\[(\d+)\]")
+
+
+class _Leaf:
+    """Placeholder for a leaf value in the shared variable structure."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: tuple):
+        self.key = key
+
+
+class VectorTemplatedSVGApplication:
+    """A vectorised collection of `num_envs` templated applications that share a single template.
+
+    This is intended for workloads (e.g. reinforcement learning) that run many copies of the same templated task with different
+    variables. The template is parsed and compiled once. The structure of the variables is shared by all environments,
+    only the leaf values are stored per environment, as one column per leaf. Columns whose values are all numeric are stored
+    as a `numpy` array of shape `(num_envs,)`, other columns are stored as a list. A numeric column is widened (e.g. from bool or int
+    to float) when it is updated with a value that its dtype cannot hold exactly, and becomes a list if no numeric dtype can.
+
+    Queries are batched over environments, `env_ids` selects which environments a query applies to (default: all). Select
+    responses contain stacked values, i.e. each leaf is an array (or list) with one entry per selected environment.
+
+    Example:
+        ```
+        app = VectorTemplatedSVGApplication(svg_code, [dict(x=0), dict(x=10)])
+        app.query(QueryEvent.create_event(QueryEvent.UPDATE, attributes={"x": [1, 11]}))
+        app.query(QueryEvent.create_event(QueryEvent.SELECT, attributes=["x"])).data  # {"x": array([1, 11])}
+        svgs = app.render()  # one svg per environment
+        ```
+    """
+
+    def __init__(
+        self,
+        templated_svg_code: str,
+        variables: List[Dict[str, Any]] | Dict[str, Any],
+        num_envs: int = None,
+        variable_open=r"{{",
+        variable_close=r"}}",
+    ):
+        """Constructor.
+
+        Args:
+            templated_svg_code (str): the template that is shared by all environments.
+            variables (List[Dict[str, Any]] | Dict[str, Any]): the initial variables of each environment, or a single dict that is used for all `num_envs` environments. Each environment must have the same structure.
+            num_envs (int, optional): number of environments, required if `variables` is a single dict.
+            variable_open (str, optional): start of a variable block in the template.
+            variable_close (str, optional): end of a variable block in the template.
+        """
+        if isinstance(variables, dict):
+            if num_envs is None:
+                raise ValueError(
+                    "Argument `num_envs` must be specified if `variables` is a single dict."
+                )
+            variables = [variables] * num_envs
+        elif num_envs is not None and num_envs != len(variables):
+            raise ValueError(
+                f"Argument `num_envs` ({num_envs}) does not match the number of variables given ({len(variables)})."
+            )
+        if len(variables) == 0:
+            raise ValueError("At least one environment is required.")
+        self._num_envs = len(variables)
+        # the template is parsed once, TemplatedSVGApplication deals with delimiters.
+        self._application = TemplatedSVGApplication(
+            templated_svg_code,
+            {},
+            variable_open=variable_open,
+            variable_close=variable_close,
+        )
+        self._template = None
+        self._structure = None
+        self._columns = {}
+        self._structure = self._create_structure(variables[0], ())
+        for key in self._columns:
+            self._columns[key] = _to_column([_get(env, key) for env in variables])
+        self._initial_columns = copy.deepcopy(self._columns)
+
+    @property
+    def num_envs(self) -> int:
+        return self._num_envs
+
+    def __len__(self):
+        return self._num_envs
+
+    @property
+    def environment(self) -> Environment:
+        """The jinja2 environment that is shared by all environments."""
+        return self._application._environment
+
+    def render_template(self) -> str:
+        """Renders the shared template (without resolving variables)."""
+        return self._application.render_template()
+
+    def render(self, env_ids: Sequence[int] = None) -> List[str]:
+        """Renders the SVG code of each of the given environments using the shared compiled template.
+
+        Args:
+            env_ids (Sequence[int], optional): environments to render, defaults to all.
+
+        Returns:
+            List[str]: the rendered SVG code, one per environment.
+        """
+        if self._template is None:
+            self._template = self.environment.from_string(self.render_template())
+        return [
+            self._template.render(**self.get_variables(i))
+            for i in self._env_ids(env_ids)
+        ]
+
+    def get_variables(self, env_id: int) -> Dict[str, Any]:
+        """Gets the variables of a single environment as a (plain python) nested dict."""
+        return _build(
+            self._structure, lambda leaf: _item(self._columns[leaf.key], env_id)
+        )
+
+    def reset(self, env_ids: Sequence[int] = None):
+        """Resets the variables of the given environments to their initial values.
+
+        Args:
+            env_ids (Sequence[int], optional): environments to reset, defaults to all.
+        """
+        env_ids = self._env_ids(env_ids)
+        for key, initial in self._initial_columns.items():
+            if key not in self._columns:
+                continue  # the structure has since changed.
+            for i in env_ids:
+                self._set(key, i, _item(initial, i))
+
+    def query(self, query_event: QueryEvent, env_ids: Sequence[int] = None):
+        if isinstance(query_event, QueryEvent):
+            if query_event.action == QueryEvent.UPDATE:
+                return self.update(query_event, env_ids=env_ids)
+            elif query_event.action == QueryEvent.SELECT:
+                return self.select(query_event, env_ids=env_ids)
+            else:
+                raise ValueError(
+                    f"Received unsupported action {query_event.action} in {query_event}"
+                )
+        else:
+            raise ValueError(f"Received unknown Event type {type(query_event)}")
+
+    def update(
+        self, query_event: QueryEvent, env_ids: Sequence[int] = None
+    ) -> ResponseEvent:
+        """Updates variables in each of the given environments. Each key in `query_event.attributes` should be a dot seperated key to the variable that should be updated.
+
+        A value is broadcast to all given environments, unless it is a `numpy` array (or a list/tuple where the variable is not itself a list) with one entry per environment.
+
+        Args:
+            query_event (QueryEvent): query containing update data.
+            env_ids (Sequence[int], optional): environments to update, defaults to all.
+
+        Returns:
+            ResponseEvent: the response.
+        """
+        env_ids = self._env_ids(env_ids)
+        for attr, value in query_event.attributes.items():
+            key = _parse_key(attr)
+            if self._is_batched(key, value, len(env_ids)):
+                self._update_batched(key, list(value), env_ids)
+            else:
+                self._update(key, value, env_ids)
+        return ResponseEvent.create_event(
+            query_event_id=query_event.id, success=True, data=dict()
+        )
+
+    def select(
+        self, query_event: QueryEvent, env_ids: Sequence[int] = None
+    ) -> ResponseEvent:
+        """Selects variables from each of the given environments, see `TemplatedSVGApplication.select`. Each leaf value is stacked over environments.
+
+        Args:
+            query_event (QueryEvent): query containing select keys.
+            env_ids (Sequence[int], optional): environments to select from, defaults to all.
+
+        Returns:
+            ResponseEvent: the response, leaf values are `numpy` arrays (numeric) or lists with one entry per environment.
+        """
+        env_ids = self._env_ids(env_ids)
+        stack = lambda leaf: _stack(self._columns[leaf.key], env_ids)
+        if len(query_event.attributes) == 0:
+            data = _build(self._structure, stack)
+        else:
+            data = {}
+            for attr in query_event.attributes:
+                key = _parse_key(attr)
+                try:
+                    node = _get(self._structure, key)
+                except (KeyError, IndexError, ValueError, TypeError):
+                    return ResponseEvent.create_event(
+                        query_event_id=query_event.id,
+                        success=False,
+                        data=dict(error=KeyError(attr)),
+                    )
+                _insert(data, key, _build(node, stack))
+        return ResponseEvent.create_event(
+            query_event_id=query_event.id, success=True, data=data
+        )
+
+    def _env_ids(self, env_ids):
+        if env_ids is None:
+            return range(self._num_envs)
+        return env_ids
+
+    def _is_batched(self, key, value, n):
+        if isinstance(value, np.ndarray):
+            return value.ndim > 0
+        if isinstance(value, (list, tuple)) and len(value) == n:
+            try:
+                return not isinstance(_get(self._structure, key), list)
+            except (KeyError, IndexError, ValueError, TypeError):
+                return True
+        return False
+
+    def _update(self, key, value, env_ids):
+        if isinstance(value, dict):
+            # dicts are merged into the existing structure, as with `OmegaConf.update`.
+            for k, v in value.items():
+                self._update(key + (str(k),), v, env_ids)
+        else:
+            self._update_batched(key, [value] * len(env_ids), env_ids)
+
+    def _update_batched(self, key, values, env_ids):
+        try:
+            node = _get(self._structure, key)
+        except (KeyError, IndexError, ValueError, TypeError):
+            node = None
+        if isinstance(node, _Leaf) and not any(
+            isinstance(v, (dict, list, tuple)) for v in values
+        ):
+            for i, value in zip(env_ids, values):
+                self._set(key, i, value)
+        else:
+            # the structure changes, this is shared by all environments.
+            self._replace_structure(key, values, env_ids)
+
+    def _set(self, key, env_id, value):
+        column = self._columns[key]
+        dtype = None
+        if isinstance(column, np.ndarray) and _is_numeric(value):
+            dtype = _fit_dtype(column.dtype, value)
+        if dtype is not None:
+            if dtype != column.dtype:
+                column = column.astype(dtype)
+            column[env_id] = value
+        else:
+            column = list(column) if isinstance(column, np.ndarray) else column
+            column[env_id] = _item(value) if isinstance(value, np.generic) else value
+        self._columns[key] = column
+
+    def _replace_structure(self, key, values, env_ids):
+        if len(key) == 0:
+            raise ValueError("The root of the variables cannot be replaced.")
+        self._remove_columns(key)
+        parent = self._structure
+        for i, k in enumerate(key[:-1]):
+            child = parent[int(k)] if isinstance(parent, list) else parent.get(k)
+            if not isinstance(child, (dict, list)):
+                self._remove_columns(key[: i + 1])
+                child = {}
+                if isinstance(parent, list):
+                    parent[int(k)] = child
+                else:
+                    parent[k] = child
+            parent = child
+        node = self._create_structure(values[0], key)
+        for leaf_key, column in self._columns.items():
+            if column is None:
+                column = [None] * self._num_envs
+                for i, value in zip(env_ids, values):
+                    try:
+                        column[i] = _get(value, leaf_key[len(key) :])
+                    except (KeyError, IndexError, ValueError, TypeError):
+                        pass
+                self._columns[leaf_key] = _to_column(column)
+        if isinstance(parent, list):
+            parent[int(key[-1])] = node
+        else:
+            parent[key[-1]] = node
+
+    def _remove_columns(self, key):
+        for old_key in [k for k in self._columns if k[: len(key)] == key]:
+            del self._columns[old_key]
+
+    def _create_structure(self, value, key):
+        if isinstance(value, dict):
+            return {
+                str(k): self._create_structure(v, key + (str(k),))
+                for k, v in value.items()
+            }
+        elif isinstance(value, (list, tuple)):
+            return [
+                self._create_structure(v, key + (str(i),)) for i, v in enumerate(value)
+            ]
+        else:
+            self._columns[key] = None
+            return _Leaf(key)
+
+
+def _parse_key(attr: str) -> tuple:
+    """Parses a dot-separated key (list indices may be given as `a.0` or `a[0]`) into a tuple of keys."""
+    attr = _INDEX_PATTERN.sub(r".\1", attr)
+    return tuple(k for k in attr.split(".") if k)
+
+
+def _get(node, key: tuple):
+    for k in key:
+        if isinstance(node, (list, tuple)):
+            node = node[int(k)]
+        elif isinstance(node, dict):
+            node = node[k]
+        else:
+            raise KeyError(k)
+    return node
+
+
+def _insert(data: dict, key: tuple, value):
+    for k in key[:-1]:
+        data = data.setdefault(k, {})
+    if key:
+        data[key[-1]] = value
+    else:
+        data.update(value)
+
+
+def _build(node, leaf_fn):
+    if isinstance(node, _Leaf):
+        return leaf_fn(node)
+    elif isinstance(node, dict):
+        return {k: _build(v, leaf_fn) for k, v in node.items()}
+    else:
+        return [_build(v, leaf_fn) for v in node]
+
+
+def _is_numeric(value) -> bool:
+    return isinstance(value, (Number, np.number)) and not isinstance(value, complex)
+
+
+def _fit_dtype(dtype: np.dtype, value) -> np.dtype:
+    """The dtype that a numeric column of `dtype` must be widened to in order to hold `value` exactly, or `None` if it must become a list."""
+    kind = dtype.kind
+    if kind == "O":
+        return dtype
+    if isinstance(value, (bool, np.bool_)):
+        return dtype  # as `True == 1`
+    if kind == "b":
+        dtype, kind = np.dtype(np.int64), "i"  # bools are widened like integers
+    if isinstance(value, (float, np.floating)):
+        return dtype if kind == "f" else np.dtype(np.float64)
+    if kind == "f":
+        return dtype
+    value = int(value)
+    for candidate in (dtype, np.dtype(np.int64)):
+        info = np.iinfo(candidate)
+        if info.min <= value <= info.max:
+            return candidate
+    return None  # does not fit into a fixed width integer
+
+
+def _to_column(values: list):
+    if all(_is_numeric(v) for v in values):
+        return np.asarray(values)
+    return list(values)
+
+
+def _item(column, index=None):
+    value = column if index is None else column[index]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _stack(column, env_ids):
+    if isinstance(column, np.ndarray):
+        return column[np.asarray(env_ids, dtype=np.intp)]
+    return [column[i] for i in env_ids]
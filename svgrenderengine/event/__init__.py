@@ -2,9 +2,14 @@
 
 from .event import Event
 from .keyevent import KeyEvent, KEY_PRESSED, KEY_RELEASED
-from .mouseevent import MouseButtonEvent, MouseMotionEvent
+from .mouseevent import (
+    MouseButtonEvent,
+    MouseMotionEvent,
+    MouseEnterEvent,
+    MouseLeaveEvent,
+)
 from .exitevent import ExitEvent
-from .queryevent import QueryEvent, QuerySVGEvent
+from .queryevent import QueryEvent, QuerySVGEvent, QueryKeys
 from .responseevent import ResponseEvent
 
 __all__ = (
@@ -12,8 +17,11 @@ __all__ = (
     "KeyEvent",
     "MouseButtonEvent",
     "MouseMotionEvent",
+    "MouseEnterEvent",
+    "MouseLeaveEvent",
     "ExitEvent",
     "QueryEvent",
     "QuerySVGEvent",
+    "QueryKeys",
     "ResponseEvent",
 )
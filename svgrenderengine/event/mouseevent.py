@@ -1,10 +1,10 @@
-""" Module defining the MouseButtonEvent and MouseMotionEvent classes. """
+""" Module defining the MouseButtonEvent, MouseMotionEvent, MouseEnterEvent and MouseLeaveEvent classes. """
 
 from typing import List
 from dataclasses import dataclass
 from .event import Event  # Assuming Event is defined in the 'event' module
 
-__all__ = ("MouseButtonEvent", "MouseMotionEvent")
+__all__ = ("MouseButtonEvent", "MouseMotionEvent", "MouseEnterEvent", "MouseLeaveEvent")
 
 
 @dataclass
@@ -39,3 +39,35 @@ class MouseMotionEvent(Event):
 
     position: tuple
     relative: tuple
+
+
+@dataclass
+class MouseEnterEvent(Event):
+    """
+    A class representing the mouse pointer entering a clickable element.
+
+    Attributes:
+        id (str): A unique identifier for the event, represented as a string (inherited).
+        timestamp (float): The UNIX timestamp (in seconds) when the event instance is created (inherited).
+        position (tuple): The (x, y) coordinates of the mouse pointer.
+        element_id (str): The id of the element that the pointer entered.
+    """
+
+    position: tuple
+    element_id: str
+
+
+@dataclass
+class MouseLeaveEvent(Event):
+    """
+    A class representing the mouse pointer leaving a clickable element.
+
+    Attributes:
+        id (str): A unique identifier for the event, represented as a string (inherited).
+        timestamp (float): The UNIX timestamp (in seconds) when the event instance is created (inherited).
+        position (tuple): The (x, y) coordinates of the mouse pointer.
+        element_id (str): The id of the element that the pointer left.
+    """
+
+    position: tuple
+    element_id: str
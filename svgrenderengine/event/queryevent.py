@@ -5,10 +5,14 @@
     A QueryEvent is used to update or select templated state variables that are part of the SVG code. 
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+from collections import OrderedDict
 from .event import Event
 
+KEY_CACHE_SIZE = 4096  # maximum number of parsed keys kept by `split_by_first_dot` (and by default by `QueryKeys`).
+
 
 @dataclass
 class QueryEvent(Event):
@@ -84,7 +88,10 @@ class QuerySVGEvent(QueryEvent):
 
     @staticmethod
     def from_query_event(
-        query_event: QueryEvent, variable_open: str = r"{{", variable_close: str = r"}}"
+        query_event: QueryEvent,
+        variable_open: str = r"{{",
+        variable_close: str = r"}}",
+        keys: "QueryKeys" = None,
     ) -> List["QuerySVGEvent"]:
         """
         Converts a `QueryEvent` into a list of `QuerySVGEvents`, grouping by `element_id`, which is taken to be the first part of the dot-seperated keys in the `query_event` attributes.
@@ -93,19 +100,22 @@ class QuerySVGEvent(QueryEvent):
             query_event (QueryEvent): The `QueryEvent` to convert.
             variable_open (str) : value used to indicate the start of a variable block to make it XML compatible, this will replace `{{` in the query.
             variable_close (str) : value used to indicate the end of a variable block to make it XML compatible, this will replace `}}` in the query.
+            keys (QueryKeys, optional) : pre-compiled keys to use, if given its delimiters are used instead of `variable_open` and `variable_close`. See `QueryKeys`.
         Returns:
             List[QuerySVGEvent]: A list of `QuerySVGEvent` instances.
         """
         event_list = []
         element_attrs = {}
+        if keys is None:
+            split = lambda key: split_by_first_dot(key, variable_open, variable_close)
+        else:
+            split = keys.split
 
         if isinstance(query_event.attributes, dict):
             # Grouping attributes by their element_id
             for key in query_event.attributes:
                 try:
-                    element_id, attr_key = split_by_first_dot(
-                        key, variable_open, variable_close
-                    )
+                    element_id, attr_key = split(key)
                 except ValueError as e:
                     raise ValueError(
                         f"Failed to cast {QueryEvent.__name__} to {QuerySVGEvent.__name__}, attribute {key} is not dot-seperated.",
@@ -119,9 +129,7 @@ class QuerySVGEvent(QueryEvent):
             # Grouping attributes by their element_id
             for key in query_event.attributes:
                 # try:
-                element_id, *attr_key = split_by_first_dot(
-                    key, variable_open, variable_close
-                )
+                element_id, *attr_key = split(key)
 
                 # except ValueError as e:
                 #     raise ValueError(
@@ -182,10 +190,60 @@ class QuerySVGEvent(QueryEvent):
         return QuerySVGEvent(*QuerySVGEvent.new(action, attributes, element_id))
 
 
+class QueryKeys:
+    """A pre-compiled set of dot-separated query keys.
+
+    Clients tend to send the same keys over and over, a `QueryKeys` parses each key once (see `split_by_first_dot`) and may be
+    reused across any number of events, see `QuerySVGEvent.from_query_event`. Keys that were not given up-front are parsed on
+    first use and then kept, at most `maxsize` keys are kept (the least recently used are dropped first).
+
+    Example:
+        ```
+        keys = QueryKeys(["{{id}}.width", "{{id}}.height"])
+        svg_events = QuerySVGEvent.from_query_event(query_event, keys=keys)
+        ```
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = (),
+        variable_open: str = r"{{",
+        variable_close: str = r"}}",
+        maxsize: int = KEY_CACHE_SIZE,
+    ):
+        if maxsize < 1:
+            raise ValueError(f"`maxsize` must be at least 1, got {maxsize}.")
+        self.variable_open = variable_open
+        self.variable_close = variable_close
+        self.maxsize = maxsize
+        self._parts = OrderedDict()
+        for key in keys:
+            self.split(key)
+
+    def split(self, key: str) -> Tuple[str, ...]:
+        """Splits `key` by its first dot, see `split_by_first_dot`."""
+        parts = self._parts.get(key)
+        if parts is None:
+            parts = _split_by_first_dot(key, self.variable_open, self.variable_close)
+            self._parts[key] = parts
+            if len(self._parts) > self.maxsize:
+                self._parts.popitem(last=False)
+        else:
+            self._parts.move_to_end(key)
+        return parts
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._parts
+
+    def __len__(self):
+        return len(self._parts)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def split_by_first_dot(
     value: str, variable_open: str = r"{{", variable_close: str = r"}}"
 ):
-    """Splits a key by the first occurrence of a dot, while handling variable templating properly.
+    """Splits a key by the first occurrence of a dot, while handling variable templating properly. Results are cached (see `KEY_CACHE_SIZE`).
 
     Args:
         value (str): string to split by first dot.
@@ -195,6 +253,11 @@ def split_by_first_dot(
     Returns:
         Tuple[str, str]: the split string. A tuple-1 if no dot is present (outside a template block).
     """
+    return _split_by_first_dot(value, variable_open, variable_close)
+
+
+def _split_by_first_dot(value: str, variable_open: str, variable_close: str):
+    """Uncached implementation of `split_by_first_dot`."""
 
     first, *rest = value.split(".", 1)
     # print(value, variable_open, variable_close)
@@ -4,6 +4,13 @@ import pygame
 import cairosvg
 
 from .event import _EventFactory
+from ..engine.hover import HoverTracker
+from ..render.culling import Viewport
+from ..render.layers import LayerCache
+from ..render.lod import LevelOfDetail
+from ..render.transform import IDENTITY, apply, document_matrix, invert
+
+MAX_SPRITES = 1024
 
 
 class PygameView:
@@ -20,6 +27,84 @@ class PygameView:
         self.height = height
         self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption(title)
+        self._layer_cache = None
+        self._sprites = {}  # sprite svg code -> surface
+        self.viewport = None  # the whole document is rendered if not set
+        # small elements are drawn with less detail, set to None to always draw them in full
+        self.level_of_detail = LevelOfDetail()
+        # emits MouseEnterEvent and MouseLeaveEvent for clickable elements of the rendered application
+        self.track_hover = True
+        self._hover = None
+        self._pointer = None  # last position of the mouse pointer in the window
+
+    def set_viewport(self, x, y, width, height):
+        """
+        Sets the region of the document (in its user space) that is rendered by `render_application`, elements outside of it are culled.
+
+        Args:
+            x (float): left edge of the region.
+            y (float): top edge of the region.
+            width (float): width of the region.
+            height (float): height of the region.
+        """
+        self.viewport = Viewport(x, y, width, height)
+
+    def reset_viewport(self):
+        """Renders the whole document again."""
+        self.viewport = None
+
+    def pan(self, dx, dy):
+        """
+        Pans the view.
+
+        Args:
+            dx (float): horizontal distance in pixels, positive values move the view to the right.
+            dy (float): vertical distance in pixels, positive values move the view down.
+        """
+        viewport = self._get_viewport()
+        s = viewport.matrix(self.width, self.height)[0]
+        viewport.pan(dx / s, dy / s)
+
+    def zoom(self, factor, center=None):
+        """
+        Zooms the view.
+
+        Args:
+            factor (float): zoom factor, values greater than 1 zoom in.
+            center (Tuple[float, float], optional): position in pixels that stays in place, defaults to the center of the window.
+        """
+        viewport = self._get_viewport()
+        if center is not None:
+            center = self.to_document(center)
+        viewport.zoom(factor, center)
+
+    def to_document(self, position):
+        """
+        Converts a position in the window (e.g. of a mouse event) to the user space of the document, e.g. for hit-testing.
+
+        Args:
+            position (Tuple[float, float]): the position in pixels.
+
+        Returns:
+            Tuple[float, float]: the position in the user space of the document.
+        """
+        ((x, y),) = apply(invert(self._matrix()), (position,))
+        return x, y
+
+    def _matrix(self):
+        if self.viewport is not None:
+            return self.viewport.matrix(self.width, self.height)
+        if self._layer_cache is not None:
+            return document_matrix(self._layer_cache.root, self.width, self.height)
+        return IDENTITY
+
+    def _get_viewport(self):
+        # the view starts out showing what is currently rendered
+        if self.viewport is None:
+            x_min, y_min = self.to_document((0, 0))
+            x_max, y_max = self.to_document((self.width, self.height))
+            self.viewport = Viewport(x_min, y_min, x_max - x_min, y_max - y_min)
+        return self.viewport
 
     def render_svg(self, svg_code):
         """
@@ -28,25 +113,79 @@ class PygameView:
         Args:
             svg_code (str): The SVG code to be rendered.
         """
+        image_surface = self._rasterise(svg_code.encode("utf-8"))
+        self.screen.blit(image_surface, (0, 0))
+        pygame.display.flip()
+
+    def render_application(self, application):
+        """
+        Renders the document of an `SVGApplication` in the Pygame window. The document is split into layers that are
+        rasterised and cached separately, only layers that have changed since the last call are rasterised again, see `LayerCache`.
+        If a viewport is set (see `set_viewport`, `pan` and `zoom`) only that region is rendered, elements outside of it are not rasterised.
+        Elements that are small on screen are drawn at the level of detail chosen by `level_of_detail`, see `LevelOfDetail`.
+
+        Args:
+            application (SVGApplication): The application to be rendered.
+        """
+        if (
+            self._layer_cache is None
+            or self._layer_cache.application is not application
+        ):
+            if self._layer_cache is not None:
+                self._layer_cache.close()
+            if self._hover is not None:
+                self._hover.close()
+            self._hover = HoverTracker(application)
+            self._layer_cache = LayerCache(
+                application,
+                self._rasterise,
+                draw_sprites=self._draw_sprites,
+                size=(self.width, self.height),
+            )
+        self._layer_cache.viewport = self.viewport
+        self._layer_cache.level_of_detail = self.level_of_detail
+        self.screen.fill((0, 0, 0))
+        for layer in self._layer_cache.render():
+            if isinstance(layer, list):
+                self.screen.blits(layer, doreturn=False)
+            else:
+                self.screen.blit(layer, (0, 0))
+        pygame.display.flip()
+
+    def _draw_sprites(self, instances):
+        # each unique sprite is rasterised once, instances are drawn as blits.
+        blits = []
+        for instance in instances:
+            sprite = self._sprites.get(instance.svg)
+            if sprite is None:
+                if len(self._sprites) >= MAX_SPRITES:
+                    self._sprites.clear()
+                sprite = self._sprites[instance.svg] = self._rasterise(
+                    instance.svg, instance.size
+                )
+            if instance.flip:
+                sprite = pygame.transform.flip(sprite, False, True)
+            if abs(instance.angle) > 1e-3:
+                sprite = pygame.transform.rotate(sprite, -instance.angle)
+            blits.append((sprite, instance.position))
+        return blits
+
+    def _rasterise(self, svg_code, size=None):
+        width, height = size or (self.width, self.height)
         # Convert SVG to PNG using cairosvg
         png_io = io.BytesIO()
         ANTIALIASING_SCALE = 3
         # TODO check that the svg width and height have no changed, otherwise update the pygame surface dimensions.
         cairosvg.svg2png(
-            bytestring=svg_code.encode("utf-8"),
+            bytestring=svg_code,
             write_to=png_io,
-            output_width=ANTIALIASING_SCALE * self.width,
-            output_height=ANTIALIASING_SCALE * self.height,
+            output_width=ANTIALIASING_SCALE * width,
+            output_height=ANTIALIASING_SCALE * height,
         )
         png_io.seek(0)
         image_surface = pygame.image.load(png_io)
         # hacky implementation of anti-aliasing as it doesnt seem to work in cairosvg
-        image_surface = pygame.transform.smoothscale(
-            image_surface, (self.width, self.height)
-        )
-        # print()
-        self.screen.blit(image_surface, (0, 0))
-        pygame.display.flip()
+        return pygame.transform.smoothscale(image_surface, (width, height))
 
     def step(self):
         events = []
@@ -67,7 +206,21 @@ class PygameView:
                     _EventFactory.create_mouse_motion_event_from_pygame_event(pg_event)
                 )
                 events.append(mouse_motion_event)
+                self._pointer = pg_event.pos
+            elif pg_event.type == pygame.WINDOWLEAVE:
+                self._pointer = None
+        if self.track_hover and self._hover is not None:
+            # once per step, the pointer may also be moved by changes to the document or the view
+            point = None if self._pointer is None else self.to_document(self._pointer)
+            events.extend(self._hover.update(point, self._pointer))
         return events
 
     def close(self):
+        if self._layer_cache is not None:
+            self._layer_cache.close()
+            self._layer_cache = None
+        if self._hover is not None:
+            self._hover.close()
+            self._hover = None
+        self._sprites = {}  # sprite svg code -> surface
         pygame.quit()
@@ -0,0 +1,6 @@
+from .layers import LayerCache
+from .buffer import BufferRenderer
+from .geometry import GeometryCache
+from .lod import LevelOfDetail
+
+__all__ = ("LayerCache", "BufferRenderer", "GeometryCache", "LevelOfDetail")
@@ -0,0 +1,160 @@
+""" Module defining the BufferRenderer class, which rasterises SVG code directly into a caller-supplied buffer. """
+
+import sys
+from typing import Any
+
+import numpy as np
+
+__all__ = ("BufferRenderer", "PIXEL_FORMATS")
+
+PIXEL_FORMATS = ("RGBA", "BGRA", "RGB")
+_BUFFER_SURFACE = None
+
+
+class BufferRenderer:
+    """Rasterises SVG code into a caller-supplied buffer, e.g. to hand frames to a video encoder or another process without copying.
+
+    The buffer may be a `numpy` array, anything that supports the buffer protocol (`bytearray`, `memoryview`, `mmap`, ...) or a
+    `multiprocessing.shared_memory.SharedMemory` block. It must be C-contiguous, writable and hold at least `width * height * channels` bytes.
+    For the `RGBA` and `BGRA` formats cairo draws straight into the buffer. `BGRA` is the native cairo format (on little-endian machines) and
+    needs no conversion, `RGBA` swaps channels in place. `RGB` is drawn into a scratch frame that is allocated once. No memory is
+    allocated per frame.
+
+    Note that cairo uses premultiplied alpha, colours are only unaffected where the frame is opaque, use `background_color` to render onto an opaque background.
+
+    Example:
+        ```
+        shm = shared_memory.SharedMemory(create=True, size=640 * 480 * 4)
+        renderer = BufferRenderer(640, 480)
+        renderer.render(svg_code, shm)  # another process can read the frame from `shm`
+        ```
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        pixel_format: str = "RGBA",
+        background_color: str = None,
+    ):
+        """Constructor.
+
+        Args:
+            width (int): width of the frame in pixels, the document is scaled to fit.
+            height (int): height of the frame in pixels.
+            pixel_format (str, optional): one of `PIXEL_FORMATS`.
+            background_color (str, optional): colour to fill the frame with before drawing, the frame is cleared to transparent if not given.
+        """
+        if pixel_format not in PIXEL_FORMATS:
+            raise ValueError(
+                f"Unknown pixel format {pixel_format}, expected one of {PIXEL_FORMATS}."
+            )
+        self.width = width
+        self.height = height
+        self.pixel_format = pixel_format
+        self.background_color = background_color
+        self._frame = None  # scratch frame (native cairo format) for formats that cairo cannot draw directly
+        self._channel = None  # scratch channel for in-place channel swaps
+        if pixel_format == "RGB":
+            self._frame = np.empty((height, width, 4), dtype=np.uint8)
+        elif pixel_format == "RGBA" and sys.byteorder == "little":
+            self._channel = np.empty((height, width), dtype=np.uint8)
+
+    @property
+    def channels(self) -> int:
+        return len(self.pixel_format)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes that a frame requires."""
+        return self.width * self.height * self.channels
+
+    def empty(self) -> np.ndarray:
+        """Allocates an array that can hold a single frame."""
+        return np.empty((self.height, self.width, self.channels), dtype=np.uint8)
+
+    def render(self, svg_code: str | bytes, out: Any = None) -> np.ndarray:
+        """Rasterises SVG code into `out`.
+
+        Args:
+            svg_code (str | bytes): the SVG code to rasterise.
+            out (Any, optional): the buffer to write the frame to, see class documentation. A new array is allocated if not given.
+
+        Returns:
+            np.ndarray: an array of shape (height, width, channels) that shares memory with `out`.
+        """
+        frame = self._as_array(self.empty() if out is None else out)
+        if isinstance(svg_code, str):
+            svg_code = svg_code.encode("utf-8")
+        target = frame if self._frame is None else self._frame
+        target.fill(0)
+        _buffer_surface().convert(
+            svg_code,
+            write_to=(target, (self.width, self.height)),
+            output_width=self.width,
+            output_height=self.height,
+            background_color=self.background_color,
+        )
+        self._convert(target, frame)
+        return frame
+
+    def _as_array(self, out: Any) -> np.ndarray:
+        buffer = getattr(out, "buf", out)  # SharedMemory
+        if not isinstance(buffer, np.ndarray):
+            view = memoryview(buffer)
+            if view.readonly:
+                raise ValueError("Buffer is not writable.")
+            buffer = np.frombuffer(view.cast("B"), dtype=np.uint8)
+        if not buffer.flags.c_contiguous or not buffer.flags.writeable:
+            raise ValueError("Buffer must be C-contiguous and writable.")
+        if buffer.nbytes < self.nbytes:
+            raise ValueError(
+                f"Buffer of {buffer.nbytes} bytes is too small for a {self.width}x{self.height} {self.pixel_format} frame ({self.nbytes} bytes)."
+            )
+        buffer = buffer.reshape(-1).view(np.uint8)[: self.nbytes]
+        return buffer.reshape(self.height, self.width, self.channels)
+
+    def _convert(self, native: np.ndarray, frame: np.ndarray):
+        """Converts a frame in the native cairo format (ARGB32, i.e. BGRA bytes on little-endian machines) to the pixel format."""
+        if sys.byteorder == "little":
+            if self.pixel_format == "RGBA":
+                np.copyto(self._channel, native[..., 0])
+                np.copyto(native[..., 0], native[..., 2])
+                np.copyto(native[..., 2], self._channel)
+            elif self.pixel_format == "RGB":
+                np.copyto(frame, native[..., 2::-1])
+        else:  # ARGB bytes
+            order = dict(RGBA=[1, 2, 3, 0], BGRA=[3, 2, 1, 0], RGB=[1, 2, 3])
+            frame[...] = native[..., order[self.pixel_format]]
+
+
+def _buffer_surface():
+    global _BUFFER_SURFACE  # pylint: disable=global-statement
+    if _BUFFER_SURFACE is None:
+        # cairo is only loaded once something is rasterised
+        import cairocffi as cairo
+        from cairosvg.surface import PNGSurface
+
+        class _BufferSurface(PNGSurface):
+            """A cairosvg surface that draws into an existing buffer, `output` is a tuple `(buffer, (width, height))`."""
+
+            def _create_surface(self, width, height):
+                buffer, (width, height) = self.output
+                stride = cairo.ImageSurface.format_stride_for_width(
+                    cairo.FORMAT_ARGB32, width
+                )
+                surface = cairo.ImageSurface.create_for_data(
+                    memoryview(buffer).cast("B"),
+                    cairo.FORMAT_ARGB32,
+                    width,
+                    height,
+                    stride,
+                )
+                return surface, width, height
+
+            def finish(self):
+                self.cairo.flush()
+                self.cairo.finish()
+
+        _BUFFER_SURFACE = _BufferSurface
+    return _BUFFER_SURFACE
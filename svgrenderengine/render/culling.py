@@ -0,0 +1,179 @@
+"""
+    Module defining view-frustum culling, which drops elements that are entirely outside of the visible region of a document before it is rasterised.
+
+    The visible region is a `Viewport` in the user space of the document (i.e. a `viewBox`), it can be panned and zoomed. Elements are
+    tested against the region that they may paint (see `GeometryCache.painted_bounds`), so strokes that reach into the view are kept, and
+    elements with filters or markers are never culled. Containers that are partially visible are descended into, so the cost of
+    rasterising scales with what is visible rather than with the size of the document.
+"""
+
+from typing import List, Optional, Tuple
+
+from lxml import etree as ET
+
+from ..engine.lazy import is_hidden
+from .geometry import (
+    CONTAINER_TAGS,
+    NON_RENDERED_TAGS,
+    Bounds,
+    GeometryCache,
+    intersects,
+)
+from .lod import LevelOfDetail
+from .transform import Matrix, view_box_matrix
+
+__all__ = ("Viewport", "cull")
+
+# containers whose children can be culled separately. A `<switch>` renders only its first applicable child, dropping any of its
+# children could change which one that is, so it is kept or dropped as a whole.
+_CULLED_CONTAINER_TAGS = CONTAINER_TAGS - {"switch"}
+
+
+class Viewport:
+    """The visible region of a document in its user space, it is rendered as the `viewBox` of the document.
+
+    Attributes:
+        x (float): left edge.
+        y (float): top edge.
+        width (float): width, in user units.
+        height (float): height, in user units.
+    """
+
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x: float, y: float, width: float, height: float):
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Viewport size must be positive, got {width}x{height}.")
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f"Viewport({self.x}, {self.y}, {self.width}, {self.height})"
+
+    def __eq__(self, other):
+        return isinstance(other, Viewport) and self.view_box == other.view_box
+
+    @property
+    def view_box(self) -> Tuple[float, float, float, float]:
+        return (self.x, self.y, self.width, self.height)
+
+    @property
+    def bounds(self) -> Bounds:
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    def pan(self, dx: float, dy: float):
+        """Moves the viewport by (dx, dy) user units."""
+        self.x += dx
+        self.y += dy
+
+    def zoom(self, factor: float, center: Tuple[float, float] = None):
+        """Zooms in (`factor > 1`) or out (`factor < 1`) about `center` (in user units), which stays in place. Defaults to the center of the viewport."""
+        if factor <= 0:
+            raise ValueError(f"Zoom factor must be positive, got {factor}.")
+        if center is None:
+            center = (self.x + self.width / 2, self.y + self.height / 2)
+        cx, cy = center
+        self.x = cx - (cx - self.x) / factor
+        self.y = cy - (cy - self.y) / factor
+        self.width /= factor
+        self.height /= factor
+
+    def matrix(self, width: float, height: float) -> Matrix:
+        """Gets the transform from the user space of the document to the pixels of an output of the given size."""
+        return view_box_matrix(self.view_box, width, height)
+
+    def visible_bounds(self, width: float, height: float) -> Bounds:
+        """The region that is visible in an output of the given size, this is larger than `bounds` if the aspect ratios differ."""
+        s, _, _, _, e, f = self.matrix(width, height)
+        return (-e / s, -f / s, (width - e) / s, (height - f) / s)
+
+
+def cull(
+    element: ET._Element,
+    view: Optional[Bounds],
+    geometry: GeometryCache,
+    culled: List[ET._Element] = None,
+    lod: LevelOfDetail = None,
+    scale: float = 1.0,
+) -> bytes:
+    """Serialises an element without the parts of its content that are entirely outside of `view`.
+
+    Elements that are not rendered where they are defined (e.g. `<defs>`), elements that are referenced by a `<use>` and elements whose bounds
+    are unknown are always kept. Hidden elements are dropped. If `lod` is given, every element that is kept is drawn with the representation
+    that it chooses for `scale` (see `lod.LevelOfDetail`).
+
+    Args:
+        element (ET._Element): the element, it must be in the document of `geometry`.
+        view (Bounds): the region to keep, in the user space of the document. Nothing is culled if `None`.
+        geometry (GeometryCache): the geometry of the document.
+        culled (List[ET._Element], optional): the elements that were dropped are appended to this list, if given.
+        lod (LevelOfDetail, optional): chooses the level of detail of elements.
+        scale (float, optional): pixels per user unit of the document, used to choose the level of detail. Defaults to 1.0.
+
+    Returns:
+        bytes: the serialised element, empty if it is entirely outside of `view`.
+    """
+    parts = []
+    _cull(element, view, geometry, parts, culled, lod, scale)
+    return b"".join(parts)
+
+
+def _cull(element, view, geometry, parts, culled, lod, scale):
+    tag = ET.QName(element).localname
+    if tag in NON_RENDERED_TAGS or geometry.is_referenced(element):
+        keep = True  # may be drawn elsewhere, as it is
+    else:
+        keep = _keep(element, tag, view, geometry)
+        if keep and lod is not None:
+            representation = lod.representation(element, geometry, scale)
+            if representation is not None:
+                if representation:
+                    parts.append(representation)
+                elif culled is not None:
+                    culled.append(element)
+                return
+            if tag in _CULLED_CONTAINER_TAGS:
+                keep = None  # descendants may have their own level of detail
+    if keep is None:
+        # partially visible container
+        open_tag, close_tag = _tags(element)
+        parts.append(open_tag)
+        for child in element:
+            if isinstance(child.tag, str):
+                _cull(child, view, geometry, parts, culled, lod, scale)
+        parts.append(close_tag)
+    elif keep:
+        parts.append(ET.tostring(element, with_tail=False))
+    elif culled is not None:
+        culled.append(element)
+
+
+def _keep(
+    element: ET._Element, tag: str, view: Optional[Bounds], geometry: GeometryCache
+) -> Optional[bool]:
+    """Whether to keep the whole element, or `None` if it should be descended into."""
+    bounds = geometry.painted_bounds(element)
+    if bounds is None:
+        return not is_hidden(element)
+    if view is None:
+        return True
+    if not intersects(bounds, view):
+        return False
+    if tag in _CULLED_CONTAINER_TAGS and not (
+        view[0] <= bounds[0]
+        and view[1] <= bounds[1]
+        and bounds[2] <= view[2]
+        and bounds[3] <= view[3]
+    ):
+        return None
+    return True
+
+
+def _tags(element: ET._Element) -> Tuple[bytes, bytes]:
+    shell = ET.Element(element.tag, element.attrib, nsmap=element.nsmap)
+    shell.text = "\n"
+    open_tag = ET.tostring(shell).rsplit(b"\n", 1)[0]
+    close_tag = b"</" + open_tag[1:].split(None, 1)[0].rstrip(b">") + b">"
+    return open_tag, close_tag
@@ -0,0 +1,268 @@
+"""
+    Module defining the headless export of recorded sessions to video or image sequences.
+
+    A `FrameExporter` replays a sequence of query events against an application, serialises the state of the application after
+    each frame and rasterises the frames in a pool of workers. Frames are handed to a sink in order, e.g. an encoder subprocess
+    (`FFmpegSink`) or a directory of images (`ImageSequenceSink`). The number of frames in flight is bounded, so memory use does not
+    grow with the length of the session.
+"""
+
+import os
+import subprocess
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Sequence
+
+import cairosvg
+from lxml import etree as ET
+
+from ..event import Event
+from .buffer import BufferRenderer
+from .transform import _length
+
+__all__ = ("FrameExporter", "FFmpegSink", "ImageSequenceSink")
+
+_RENDERERS = {}  # per worker process
+
+
+class FFmpegSink:
+    """Pipes raw frames to an `ffmpeg` subprocess that encodes them to a video file.
+
+    Attributes:
+        frame_format (str): the format of frames that this sink expects (`raw` RGB frames).
+    """
+
+    frame_format = "raw"
+
+    def __init__(
+        self,
+        path: str,
+        fps: float = 30,
+        codec: str = "libx264",
+        output_pixel_format: str = "yuv420p",
+        ffmpeg: str = "ffmpeg",
+        extra_args: Sequence[str] = (),
+    ):
+        """Constructor.
+
+        Args:
+            path (str): the video file to write.
+            fps (float, optional): frames per second of the video.
+            codec (str, optional): the video codec, passed to ffmpeg as `-c:v`.
+            output_pixel_format (str, optional): the pixel format of the video, passed to ffmpeg as `-pix_fmt`. Note that `yuv420p` requires an even width and height.
+            ffmpeg (str, optional): the ffmpeg executable.
+            extra_args (Sequence[str], optional): additional output arguments for ffmpeg.
+        """
+        self.path = path
+        self.fps = fps
+        self.codec = codec
+        self.output_pixel_format = output_pixel_format
+        self.ffmpeg = ffmpeg
+        self.extra_args = list(extra_args)
+        self._process = None
+
+    def open(self, width: int, height: int):
+        command = [
+            self.ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(self.fps),
+            "-i",
+            "-",
+            "-c:v",
+            self.codec,
+            "-pix_fmt",
+            self.output_pixel_format,
+            *self.extra_args,
+            self.path,
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame: bytes):
+        self._process.stdin.write(frame)
+
+    def close(self):
+        if self._process is None:
+            return
+        self._process.stdin.close()
+        returncode = self._process.wait()
+        self._process = None
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {returncode}.")
+
+
+class ImageSequenceSink:
+    """Writes each frame to a PNG file.
+
+    Attributes:
+        frame_format (str): the format of frames that this sink expects (`png` encoded frames).
+    """
+
+    frame_format = "png"
+
+    def __init__(self, directory: str, pattern: str = "frame_{:06d}.png"):
+        """Constructor.
+
+        Args:
+            directory (str): directory to write to, it is created if it does not exist.
+            pattern (str, optional): file name pattern, formatted with the frame index.
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self._index = 0
+
+    def open(self, width: int, height: int):
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = 0
+
+    def write(self, frame: bytes):
+        path = os.path.join(self.directory, self.pattern.format(self._index))
+        with open(path, "wb") as file:
+            file.write(frame)
+        self._index += 1
+
+    def close(self):
+        pass
+
+
+class FrameExporter:
+    """Replays query events against an application and exports a frame after each step, without a display.
+
+    The application is queried (and serialised) on the calling thread, rasterisation happens in a pool of workers, by default
+    one process per CPU. At most `max_pending` frames are in flight at once, frames are written to the sink in order.
+
+    Example:
+        ```
+        exporter = FrameExporter(app, FFmpegSink("session.mp4", fps=30), width=640, height=480)
+        exporter.export(recorded_queries)  # one list of queries per frame
+        ```
+
+    A sink is any object with a `frame_format` attribute (`raw` for RGB frames or `png`) and `open(width, height)`, `write(frame)` and `close()` methods.
+    """
+
+    def __init__(
+        self,
+        application: Any,
+        sink: Any,
+        width: int = None,
+        height: int = None,
+        background_color: str = "white",
+        max_workers: int = None,
+        max_pending: int = None,
+        executor: Executor = None,
+        rasterise: Callable[[bytes], bytes] = None,
+    ):
+        """Constructor.
+
+        Args:
+            application (Any): the application to replay queries against, an `SVGApplication` or anything with `query` and `render` methods (e.g. `TemplatedSVGApplication`).
+            sink (Any): where frames are written to, see class documentation.
+            width (int, optional): width of the frames in pixels, defaults to the width of the document.
+            height (int, optional): height of the frames in pixels, defaults to the height of the document.
+            background_color (str, optional): colour that frames are rendered onto.
+            max_workers (int, optional): the number of worker processes, defaults to the number of CPUs.
+            max_pending (int, optional): the maximum number of frames in flight, defaults to twice the number of workers.
+            executor (Executor, optional): executor to rasterise frames with instead of a process pool, it is not shut down by the exporter.
+            rasterise (Callable[[bytes], bytes], optional): rasterises the SVG code of a frame, it must be picklable if a process pool is used. Defaults to rasterising with cairo, in the format that the sink expects.
+        """
+        self.application = application
+        self.sink = sink
+        self.width = width
+        self.height = height
+        self.background_color = background_color
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.executor = executor
+        self.rasterise = rasterise
+
+    def export(self, frames: Iterable[Event | Sequence[Event]]) -> int:
+        """Exports one frame per step.
+
+        Args:
+            frames (Iterable[Event | Sequence[Event]]): the queries that are applied before each frame, one item (a query or a sequence of queries) per frame. Use an empty sequence to repeat the previous state.
+
+        Returns:
+            int: the number of frames that were exported.
+        """
+        width, height = self._size()
+        rasterise = self.rasterise or partial(
+            _rasterise,
+            width=width,
+            height=height,
+            frame_format=self.sink.frame_format,
+            background_color=self.background_color,
+        )
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.max_workers)
+        pending, count = deque(), 0
+        self.sink.open(width, height)
+        try:
+            for queries in frames:
+                if isinstance(queries, Event):
+                    queries = (queries,)
+                for query in queries:
+                    self.application.query(query)
+                pending.append(executor.submit(rasterise, self._svg_code()))
+                if len(pending) >= self.max_pending:
+                    self.sink.write(pending.popleft().result())
+                    count += 1
+            while pending:
+                self.sink.write(pending.popleft().result())
+                count += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not self.executor:
+                executor.shutdown(wait=True)
+            self.sink.close()
+        return count
+
+    def _svg_code(self) -> bytes:
+        root = getattr(self.application, "element_tree_root", None)
+        if root is not None:
+            return ET.tostring(root)
+        return self.application.render().encode("utf-8")
+
+    def _size(self):
+        width, height = self.width, self.height
+        if width is None or height is None:
+            root = ET.fromstring(self._svg_code())
+            width = width or round(_length(root.get("width"), 0))
+            height = height or round(_length(root.get("height"), 0))
+            if not width or not height:
+                raise ValueError(
+                    "Arguments `width` and `height` must be specified if the document does not define its size."
+                )
+        return width, height
+
+
+def _rasterise(
+    svg_code: bytes,
+    width: int,
+    height: int,
+    frame_format: str,
+    background_color: str,
+) -> bytes:
+    if frame_format == "png":
+        return cairosvg.svg2png(
+            bytestring=svg_code,
+            output_width=width,
+            output_height=height,
+            background_color=background_color,
+        )
+    key = (width, height, background_color)
+    if key not in _RENDERERS:
+        renderer = BufferRenderer(
+            width, height, pixel_format="RGB", background_color=background_color
+        )
+        _RENDERERS[key] = renderer, renderer.empty()
+    renderer, frame = _RENDERERS[key]
+    return renderer.render(svg_code, frame).tobytes()
@@ -0,0 +1,825 @@
+"""
+    Module defining the computation of element geometry, i.e. bounding boxes and hit-testing for all SVG shapes.
+
+    A `GeometryCache` computes the bounds of elements in the user space of the document (after all ancestor transforms) and caches them,
+    together with the transform of each element. If it is given an application, it listens to changes (see `SVGApplication.add_listener`) and
+    invalidates only what is affected: a change to a geometry attribute invalidates the element and its ancestors, a change to a transform
+    also invalidates the descendants of the element. Hit-testing, culling and dirty-region tracking can share a single cache.
+
+    Bounds are geometric, the region that an element may paint (including its strokes, markers and filters) is given by its painted bounds.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lxml import etree as ET
+
+from ..engine.lazy import is_hidden
+from .transform import (
+    _NUMBER_PATTERN,
+    IDENTITY,
+    Matrix,
+    _length,
+    apply,
+    document_matrix,
+    invert,
+    multiply,
+    parse_transform,
+    translate,
+)
+
+__all__ = (
+    "Bounds",
+    "GeometryCache",
+    "GEOMETRY_ATTRIBUTES",
+    "PAINT_ATTRIBUTES",
+    "UNBOUNDED",
+    "parse_path",
+    "parse_points",
+    "union",
+    "intersects",
+)
+
+Point = Tuple[float, float]
+Bounds = Tuple[float, float, float, float]  # (x_min, y_min, x_max, y_max)
+
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+CONTAINER_TAGS = frozenset(("svg", "g", "a", "switch"))
+# elements that are not rendered where they are defined.
+NON_RENDERED_TAGS = frozenset(
+    (
+        "defs",
+        "symbol",
+        "clipPath",
+        "mask",
+        "marker",
+        "pattern",
+        "linearGradient",
+        "radialGradient",
+        "filter",
+        "style",
+        "script",
+        "title",
+        "desc",
+        "metadata",
+    )
+)
+# attributes that change the geometry of an element (but not of its descendants).
+GEOMETRY_ATTRIBUTES = frozenset(
+    (
+        "x",
+        "y",
+        "width",
+        "height",
+        "cx",
+        "cy",
+        "r",
+        "rx",
+        "ry",
+        "x1",
+        "y1",
+        "x2",
+        "y2",
+        "points",
+        "d",
+        "font-size",
+        "text-anchor",
+        "stroke-width",
+        "fill-rule",
+        "href",
+        XLINK_HREF,
+        "viewBox",
+        "preserveAspectRatio",
+    )
+)
+# attributes that may hide an element and its descendants.
+VISIBILITY_ATTRIBUTES = frozenset(("display", "visibility", "style"))
+# (inherited) attributes that change the region painted by an element and its descendants, but not their geometry.
+PAINT_ATTRIBUTES = frozenset(
+    (
+        "stroke",
+        "stroke-width",
+        "stroke-linejoin",
+        "stroke-linecap",
+        "stroke-miterlimit",
+        "marker",
+        "marker-start",
+        "marker-mid",
+        "marker-end",
+        "filter",
+    )
+)
+# attributes of nested `<svg>` elements that change the transform of their content.
+VIEWPORT_ATTRIBUTES = frozenset(
+    ("x", "y", "width", "height", "viewBox", "preserveAspectRatio")
+)
+CURVE_SEGMENTS = 8  # line segments per curve when paths are flattened
+_EXACT_TAGS = frozenset(
+    ("rect", "circle", "ellipse", "line", "polyline", "polygon", "path")
+)
+# shapes whose strokes have joins (corners of rectangles are covered by half the stroke width) or that can have markers.
+_JOINED_TAGS = frozenset(("polyline", "polygon", "path"))
+_MARKER_TAGS = frozenset(("line", "polyline", "polygon", "path"))
+_MARKER_PROPERTIES = ("marker", "marker-start", "marker-mid", "marker-end")
+UNBOUNDED: Bounds = (-math.inf, -math.inf, math.inf, math.inf)
+_MAX_USE_DEPTH = 16
+_MISSING = object()
+
+_PATH_TOKEN_PATTERN = re.compile(
+    r"([MmZzLlHhVvCcSsQqTtAa])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+)
+_PATH_ARGUMENTS = dict(M=2, L=2, H=1, V=1, C=6, S=4, Q=4, T=2, A=7, Z=0)
+
+
+class GeometryCache:
+    """Computes and caches the bounds of elements in the user space of their document, see module documentation.
+
+    Bounds are geometric, i.e. they do not include strokes, markers or filters, see `painted_bounds` for those. Bounds of text are approximated
+    from the font size and the number of characters. Hidden elements (see `lazy.is_hidden`) and elements that are not rendered (e.g. the content of `<defs>`) have no bounds.
+
+    Example:
+        ```
+        geometry = GeometryCache(app)
+        geometry.bounds(app.find_element(app.element_tree_root, "player"))  # (x_min, y_min, x_max, y_max)
+        geometry.contains(element, (10, 20))
+        ```
+    """
+
+    def __init__(self, application: Any = None, root: ET._Element = None):
+        """Constructor.
+
+        Args:
+            application (Any, optional): the application (e.g. `SVGApplication`) whose document is measured, changes are tracked with a listener.
+            root (ET._Element, optional): root of a document whose changes are not tracked, use `on_change` to invalidate after changing it. Ignored if `application` is given.
+        """
+        self.application = application
+        self.root = root if application is None else application.element_tree_root
+        self._matrices: Dict[ET._Element, Matrix] = {}
+        self._bounds: Dict[ET._Element, Optional[Bounds]] = {}
+        self._painted: Dict[ET._Element, Optional[Bounds]] = {}
+        # referenced element -> `<use>` elements whose bounds depend on it
+        self._dependants: Dict[ET._Element, set] = {}
+        self._ids = None  # id -> element, built when a `<use>` is first measured
+        self._dirty: List[Bounds] = []
+        self._changed: Dict[ET._Element, None] = {}
+        self._unknown = False  # an element was changed before it was measured
+        if application is not None:
+            application.add_listener(self.on_change)
+
+    def close(self):
+        """Stops tracking changes to the application and clears the cache."""
+        if self.application is not None:
+            self.application.remove_listener(self.on_change)
+        self.clear()
+
+    def clear(self):
+        self._matrices.clear()
+        self._bounds.clear()
+        self._painted.clear()
+        self._dependants.clear()
+        self._ids = None
+
+    def matrix(self, element: ET._Element) -> Matrix:
+        """Gets the transform from the coordinates of `element` (i.e. after its own `transform`) to the user space of the document."""
+        m = self._matrices.get(element)
+        if m is not None:
+            return m
+        chain = []
+        while element is not None and element not in self._matrices:
+            chain.append(element)
+            element = element.getparent()
+        m = IDENTITY if element is None else self._matrices[element]
+        for element in reversed(chain):
+            own = _own_matrix(element)
+            if own is not IDENTITY:
+                m = multiply(m, own)
+            self._matrices[element] = m
+        return m
+
+    def bounds(self, element: ET._Element) -> Optional[Bounds]:
+        """Gets the bounds of an element (including its descendants) in the user space of the document.
+
+        Args:
+            element (ET._Element): the element.
+
+        Returns:
+            Optional[Bounds]: the bounds `(x_min, y_min, x_max, y_max)`, or `None` if the element does not render anything.
+        """
+        return self._cached(element, self._bounds, False)
+
+    def painted_bounds(self, element: ET._Element) -> Optional[Bounds]:
+        """Gets the bounds of the region that an element (including its descendants) may paint, in the user space of the document.
+
+        These are the bounds grown by the (inherited) stroke: by half the stroke width, times the miter limit for the joins of `polyline`,
+        `polygon` and `path` elements, in the coordinates of each shape. Elements with a `filter` and shapes with markers may paint anywhere,
+        their painted bounds are `UNBOUNDED`.
+
+        Args:
+            element (ET._Element): the element.
+
+        Returns:
+            Optional[Bounds]: the painted bounds `(x_min, y_min, x_max, y_max)`, or `None` if the element does not render anything.
+        """
+        return self._cached(element, self._painted, True)
+
+    def _cached(self, element, cache, painted) -> Optional[Bounds]:
+        bounds = cache.get(element, _MISSING)
+        if bounds is _MISSING:
+            if any(_is_unrendered(ancestor) for ancestor in element.iterancestors()):
+                bounds = cache[element] = None
+            else:
+                bounds = cache[element] = self._compute(element, painted)
+        return bounds
+
+    def _child_bounds(self, element: ET._Element, painted: bool) -> Optional[Bounds]:
+        # as `bounds`, the parent of `element` is known to be rendered
+        cache = self._painted if painted else self._bounds
+        bounds = cache.get(element, _MISSING)
+        if bounds is _MISSING:
+            bounds = cache[element] = self._compute(element, painted)
+        return bounds
+
+    def is_referenced(self, element: ET._Element) -> bool:
+        """Whether a measured `<use>` element references `element` (directly or through other `<use>` elements)."""
+        return bool(self._dependants.get(element))
+
+    def contains(self, element: ET._Element, point: Point) -> bool:
+        """Whether a point (in the user space of the document) is inside an element.
+
+        The exact geometry is tested for `rect`, `circle`, `ellipse`, `line` (within half the stroke width), `polyline`, `polygon` and `path`
+        (respecting `fill-rule`). Other elements (e.g. `text`, `image`, `use`) are tested against their bounds, containers against their children.
+        """
+        bounds = self.bounds(element)
+        tag = ET.QName(element).localname
+        # lines have no area, their stroke is tested below.
+        if bounds is None or (tag != "line" and not _inside(bounds, point)):
+            return False
+        if tag in CONTAINER_TAGS:
+            return any(self.contains(child, point) for child in element)
+        if tag not in _EXACT_TAGS:
+            return True
+        try:
+            ((x, y),) = apply(invert(self.matrix(element)), (point,))
+        except ValueError:
+            return False
+        return _shape_contains(element, tag, x, y)
+
+    def dirty_regions(self) -> Optional[List[Bounds]]:
+        """Gets the regions that have changed since the last call, i.e. the old and new bounds of each changed element.
+
+        Returns:
+            Optional[List[Bounds]]: the regions, or `None` if the whole document should be considered changed (an element was changed before it had been measured).
+        """
+        regions, unknown = self._dirty, self._unknown
+        for element in self._changed:
+            bounds = self.bounds(element)
+            if bounds is not None:
+                regions.append(bounds)
+        self._dirty, self._changed, self._unknown = [], {}, False
+        return None if unknown else regions
+
+    def on_change(self, element: ET._Element, key: str, old: Any, new: Any):
+        """Invalidates the geometry that is affected by a change, called as a listener, see `SVGApplication.add_listener`."""
+        if key == "_inner_xml":
+            self._invalidate(element)
+            for child in old[1]:
+                self._forget(child)
+            self._ids = None
+        elif (
+            key == "transform"
+            or key in VISIBILITY_ATTRIBUTES
+            or key in PAINT_ATTRIBUTES
+            or (key in VIEWPORT_ATTRIBUTES and ET.QName(element).localname == "svg")
+        ):
+            self._invalidate(element, subtree=True)
+        elif key == "id":
+            self._ids = None
+            self._invalidate(element)
+            for uses in list(self._dependants.values()):
+                for use in list(uses):
+                    self._invalidate(use)
+        elif key in GEOMETRY_ATTRIBUTES:
+            self._invalidate(element)
+
+    def _invalidate(self, element: ET._Element, subtree: bool = False, seen=None):
+        old = self._bounds.get(element, _MISSING)
+        if old is _MISSING:
+            self._unknown = True
+        elif old is not None:
+            self._dirty.append(old)
+        self._changed[element] = None
+        if subtree:
+            for descendant in element.iter():
+                self._matrices.pop(descendant, None)
+                self._bounds.pop(descendant, None)
+                self._painted.pop(descendant, None)
+        # the element, its ancestors and the `<use>` elements that reference any of them
+        seen = set() if seen is None else seen
+        seen.add(element)
+        uses = []
+        node = element
+        while node is not None:
+            self._bounds.pop(node, None)
+            self._painted.pop(node, None)
+            uses.extend(self._dependants.get(node, ()))
+            node = node.getparent()
+        for use in uses:
+            if use not in seen:
+                self._invalidate(use, seen=seen)
+
+    def _forget(self, element: ET._Element):
+        for descendant in element.iter():
+            self._matrices.pop(descendant, None)
+            self._bounds.pop(descendant, None)
+            self._painted.pop(descendant, None)
+            self._dependants.pop(descendant, None)
+            self._changed.pop(descendant, None)
+
+    def _compute(self, element: ET._Element, painted: bool) -> Optional[Bounds]:
+        if not isinstance(element.tag, str) or is_hidden(element):
+            return None
+        tag = ET.QName(element).localname
+        if tag in NON_RENDERED_TAGS:
+            return None
+        if tag in CONTAINER_TAGS:
+            bounds = union(self._child_bounds(child, painted) for child in element)
+        elif tag == "use":
+            scope = (None, None, None) if painted else None
+            bounds = self._use_bounds(element, element, self.matrix(element), 0, scope)
+        else:
+            bounds = _shape_bounds(element, tag, self.matrix(element))
+            if painted and bounds is not None:
+                bounds = _grow(bounds, self.matrix(element), _extent(element, tag))
+        if painted and bounds is not None and _has_filter(element):
+            return UNBOUNDED
+        return bounds
+
+    def _use_bounds(
+        self, use: ET._Element, owner: ET._Element, m: Matrix, depth: int, scope
+    ) -> Optional[Bounds]:
+        # `owner` is the `<use>` element in the document, whose bounds depend on everything that is referenced (also indirectly).
+        # `scope` is `None` for geometric bounds, otherwise the scope of `use` for painted bounds (see `_property`).
+        href = use.get("href") or use.get(XLINK_HREF)
+        if depth > _MAX_USE_DEPTH or not href or not href.startswith("#"):
+            return None
+        referenced = self._element_by_id(use, href[1:])
+        if referenced is None:
+            return None
+        self._dependants.setdefault(referenced, set()).add(owner)
+        if scope is not None:
+            scope = (referenced, use, scope)
+        m = multiply(
+            m, translate(_length(use.get("x"), 0.0), _length(use.get("y"), 0.0))
+        )
+        if ET.QName(referenced).localname == "symbol":
+            width = _length(use.get("width"), 0.0)
+            height = _length(use.get("height"), 0.0)
+            if referenced.get("viewBox") and width and height:
+                m = multiply(m, document_matrix(referenced, width, height))
+            if is_hidden(referenced):
+                return None
+            return union(
+                self._referenced_bounds(child, owner, m, depth, scope)
+                for child in referenced
+            )
+        return self._referenced_bounds(referenced, owner, m, depth, scope)
+
+    def _referenced_bounds(
+        self, element: ET._Element, owner: ET._Element, m: Matrix, depth: int, scope
+    ) -> Optional[Bounds]:
+        # bounds of an element that is drawn through a `<use>`, with the transform `m` of the `<use>`
+        if not isinstance(element.tag, str) or is_hidden(element):
+            return None
+        tag = ET.QName(element).localname
+        if tag in NON_RENDERED_TAGS:
+            return None
+        m = multiply(m, _own_matrix(element))
+        if tag in CONTAINER_TAGS:
+            bounds = union(
+                self._referenced_bounds(child, owner, m, depth, scope)
+                for child in element
+            )
+        elif tag == "use":
+            bounds = self._use_bounds(element, owner, m, depth + 1, scope)
+        else:
+            bounds = _shape_bounds(element, tag, m)
+            if scope is not None and bounds is not None:
+                bounds = _grow(bounds, m, _extent(element, tag, scope))
+        if scope is not None and bounds is not None and _has_filter(element):
+            return UNBOUNDED
+        return bounds
+
+    def _element_by_id(self, element: ET._Element, element_id: str) -> ET._Element:
+        if self._ids is None:
+            root = self.root
+            if root is None:
+                root = element.getroottree().getroot()
+            self._ids = {}
+            for other in root.iter(ET.Element):
+                other_id = other.get("id")
+                if other_id is not None:
+                    self._ids.setdefault(other_id, other)
+        return self._ids.get(element_id)
+
+
+def union(bounds: Iterable[Optional[Bounds]]) -> Optional[Bounds]:
+    """The smallest bounds that contain all of the given bounds, `None` values are ignored."""
+    result = None
+    for b in bounds:
+        if b is None:
+            continue
+        if result is None:
+            result = b
+        else:
+            result = (
+                min(result[0], b[0]),
+                min(result[1], b[1]),
+                max(result[2], b[2]),
+                max(result[3], b[3]),
+            )
+    return result
+
+
+def intersects(a: Bounds, b: Bounds) -> bool:
+    """Whether two bounds overlap (touching counts as overlapping)."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+@lru_cache(maxsize=4096)
+def parse_points(value: str) -> Tuple[Point, ...]:
+    """Parses the `points` attribute of a `<polyline>` or `<polygon>`."""
+    numbers = [float(x) for x in _NUMBER_PATTERN.findall(value or "")]
+    return tuple(zip(numbers[0::2], numbers[1::2]))
+
+
+@lru_cache(maxsize=1024)
+def parse_path(d: str, segments: int = CURVE_SEGMENTS) -> Tuple[Tuple[Point, ...], ...]:
+    """Parses the `d` attribute of a `<path>` into subpaths, curves and arcs are flattened into line segments.
+
+    Args:
+        d (str): the path data.
+        segments (int, optional): the number of line segments per curve (and per quarter turn of an arc).
+
+    Returns:
+        Tuple[Tuple[Point, ...], ...]: the points of each subpath, closed subpaths end with their first point. Parsing stops at the first error (as in SVG).
+    """
+    items = [
+        letter or float(number)
+        for letter, number in _PATH_TOKEN_PATTERN.findall(d or "")
+    ]
+    subpaths, points = [], []
+    x = y = start_x = start_y = 0.0
+    control, previous = None, None  # last control point and command, for smooth curves
+    command, i = None, 0
+    while i < len(items):
+        if isinstance(items[i], str):
+            command = items[i]
+            i += 1
+        elif command is None or command in "Zz":
+            break
+        upper = command.upper()
+        if previous is None and upper != "M":
+            break
+        count = _PATH_ARGUMENTS[upper]
+        args = items[i : i + count]
+        if len(args) < count or any(isinstance(arg, str) for arg in args):
+            break
+        i += count
+        ox, oy = (x, y) if command.islower() else (0.0, 0.0)
+        if upper == "M":
+            if len(points) > 1:
+                subpaths.append(points)
+            x, y = args[0] + ox, args[1] + oy
+            start_x, start_y = x, y
+            points = [(x, y)]
+            command = "l" if command == "m" else "L"  # further pairs are line-tos
+        elif upper == "Z":
+            if len(points) > 1:
+                if points[-1] != (start_x, start_y):
+                    points.append((start_x, start_y))
+                subpaths.append(points)
+            x, y = start_x, start_y
+            points = [(x, y)]
+        else:
+            if not points:
+                points = [(x, y)]
+            if upper == "L":
+                x, y = args[0] + ox, args[1] + oy
+                points.append((x, y))
+            elif upper == "H":
+                x = args[0] + ox
+                points.append((x, y))
+            elif upper == "V":
+                y = args[0] + oy
+                points.append((x, y))
+            elif upper in "CS":
+                if upper == "C":
+                    c1 = (args[0] + ox, args[1] + oy)
+                    args = args[2:]
+                elif previous in ("C", "S") and control is not None:
+                    c1 = (2 * x - control[0], 2 * y - control[1])
+                else:
+                    c1 = (x, y)
+                c2 = (args[0] + ox, args[1] + oy)
+                end = (args[2] + ox, args[3] + oy)
+                points.extend(_cubic((x, y), c1, c2, end, segments))
+                control, (x, y) = c2, end
+            elif upper in "QT":
+                if upper == "Q":
+                    c1 = (args[0] + ox, args[1] + oy)
+                    args = args[2:]
+                elif previous in ("Q", "T") and control is not None:
+                    c1 = (2 * x - control[0], 2 * y - control[1])
+                else:
+                    c1 = (x, y)
+                end = (args[0] + ox, args[1] + oy)
+                points.extend(_quadratic((x, y), c1, end, segments))
+                control, (x, y) = c1, end
+            else:  # A
+                end = (args[5] + ox, args[6] + oy)
+                points.extend(_arc((x, y), *args[:5], end, segments))
+                x, y = end
+        previous = upper
+    if len(points) > 1:
+        subpaths.append(points)
+    return tuple(tuple(points) for points in subpaths)
+
+
+def _own_matrix(element: ET._Element) -> Matrix:
+    """The transform that an element applies to its own coordinates (and its content)."""
+    m = parse_transform(element.get("transform"))
+    if element.getparent() is not None and ET.QName(element).localname == "svg":
+        # a nested viewport, the root `<svg>` is the user space of the document.
+        viewport = translate(
+            _length(element.get("x"), 0.0), _length(element.get("y"), 0.0)
+        )
+        width = _length(element.get("width"), 0.0)
+        height = _length(element.get("height"), 0.0)
+        if element.get("viewBox") and width and height:
+            viewport = multiply(viewport, document_matrix(element, width, height))
+        m = multiply(m, viewport) if m is not IDENTITY else viewport
+    return m
+
+
+def _own_property(element: ET._Element, name: str) -> Optional[str]:
+    """The value of a presentation property that is set on an element, its `style` takes precedence over its attribute."""
+    style = element.get("style")
+    if style and name in style:
+        for declaration in reversed(style.split(";")):
+            key, separator, value = declaration.partition(":")
+            if separator and key.strip() == name:
+                return value.replace("!important", "").strip()
+    return element.get(name)
+
+
+def _property(element: ET._Element, name: str, scope=None) -> Optional[str]:
+    """The value of an inherited presentation property of an element, `None` if it is not set on the element or its ancestors.
+
+    Content that is drawn through a `<use>` inherits from the `<use>` rather than from the ancestors of the referenced element, `scope` is
+    `(referenced, use, scope of the use)` for such content.
+    """
+    top, use, outer = scope or (None, None, None)
+    node = element
+    while node is not None:
+        value = _own_property(node, name)
+        if value is not None and value != "inherit":
+            return value
+        if node is top:
+            return _property(use, name, outer)
+        node = node.getparent()
+    return None
+
+
+def _has_filter(element: ET._Element) -> bool:
+    return _own_property(element, "filter") not in (None, "none")
+
+
+def _extent(element: ET._Element, tag: str, scope=None) -> float:
+    """How far (in the coordinates of a shape) its painting may extend beyond its geometry, `math.inf` if it has markers."""
+    if tag in _MARKER_TAGS and any(
+        _property(element, name, scope) not in (None, "none")
+        for name in _MARKER_PROPERTIES
+    ):
+        return math.inf
+    if _property(element, "stroke", scope) in (None, "none", "transparent"):
+        return 0.0
+    extent = _length(_property(element, "stroke-width", scope), 1.0) / 2
+    factor = 1.0
+    if _property(element, "stroke-linecap", scope) == "square":
+        factor = math.sqrt(2)  # the corners of the cap, if the line is diagonal
+    if tag in _JOINED_TAGS and _property(element, "stroke-linejoin", scope) in (
+        None,
+        "miter",
+        "miter-clip",
+        "arcs",
+    ):
+        miter_limit = _length(_property(element, "stroke-miterlimit", scope), 4.0)
+        factor = max(factor, miter_limit)
+    return extent * factor
+
+
+def _grow(bounds: Bounds, m: Matrix, extent: float) -> Bounds:
+    """Grows bounds (in user space) by `extent` in every direction in the coordinates of `m`."""
+    if not extent:
+        return bounds
+    if extent == math.inf:
+        return UNBOUNDED
+    a, b, c, d, _, _ = m
+    dx, dy = extent * (abs(a) + abs(c)), extent * (abs(b) + abs(d))
+    return (bounds[0] - dx, bounds[1] - dy, bounds[2] + dx, bounds[3] + dy)
+
+
+def _is_unrendered(element: ET._Element) -> bool:
+    return ET.QName(element).localname in NON_RENDERED_TAGS or is_hidden(element)
+
+
+def _shape_points(element: ET._Element, tag: str) -> Optional[Sequence[Point]]:
+    get = element.get
+    if tag in ("rect", "image", "foreignObject"):
+        x, y = _length(get("x"), 0.0), _length(get("y"), 0.0)
+        width, height = _length(get("width"), 0.0), _length(get("height"), 0.0)
+        if width <= 0 or height <= 0:
+            return None
+        return ((x, y), (x + width, y), (x + width, y + height), (x, y + height))
+    if tag == "line":
+        return (
+            (_length(get("x1"), 0.0), _length(get("y1"), 0.0)),
+            (_length(get("x2"), 0.0), _length(get("y2"), 0.0)),
+        )
+    if tag in ("polyline", "polygon"):
+        return parse_points(get("points"))
+    if tag == "path":
+        return [point for points in parse_path(get("d")) for point in points]
+    if tag == "text":
+        return _text_points(element)
+    return None
+
+
+def _shape_bounds(element: ET._Element, tag: str, m: Matrix) -> Optional[Bounds]:
+    if tag in ("circle", "ellipse"):
+        cx, cy = _length(element.get("cx"), 0.0), _length(element.get("cy"), 0.0)
+        if tag == "circle":
+            rx = ry = _length(element.get("r"), 0.0)
+        else:
+            rx, ry = _length(element.get("rx"), 0.0), _length(element.get("ry"), 0.0)
+        if rx <= 0 or ry <= 0:
+            return None
+        a, b, c, d, e, f = m
+        x, y = a * cx + c * cy + e, b * cx + d * cy + f
+        # half extents of the transformed ellipse
+        hx, hy = math.hypot(a * rx, c * ry), math.hypot(b * rx, d * ry)
+        return (x - hx, y - hy, x + hx, y + hy)
+    points = _shape_points(element, tag)
+    if not points:
+        return None
+    points = apply(m, points)
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _shape_contains(element: ET._Element, tag: str, x: float, y: float) -> bool:
+    # (x, y) is in the coordinates of the element
+    get = element.get
+    if tag == "rect":
+        rx, ry = _length(get("x"), 0.0), _length(get("y"), 0.0)
+        width, height = _length(get("width"), 0.0), _length(get("height"), 0.0)
+        return rx <= x <= rx + width and ry <= y <= ry + height
+    if tag in ("circle", "ellipse"):
+        cx, cy = _length(get("cx"), 0.0), _length(get("cy"), 0.0)
+        if tag == "circle":
+            rx = ry = _length(get("r"), 0.0)
+        else:
+            rx, ry = _length(get("rx"), 0.0), _length(get("ry"), 0.0)
+        return ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1
+    if tag == "line":
+        (x1, y1), (x2, y2) = _shape_points(element, tag)
+        width = max(_length(get("stroke-width"), 1.0), 1.0)
+        return _segment_distance(x, y, x1, y1, x2, y2) <= width / 2
+    if tag == "path":
+        subpaths = parse_path(get("d"))
+    else:
+        subpaths = (parse_points(get("points")),)
+    winding = _winding(subpaths, x, y)
+    if get("fill-rule") == "evenodd":
+        return winding % 2 != 0
+    return winding != 0
+
+
+def _text_points(element: ET._Element) -> Optional[Sequence[Point]]:
+    # approximate, glyphs are assumed to be 0.6em wide, the ascent 0.8em and the descent 0.2em.
+    text = "".join(element.itertext()).strip()
+    if not text:
+        return None
+    x, y = _length(element.get("x"), 0.0), _length(element.get("y"), 0.0)
+    size = _length(element.get("font-size"), 16.0)
+    width = 0.6 * size * len(text)
+    anchor = element.get("text-anchor")
+    if anchor == "middle":
+        x -= width / 2
+    elif anchor == "end":
+        x -= width
+    return ((x, y - 0.8 * size), (x + width, y + 0.2 * size))
+
+
+def _inside(bounds: Bounds, point: Point) -> bool:
+    return bounds[0] <= point[0] <= bounds[2] and bounds[1] <= point[1] <= bounds[3]
+
+
+def _winding(subpaths: Iterable[Sequence[Point]], x: float, y: float) -> int:
+    """The winding number of the (implicitly closed) subpaths around a point."""
+    winding = 0
+    for points in subpaths:
+        n = len(points)
+        for i in range(n):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % n]
+            cross = (x2 - x1) * (y - y1) - (x - x1) * (y2 - y1)
+            if y1 <= y:
+                if y2 > y and cross > 0:
+                    winding += 1
+            elif y2 <= y and cross < 0:
+                winding -= 1
+    return winding
+
+
+def _segment_distance(x, y, x1, y1, x2, y2) -> float:
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = (
+        0.0
+        if length == 0
+        else max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length))
+    )
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def _cubic(p0, p1, p2, p3, segments) -> List[Point]:
+    points = []
+    for k in range(1, segments + 1):
+        t = k / segments
+        s = 1 - t
+        points.append(
+            (
+                s**3 * p0[0]
+                + 3 * s * s * t * p1[0]
+                + 3 * s * t * t * p2[0]
+                + t**3 * p3[0],
+                s**3 * p0[1]
+                + 3 * s * s * t * p1[1]
+                + 3 * s * t * t * p2[1]
+                + t**3 * p3[1],
+            )
+        )
+    return points
+
+
+def _quadratic(p0, p1, p2, segments) -> List[Point]:
+    points = []
+    for k in range(1, segments + 1):
+        t = k / segments
+        s = 1 - t
+        points.append(
+            (
+                s * s * p0[0] + 2 * s * t * p1[0] + t * t * p2[0],
+                s * s * p0[1] + 2 * s * t * p1[1] + t * t * p2[1],
+            )
+        )
+    return points
+
+
+def _arc(start, rx, ry, angle, large, sweep, end, segments) -> List[Point]:
+    """Flattens an elliptical arc, see the SVG specification (implementation notes, conversion to center parameterization)."""
+    (x1, y1), (x2, y2) = start, end
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0 or start == end:
+        return [end]
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p, y1p = cos * dx + sin * dy, -sin * dx + cos * dy
+    scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if scale > 1:  # radii too small, scaled up as in SVG
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    numerator = (rx * ry) ** 2 - (rx * y1p) ** 2 - (ry * x1p) ** 2
+    denominator = (rx * y1p) ** 2 + (ry * x1p) ** 2
+    coefficient = math.sqrt(max(0.0, numerator / denominator)) if denominator else 0.0
+    if bool(large) == bool(sweep):
+        coefficient = -coefficient
+    cxp, cyp = coefficient * rx * y1p / ry, -coefficient * ry * x1p / rx
+    cx = cos * cxp - sin * cyp + (x1 + x2) / 2
+    cy = sin * cxp + cos * cyp + (y1 + y2) / 2
+    theta = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    n = max(1, math.ceil(segments * abs(delta) / (math.pi / 2)))
+    points = []
+    for k in range(1, n):
+        t = theta + delta * k / n
+        ex, ey = rx * math.cos(t), ry * math.sin(t)
+        points.append((cx + cos * ex - sin * ey, cy + sin * ex + cos * ey))
+    points.append(end)
+    return points
@@ -0,0 +1,224 @@
+""" Module defining the LayerCache class, which splits a document into layers and keeps a rasterised copy of each layer. """
+
+from typing import Any, Callable, List, Tuple
+
+from lxml import etree as ET
+
+from ..engine.svgapp import SVGApplication
+from ..engine.lazy import SVGRE_NAMESPACE
+from .culling import Viewport, cull
+from .lod import LevelOfDetail
+from .sprites import SpriteInstance, plan_sprites
+from .transform import document_matrix
+
+__all__ = ("LayerCache", "STATIC_ATTRIBUTE")
+
+STATIC_ATTRIBUTE = f"{{{SVGRE_NAMESPACE}}}static"
+# top-level elements that do not render by themselves but may be referenced from any layer, they are included in every layer.
+SHARED_TAGS = frozenset(
+    (
+        "defs",
+        "style",
+        "symbol",
+        "linearGradient",
+        "radialGradient",
+        "clipPath",
+        "mask",
+        "filter",
+        "pattern",
+        "marker",
+    )
+)
+
+
+class LayerCache:
+    """Splits the document of an `SVGApplication` into layers and caches the rasterised result of each layer.
+
+    Each top-level `<g>` (or any top-level element that is marked with `svgre:static="true"`) is a layer of its own,
+    consecutive runs of other top-level elements are grouped into a single layer. Layers are rasterised separately (each as a
+    complete document that contains the shared definitions, see `SHARED_TAGS`) and should be composited in order. A layer is
+    only rasterised again once something in its subtree has changed, changes are tracked with a listener on the application
+    (see `SVGApplication.add_listener`). Changes to the root element or to shared definitions invalidate all layers.
+
+    Note that effects that apply to the document as a whole (e.g. `opacity` on the root element) are applied to each layer separately.
+
+    If a `viewport` is set, only that region of the document is rendered and elements that are entirely outside of it are culled
+    before rasterisation (see `culling.cull`), layers that are entirely outside of it are skipped. Changing the viewport invalidates all layers.
+
+    If a `level_of_detail` is set, elements are drawn with the representation that it chooses for the current scale (see `lod.LevelOfDetail`).
+    Replacing it invalidates all layers, `clear` should be called if its settings are changed in place.
+
+    Example:
+        ```
+        cache = LayerCache(app, rasterise=lambda svg: cairosvg.svg2png(bytestring=svg))
+        for png in cache.render():
+            ...  # composite
+        ```
+    """
+
+    def __init__(
+        self,
+        application: SVGApplication,
+        rasterise: Callable[[bytes], Any],
+        draw_sprites: Callable[[List[SpriteInstance]], Any] = None,
+        size: Tuple[int, int] = None,
+    ):
+        """Constructor.
+
+        Args:
+            application (SVGApplication): the application whose document is rendered.
+            rasterise (Callable[[bytes], Any]): rasterises the SVG code of a single layer, the result is cached.
+            draw_sprites (Callable[[List[SpriteInstance]], Any], optional): draws a layer that is made only of `<use>` instances of symbols, the result is cached in place of a rasterised layer. Layers are always rasterised if not given, see `sprites.plan_sprites`.
+            size (Tuple[int, int], optional): size of the output in pixels, required with `draw_sprites`. It is also used to cull to the region that is visible in the output if the aspect ratio of the viewport differs.
+        """
+        if draw_sprites is not None and size is None:
+            raise ValueError("Argument `size` must be specified with `draw_sprites`.")
+        self.application = application
+        self.rasterise = rasterise
+        self.draw_sprites = draw_sprites
+        self.size = size
+        self._cache = {}  # layer (tuple of top-level elements) -> rasterised layer
+        # top-level elements that changed since they were last rasterised
+        self._dirty = set()
+        self.viewport: Viewport = None
+        self.level_of_detail: LevelOfDetail = None
+        # view box of the viewport and level of detail that the cache was rendered with
+        self._view = (None, None)
+        application.add_listener(self._on_change)
+
+    def close(self):
+        """Stops tracking changes to the application and clears the cache."""
+        self.application.remove_listener(self._on_change)
+        self.clear()
+
+    def clear(self):
+        """Clears the cache, every layer will be rasterised again."""
+        self._cache.clear()
+        self._dirty.clear()
+
+    @property
+    def root(self) -> ET._Element:
+        return self.application.element_tree_root
+
+    def layers(self) -> List[Tuple[ET._Element, ...]]:
+        """Splits the document into layers, each layer is a tuple of top-level elements."""
+        layers, run = [], []
+        for element in self.root:
+            if not isinstance(element.tag, str) or _local_name(element) in SHARED_TAGS:
+                continue  # comments, processing instructions and shared definitions
+            if _local_name(element) == "g" or element.get(STATIC_ATTRIBUTE) == "true":
+                if run:
+                    layers.append(tuple(run))
+                    run = []
+                layers.append((element,))
+            else:
+                run.append(element)
+        if run:
+            layers.append(tuple(run))
+        return layers
+
+    def render(self) -> List[Any]:
+        """Rasterises the layers that have changed.
+
+        Returns:
+            List[Any]: the rasterised layers, in the order in which they should be composited.
+        """
+        view_box = None if self.viewport is None else self.viewport.view_box
+        view = (view_box, self.level_of_detail)
+        if view != self._view:
+            self._cache.clear()
+            self._view = view
+        layers = self.layers()
+        cache, dirty = {}, self._dirty
+        head = None
+        for layer in layers:
+            result = self._cache.get(layer, _MISSING)
+            if result is _MISSING or any(element in dirty for element in layer):
+                if head is None:
+                    head = self._head()
+                result = self._render_layer(head, layer)
+            cache[layer] = result
+        self._cache = cache  # layers that no longer exist are dropped
+        self._dirty = set()
+        # layers that are outside of the viewport are `None`
+        return [cache[layer] for layer in layers if cache[layer] is not None]
+
+    def _render_layer(self, head, layer):
+        if self.draw_sprites is not None:
+            instances = plan_sprites(layer, self.root, self._matrix(), shared=head[1])
+            if instances is not None:
+                return self.draw_sprites(instances)
+        if self.viewport is None and self.level_of_detail is None:
+            return self.rasterise(self._layer_svg(head, layer))
+        # only the content that is in view is rasterised, at the level of detail that is visible
+        geometry = self.application.geometry
+        geometry.bounds(
+            self.root
+        )  # measures `<use>` elements, see `GeometryCache.is_referenced`
+        view = None if self.viewport is None else self._cull_bounds()
+        scale = 1.0 if self.size is None else self._matrix()[0]
+        content = [
+            cull(element, view, geometry, lod=self.level_of_detail, scale=scale)
+            for element in layer
+        ]
+        if not any(content):
+            return None
+        open_tag, shared, close_tag = head
+        return self.rasterise(b"".join([open_tag, shared, *content, close_tag]))
+
+    def _matrix(self):
+        if self.viewport is None:
+            return document_matrix(self.root, *self.size)
+        return self.viewport.matrix(*self.size)
+
+    def _cull_bounds(self):
+        if self.size is None:
+            return self.viewport.bounds
+        return self.viewport.visible_bounds(*self.size)
+
+    def _on_change(self, element, key, old, new):
+        root = self.root
+        if element is root:
+            self._cache.clear()
+            return
+        top = element
+        for ancestor in element.iterancestors():
+            if ancestor is root:
+                break
+            top = ancestor
+        else:
+            return  # not part of the document (e.g. content that has just been replaced)
+        if isinstance(top.tag, str) and _local_name(top) in SHARED_TAGS:
+            self._cache.clear()
+        else:
+            self._dirty.add(top)
+
+    def _head(self):
+        root = self.root
+        shell = ET.Element(root.tag, root.attrib, nsmap=root.nsmap)
+        if self.viewport is not None:
+            shell.set("viewBox", " ".join(str(v) for v in self.viewport.view_box))
+        shell.text = "\n"
+        open_tag = ET.tostring(shell).rsplit(b"\n", 1)[0]
+        shared = b"".join(
+            ET.tostring(element, with_tail=False)
+            for element in root
+            if isinstance(element.tag, str) and _local_name(element) in SHARED_TAGS
+        )
+        close_tag = b"</" + open_tag[1:].split(None, 1)[0].rstrip(b">") + b">"
+        return open_tag, shared, close_tag
+
+    @staticmethod
+    def _layer_svg(head, layer):
+        open_tag, shared, close_tag = head
+        parts = [open_tag, shared]
+        parts.extend(ET.tostring(element, with_tail=False) for element in layer)
+        parts.append(close_tag)
+        return b"".join(parts)
+
+
+_MISSING = object()
+
+
+def _local_name(element: ET._Element) -> str:
+    return ET.QName(element).localname
@@ -0,0 +1,198 @@
+"""
+    Module defining level-of-detail (LOD) rendering, which draws cheaper representations of elements that are small on screen.
+
+    An element (typically a `<g>`) can declare simplified alternatives with the `svgre:lod` attribute, a list of `size:target` pairs, e.g.
+    `svgre:lod="16:#tree-simple 4:#tree-dot 1:none"`. Sizes are in pixels and are compared to the larger side of the element's bounds on screen.
+    The element is drawn as is if it is at least as large as every size, otherwise the pair with the smallest size that is still larger than
+    the element is used. A target is the id of an element (usually in `<defs>`, defined in the coordinates of the element) that is drawn
+    in place of the element, or `none` to skip the element.
+
+    Paths, polygons and polylines that are smaller than a threshold on screen are simplified automatically (Ramer-Douglas-Peucker), removing
+    detail that would be smaller than a fraction of a pixel.
+"""
+
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from lxml import etree as ET
+
+from ..engine.lazy import SVGRE_NAMESPACE
+from .geometry import GeometryCache, parse_path, parse_points
+
+__all__ = ("LevelOfDetail", "LOD_ATTRIBUTE", "parse_lod", "simplify")
+
+LOD_ATTRIBUTE = f"{{{SVGRE_NAMESPACE}}}lod"
+XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"
+_SVGRE_PREFIX = f"{{{SVGRE_NAMESPACE}}}"
+_SIMPLIFIED_TAGS = frozenset(("path", "polygon", "polyline"))
+
+
+class LevelOfDetail:
+    """Chooses the representation of each element for the current scale, see module documentation.
+
+    Attributes:
+        simplify_below (float): paths (and polygons, polylines) that are smaller than this on screen, in pixels, are simplified. Set to 0 to disable.
+        tolerance (float): the largest deviation from the original geometry that simplification may introduce, in pixels.
+    """
+
+    def __init__(self, simplify_below: float = 32.0, tolerance: float = 0.5):
+        self.simplify_below = simplify_below
+        self.tolerance = tolerance
+
+    def representation(
+        self, element: ET._Element, geometry: GeometryCache, scale: float
+    ) -> Optional[bytes]:
+        """Chooses the representation of an element.
+
+        Args:
+            element (ET._Element): the element.
+            geometry (GeometryCache): the geometry of the document of the element.
+            scale (float): pixels per user unit of the document.
+
+        Returns:
+            Optional[bytes]: `None` if the element should be drawn as is, otherwise the serialised representation (empty if the element should be skipped).
+        """
+        lod = element.get(LOD_ATTRIBUTE)
+        tag = ET.QName(element).localname
+        if lod is None and (tag not in _SIMPLIFIED_TAGS or not self.simplify_below):
+            return None
+        bounds = geometry.bounds(element)
+        if bounds is None:
+            return None
+        size = max(bounds[2] - bounds[0], bounds[3] - bounds[1]) * scale
+        if lod is not None:
+            target = _select(parse_lod(lod), size)
+            if target is None:
+                return None
+            if target == "none":
+                return b""
+            return _use(element, target)
+        if size >= self.simplify_below:
+            return None
+        # the tolerance in the coordinates of the element, rounded down to a power of two so that simplified paths are reused between scales.
+        a, b, _, _, _, _ = geometry.matrix(element)
+        pixels = scale * math.hypot(a, b)
+        if pixels <= 0:
+            return None
+        tolerance = 2.0 ** math.floor(math.log2(self.tolerance / pixels))
+        if tag == "path":
+            simplified = _simplify_path(element.get("d"), tolerance)
+            key = "d"
+        else:
+            simplified = _simplify_points(element.get("points"), tolerance)
+            key = "points"
+        if simplified is None:
+            return None
+        copy = ET.Element(element.tag, element.attrib, nsmap=element.nsmap)
+        copy.set(key, simplified)
+        return ET.tostring(copy)
+
+
+@lru_cache(maxsize=1024)
+def parse_lod(value: str) -> Tuple[Tuple[float, str], ...]:
+    """Parses the value of an `svgre:lod` attribute into `(size, target)` pairs, sorted by decreasing size."""
+    levels = []
+    for item in value.split():
+        size, sep, target = item.partition(":")
+        if not sep or not target:
+            raise ValueError(f"Invalid level of detail {item!r} in {value!r}.")
+        if target != "none":
+            if not target.startswith("#"):
+                raise ValueError(
+                    f"Level of detail target must be an id reference (#id) or `none`, got {target!r}."
+                )
+            target = target[1:]
+        levels.append((float(size), target))
+    return tuple(sorted(levels, reverse=True))
+
+
+def simplify(
+    points: Sequence[Tuple[float, float]], tolerance: float
+) -> List[Tuple[float, float]]:
+    """Simplifies a polyline with the Ramer-Douglas-Peucker algorithm.
+
+    Args:
+        points (Sequence[Tuple[float, float]]): the points of the polyline.
+        tolerance (float): the largest distance of a removed point from the simplified polyline.
+
+    Returns:
+        List[Tuple[float, float]]: the points that are kept, the first and last point are always kept.
+    """
+    n = len(points)
+    if n < 3:
+        return list(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        distance, index = -1.0, None
+        for i in range(first + 1, last):
+            x, y = points[i]
+            if length == 0:
+                d = math.hypot(x - x1, y - y1)
+            else:
+                d = abs(dy * (x - x1) - dx * (y - y1)) / length
+            if d > distance:
+                distance, index = d, i
+        if index is not None and distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _select(levels: Tuple[Tuple[float, str], ...], size: float) -> Optional[str]:
+    target = None
+    for threshold, level in levels:  # by decreasing size
+        if size < threshold:
+            target = level
+        else:
+            break
+    return target
+
+
+def _use(element: ET._Element, target: str) -> bytes:
+    # the alternative is drawn in the coordinates of the element, with its presentation attributes
+    attrib = {
+        key: value
+        for key, value in element.attrib.items()
+        if key != "id" and not key.startswith(_SVGRE_PREFIX)
+    }
+    group = ET.Element(ET.QName(element.tag, "g").text, attrib, nsmap=element.nsmap)
+    namespace = ET.QName(element).namespace
+    use = ET.SubElement(group, f"{{{namespace}}}use" if namespace else "use")
+    use.set(f"{{{XLINK_NAMESPACE}}}href", f"#{target}")
+    return ET.tostring(group)
+
+
+@lru_cache(maxsize=4096)
+def _simplify_path(d: str, tolerance: float) -> Optional[str]:
+    subpaths = parse_path(d)
+    parts, before, after = [], 0, 0
+    for points in subpaths:
+        closed = len(points) > 2 and points[0] == points[-1]
+        kept = simplify(points, tolerance)
+        before += len(points)
+        after += len(kept)
+        if closed:
+            kept = kept[:-1]
+        parts.append("M" + " L".join(f"{x:.6g} {y:.6g}" for x, y in kept))
+        if closed:
+            parts.append("Z")
+    if after >= before:
+        return None  # nothing to gain, curves are kept
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def _simplify_points(value: str, tolerance: float) -> Optional[str]:
+    points = parse_points(value)
+    kept = simplify(points, tolerance)
+    if len(kept) >= len(points):
+        return None
+    return " ".join(f"{x:.6g},{y:.6g}" for x, y in kept)
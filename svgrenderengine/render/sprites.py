@@ -0,0 +1,161 @@
+"""
+    Module defining sprite planning, which replaces repeated `<use>` instances of a `<symbol>` with a single rasterised sprite.
+
+    A layer (see `LayerCache`) whose content is made only of `<use>` elements (possibly in nested `<g>` elements) that reference
+    `<symbol>` elements with a `viewBox` is planned as a list of `SpriteInstance`s. Each unique (symbol, style, pixel size) is
+    rasterised once and then drawn at every instance, rotations and flips are applied to the rasterised sprite. Layers that
+    cannot be planned (e.g. they contain other shapes, or skewed instances) are rasterised as usual.
+"""
+
+import copy
+import math
+from typing import List, Sequence, Tuple
+
+from lxml import etree as ET
+
+from ..engine.lazy import SVGRE_NAMESPACE
+from .transform import Matrix, apply, multiply, parse_transform, translate
+
+__all__ = ("SpriteInstance", "plan_sprites")
+
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+# attributes that do not change what an instance looks like, every other attribute of a `<use>` (or its `<g>` ancestors) is inherited by the symbol.
+# `class` is inherited too, as style sheets (see `LayerCache`) are included in each sprite.
+_GEOMETRY_ATTRIBUTES = frozenset(
+    ("id", "transform", "x", "y", "width", "height", "href", XLINK_HREF)
+)
+_IGNORED_TAGS = frozenset(("title", "desc", "metadata"))
+_EPSILON = 1e-6
+_SVGRE_PREFIX = f"{{{SVGRE_NAMESPACE}}}"
+
+
+class SpriteInstance:
+    """A single instance of a sprite.
+
+    Attributes:
+        svg (bytes): SVG code of the sprite, instances with the same code share the same rasterised sprite.
+        size (Tuple[int, int]): size of the sprite in pixels (before rotation).
+        angle (float): clockwise rotation in degrees.
+        flip (bool): whether the sprite is flipped vertically (before rotation).
+        position (Tuple[int, int]): position of the top left corner of the (rotated) sprite in pixels.
+    """
+
+    __slots__ = ("svg", "size", "angle", "flip", "position")
+
+    def __init__(self, svg, size, angle, flip, position):
+        self.svg = svg
+        self.size = size
+        self.angle = angle
+        self.flip = flip
+        self.position = position
+
+    def __repr__(self):
+        return f"SpriteInstance(size={self.size}, angle={self.angle:.1f}, flip={self.flip}, position={self.position})"
+
+
+def plan_sprites(
+    layer: Sequence[ET._Element],
+    root: ET._Element,
+    matrix: Matrix,
+    shared: bytes = b"",
+) -> List[SpriteInstance]:
+    """Plans a layer as sprite instances.
+
+    Args:
+        layer (Sequence[ET._Element]): the top-level elements of the layer.
+        root (ET._Element): root of the document, used to look up symbols.
+        matrix (Matrix): transform from the user space of the document to pixels, see `document_matrix`.
+        shared (bytes, optional): serialized definitions that are included in each sprite (e.g. gradients).
+
+    Returns:
+        List[SpriteInstance]: the instances in drawing order, or `None` if the layer cannot be drawn with sprites.
+    """
+    symbols = {
+        symbol.get("id"): symbol
+        for symbol in root.iter(f"{{{SVG_NAMESPACE}}}symbol", "symbol")
+    }
+    instances, sprites = [], {}
+    for element in layer:
+        if not _plan(element, symbols, matrix, (), shared, instances, sprites):
+            return None
+    return instances if instances else None
+
+
+def _plan(element, symbols, matrix, style, shared, instances, sprites) -> bool:
+    if not isinstance(element.tag, str):
+        return True  # comments and processing instructions
+    tag = ET.QName(element).localname
+    if tag in _IGNORED_TAGS or element.get("display") == "none":
+        return True
+    if tag not in ("g", "use"):
+        return False
+    matrix = multiply(matrix, parse_transform(element.get("transform")))
+    # the attributes of each level are kept apart, so that style sheet rules that depend on nesting (e.g. `.a .b`) still apply
+    attributes = tuple(
+        sorted(
+            (k, v)
+            for k, v in element.attrib.items()
+            if k not in _GEOMETRY_ATTRIBUTES and not k.startswith(_SVGRE_PREFIX)
+        )
+    )
+    if attributes:
+        style = style + (attributes,)
+    if tag == "g":
+        return all(
+            _plan(child, symbols, matrix, style, shared, instances, sprites)
+            for child in element
+        )
+    href = element.get("href") or element.get(XLINK_HREF)
+    if not href or not href.startswith("#"):
+        return False
+    symbol = symbols.get(href[1:])
+    if symbol is None or symbol.get("viewBox") is None:
+        return False
+    try:
+        width, height = float(element.get("width")), float(element.get("height"))
+        x, y = float(element.get("x", 0)), float(element.get("y", 0))
+    except (TypeError, ValueError):
+        return False  # percentages and missing sizes are not supported
+    matrix = multiply(matrix, translate(x, y))
+    a, b, c, d, _, _ = matrix
+    sx = math.hypot(a, b)
+    if sx < _EPSILON or abs(a * c + b * d) > _EPSILON * sx * sx:
+        return False  # degenerate or skewed
+    sy = (a * d - b * c) / sx
+    size = (max(1, round(sx * width)), max(1, round(abs(sy) * height)))
+    key = (href, style, size)
+    svg = sprites.get(key)
+    if svg is None:
+        svg = sprites[key] = _sprite_svg(symbol, style, size, shared)
+    corners = apply(matrix, ((0, 0), (width, 0), (0, height), (width, height)))
+    position = (
+        math.floor(min(p[0] for p in corners)),
+        math.floor(min(p[1] for p in corners)),
+    )
+    angle = math.degrees(math.atan2(b, a))
+    instances.append(SpriteInstance(svg, size, angle, sy < 0, position))
+    return True
+
+
+def _sprite_svg(
+    symbol: ET._Element, style: tuple, size: Tuple[int, int], shared: bytes
+) -> bytes:
+    svg = ET.Element(
+        f"{{{SVG_NAMESPACE}}}svg",
+        width=str(size[0]),
+        height=str(size[1]),
+        viewBox=symbol.get("viewBox"),
+        preserveAspectRatio=symbol.get("preserveAspectRatio", "xMidYMid meet"),
+        nsmap={None: SVG_NAMESPACE, "xlink": "http://www.w3.org/1999/xlink"},
+    )
+    group = svg
+    for attributes in style or ((),):
+        group = ET.SubElement(group, f"{{{SVG_NAMESPACE}}}g", dict(attributes))
+    group.text = symbol.text
+    group.extend(copy.deepcopy(child) for child in symbol)
+    code = ET.tostring(svg)
+    if shared:
+        index = code.index(b">") + 1
+        code = code[:index] + shared + code[index:]
+    return code
@@ -0,0 +1,159 @@
+""" Module defining 2D affine transforms and the parsing of SVG `transform` attributes. """
+
+import math
+import re
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from lxml import etree as ET
+
+__all__ = (
+    "Matrix",
+    "IDENTITY",
+    "multiply",
+    "translate",
+    "scale",
+    "rotate",
+    "apply",
+    "invert",
+    "parse_transform",
+    "document_matrix",
+    "view_box_matrix",
+)
+
+# an affine transform (a, b, c, d, e, f), which maps (x, y) to (a * x + c * y + e, b * x + d * y + f) as in SVG.
+Matrix = Tuple[float, float, float, float, float, float]
+
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+_TRANSFORM_PATTERN = re.compile(
+    r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)"
+)
+_NUMBER_PATTERN = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def multiply(m: Matrix, n: Matrix) -> Matrix:
+    """Composes two transforms, the result applies `n` first and then `m`."""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + c * b2,
+        b * a2 + d * b2,
+        a * c2 + c * d2,
+        b * c2 + d * d2,
+        a * e2 + c * f2 + e,
+        b * e2 + d * f2 + f,
+    )
+
+
+def translate(x: float, y: float = 0.0) -> Matrix:
+    return (1.0, 0.0, 0.0, 1.0, x, y)
+
+
+def scale(x: float, y: float = None) -> Matrix:
+    return (x, 0.0, 0.0, x if y is None else y, 0.0, 0.0)
+
+
+def rotate(angle: float, cx: float = 0.0, cy: float = 0.0) -> Matrix:
+    """Rotation by `angle` degrees about the point (cx, cy)."""
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    m = (cos, sin, -sin, cos, 0.0, 0.0)
+    if cx or cy:
+        m = multiply(translate(cx, cy), multiply(m, translate(-cx, -cy)))
+    return m
+
+
+def apply(m: Matrix, points: Iterable[Tuple[float, float]]):
+    """Applies a transform to each of the given points."""
+    a, b, c, d, e, f = m
+    return [(a * x + c * y + e, b * x + d * y + f) for x, y in points]
+
+
+def invert(m: Matrix) -> Matrix:
+    """Inverts a transform, the transform must not be degenerate."""
+    a, b, c, d, e, f = m
+    det = a * d - b * c
+    if det == 0:
+        raise ValueError(f"Transform {m} is not invertible.")
+    return (
+        d / det,
+        -b / det,
+        -c / det,
+        a / det,
+        (c * f - d * e) / det,
+        (b * e - a * f) / det,
+    )
+
+
+@lru_cache(maxsize=4096)
+def parse_transform(value: str) -> Matrix:
+    """Parses the value of an SVG `transform` attribute.
+
+    Args:
+        value (str): the attribute value, e.g. `translate(10, 20) rotate(45)`, may be `None`.
+
+    Returns:
+        Matrix: the transform.
+    """
+    m = IDENTITY
+    if not value:
+        return m
+    for name, args in _TRANSFORM_PATTERN.findall(value):
+        args = [float(x) for x in _NUMBER_PATTERN.findall(args)]
+        if name == "matrix":
+            n = tuple(args)
+        elif name == "translate":
+            n = translate(*args)
+        elif name == "scale":
+            n = scale(*args)
+        elif name == "rotate":
+            n = rotate(*args)
+        elif name == "skewX":
+            n = (1.0, 0.0, math.tan(math.radians(args[0])), 1.0, 0.0, 0.0)
+        else:
+            n = (1.0, math.tan(math.radians(args[0])), 0.0, 1.0, 0.0, 0.0)
+        m = multiply(m, n)
+    return m
+
+
+def document_matrix(root: ET._Element, width: float, height: float) -> Matrix:
+    """Gets the transform from the user space of a document to the pixels of an output of the given size.
+
+    Args:
+        root (ET._Element): the root `<svg>` element of the document.
+        width (float): width of the output in pixels.
+        height (float): height of the output in pixels.
+
+    Returns:
+        Matrix: the transform.
+    """
+    view_box = root.get("viewBox")
+    if view_box:
+        x, y, w, h = (float(v) for v in _NUMBER_PATTERN.findall(view_box))
+        return view_box_matrix((x, y, w, h), width, height)
+    w = _length(root.get("width"), width)
+    h = _length(root.get("height"), height)
+    return scale(width / w, height / h)
+
+
+def view_box_matrix(
+    view_box: Tuple[float, float, float, float], width: float, height: float
+) -> Matrix:
+    """Gets the transform from a `viewBox` (x, y, width, height) to the pixels of an output of the given size, with the default `preserveAspectRatio` (xMidYMid meet)."""
+    x, y, w, h = view_box
+    s = min(width / w, height / h)
+    return (
+        s,
+        0.0,
+        0.0,
+        s,
+        (width - w * s) / 2 - x * s,
+        (height - h * s) / 2 - y * s,
+    )
+
+
+def _length(value: str, default: float) -> float:
+    match = _NUMBER_PATTERN.match(value or "")
+    if match is None or value.endswith("%"):
+        return default
+    return float(match.group()) or default
@@ -0,0 +1,76 @@
+""" Throughput benchmark for `ConcurrentSVGApplication`: SELECT queries from a thread pool while a writer applies UPDATEs.
+
+Run with: python test/benchmark/bench_concurrent_select.py
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from svgrenderengine.engine import SVGApplication, ConcurrentSVGApplication
+from svgrenderengine.event import QuerySVGEvent
+
+NUM_ELEMENTS = 1000
+DURATION = 2.0  # seconds per configuration
+
+
+def make_svg(n):
+    rects = "".join(
+        f'<rect id="rect-{i}" x="{i}" y="0" width="10" height="10"/>' for i in range(n)
+    )
+    return f'<svg id="root" width="2000" height="2000" xmlns="http://www.w3.org/2000/svg">{rects}</svg>'
+
+
+def run(num_readers, batch_size):
+    app = ConcurrentSVGApplication(SVGApplication(svg_code=make_svg(NUM_ELEMENTS)))
+    done = threading.Event()
+
+    def reader(offset):
+        count = 0
+        while not done.is_set():
+            query = QuerySVGEvent.create_event(
+                QuerySVGEvent.SELECT,
+                element_id=f"rect-{(count + offset) % NUM_ELEMENTS}",
+                attributes=["x", "width"],
+            )
+            app.query(query)
+            count += 1
+        return count
+
+    def writer():
+        count = 0
+        while not done.is_set():
+            app.update_many(
+                [
+                    QuerySVGEvent.create_event(
+                        QuerySVGEvent.UPDATE,
+                        element_id=f"rect-{(count + i) % NUM_ELEMENTS}",
+                        attributes={"width": count % 50},
+                    )
+                    for i in range(batch_size)
+                ]
+            )
+            count += batch_size
+        return count
+
+    with ThreadPoolExecutor(max_workers=num_readers + 1) as pool:
+        writes = pool.submit(writer)
+        reads = [pool.submit(reader, i) for i in range(num_readers)]
+        time.sleep(DURATION)
+        done.set()
+        total_reads = sum(r.result() for r in reads)
+        total_writes = writes.result()
+    return total_reads / DURATION, total_writes / DURATION, app.version / DURATION
+
+
+if __name__ == "__main__":
+    print(f"elements={NUM_ELEMENTS}, duration={DURATION}s")
+    print(
+        f"{'readers':>8} {'batch':>6} {'selects/s':>12} {'updates/s':>12} {'publish/s':>10}"
+    )
+    for num_readers in (1, 2, 4, 8):
+        for batch_size in (1, 64):
+            reads, writes, publishes = run(num_readers, batch_size)
+            print(
+                f"{num_readers:>8} {batch_size:>6} {reads:>12.0f} {writes:>12.0f} {publishes:>10.1f}"
+            )
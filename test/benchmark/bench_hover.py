@@ -0,0 +1,50 @@
+""" Benchmark of pointer motion with incremental hover tracking (see `HoverTracker`) and with a full hit-test per motion event.
+
+Run with: python test/benchmark/bench_hover.py
+"""
+
+import timeit
+
+from svgrenderengine.engine import HoverTracker, SVGApplication
+from svgrenderengine.engine.query import find_all_clickable_elements_at
+
+REPEAT = 1000
+
+
+def make_svg(n):
+    # a grid of clickable tiles, 10 user units apart
+    side = int(n**0.5)
+    elements = "".join(
+        f'<rect id="tile-{i}" x="{10 * (i % side)}" y="{10 * (i // side)}" width="8" height="8" svgre:clickable="true"/>'
+        for i in range(n)
+    )
+    return f'<svg id="root" width="{10 * side}" height="{10 * side}" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">{elements}</svg>'
+
+
+def path(steps):
+    # a pointer that moves diagonally a few user units at a time
+    return [(5 + (i * 3) % 300, 5 + (i * 2) % 300) for i in range(steps)]
+
+
+if __name__ == "__main__":
+    points = path(REPEAT)
+    print(f"repeat={REPEAT} (ms per motion event)")
+    print(f"{'elements':>10} {'full scan':>10} {'tracker':>10} {'speedup':>10}")
+    for n in (100, 1000, 10000):
+        app = SVGApplication(svg_code=make_svg(n))
+        root, geometry = app.element_tree_root, app.geometry
+        full = timeit.timeit(
+            lambda: [
+                find_all_clickable_elements_at(root, p, geometry=geometry)
+                for p in points
+            ],
+            number=1,
+        )
+        hover = HoverTracker(app)
+        hover.update((0, 0))  # builds the grid
+        tracked = timeit.timeit(lambda: [hover.update(p) for p in points], number=1)
+        print(
+            f"{n:>10}"
+            + "".join(f"{t / REPEAT * 1000:>11.3f}" for t in (full, tracked))
+            + f"{full / tracked:>10.1f}x"
+        )
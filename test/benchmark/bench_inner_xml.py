@@ -0,0 +1,62 @@
+""" Benchmark of `_inner_xml` updates with large generated fragments (see `replace_element_content`).
+
+Run with: python test/benchmark/bench_inner_xml.py
+"""
+
+import timeit
+
+from lxml import etree as ET
+
+from svgrenderengine.engine.svgapp import replace_element_content
+
+REPEAT = 50
+
+
+def replace_element_content_wrapped(original_element, new_content):
+    # the previous implementation, for reference.
+    for child in original_element.getchildren():
+        original_element.remove(child)
+    new_elements = ET.fromstring(f"<_dummy> {new_content} </_dummy>")
+    for new_child in new_elements.getchildren():
+        original_element.append(new_child)
+    if new_elements.text:
+        original_element.text = new_elements.text
+
+
+def make_fragment(n):
+    return "".join(
+        f'<rect x="{i % 100}" y="{i // 100}" width="1" height="1" fill="#{i % 255:02x}0000"/>'
+        for i in range(n)
+    )
+
+
+if __name__ == "__main__":
+    print(f"repeat={REPEAT} (ms per update)")
+    print(
+        f"{'elements':>10} {'wrapped':>10} {'str':>10} {'bytes':>10} {'elements':>10}"
+    )
+    for n in (100, 1000, 10000):
+        group = ET.Element("g")
+        fragment = make_fragment(n)
+        fragment_bytes = fragment.encode("utf-8")
+        prebuilt = lambda: list(ET.fromstring(f"<g>{fragment}</g>"))
+        times = [
+            timeit.timeit(
+                lambda: replace_element_content_wrapped(group, fragment), number=REPEAT
+            ),
+            timeit.timeit(
+                lambda: replace_element_content(group, fragment), number=REPEAT
+            ),
+            timeit.timeit(
+                lambda: replace_element_content(group, fragment_bytes), number=REPEAT
+            ),
+        ]
+        # pre-built elements, construction is excluded (e.g. generated with lxml directly).
+        elements = [prebuilt() for _ in range(REPEAT)]
+        it = iter(elements)
+        times.append(
+            timeit.timeit(
+                lambda: replace_element_content(group, next(it)), number=REPEAT
+            )
+        )
+        print(f"{n:>10}" + "".join(f"{t / REPEAT * 1000:>11.3f}" for t in times))
@@ -0,0 +1,64 @@
+""" Benchmark of the `TemplatedSVGApplication` variable stores (update, select and render paths).
+
+Run with: python test/benchmark/bench_variable_store.py
+"""
+
+import timeit
+
+from svgrenderengine.engine import (
+    TemplatedSVGApplication,
+    DictVariableStore,
+    OmegaConfVariableStore,
+)
+from svgrenderengine.event import QueryEvent
+
+NUM_ELEMENTS = 100
+REPEAT = 2000
+
+SVG_CODE = (
+    '<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg">'
+    + "".join(
+        f'<rect id="rect-{i}" x="{{{{rects.r{i}.pos.0}}}}" y="{{{{rects.r{i}.pos.1}}}}" fill="{{{{rects.r{i}.fill}}}}"/>'
+        for i in range(NUM_ELEMENTS)
+    )
+    + "</svg>"
+)
+VARIABLES = {
+    "rects": {f"r{i}": {"pos": [i, i], "fill": "red"} for i in range(NUM_ELEMENTS)}
+}
+UPDATE = QueryEvent.create_event(
+    QueryEvent.UPDATE,
+    attributes={f"rects.r{i}.pos.0": i + 1 for i in range(0, NUM_ELEMENTS, 10)},
+)
+SELECT = QueryEvent.create_event(
+    QueryEvent.SELECT,
+    attributes=[f"rects.r{i}.pos[1]" for i in range(0, NUM_ELEMENTS, 10)],
+)
+
+
+def bench(store_type):
+    app = TemplatedSVGApplication(SVG_CODE, VARIABLES, variable_store=store_type)
+    container = lambda: app._variables.to_container(copy=False)
+    return {
+        "update (10 keys)": timeit.timeit(lambda: app.query(UPDATE), number=REPEAT),
+        "select (10 keys)": timeit.timeit(lambda: app.query(SELECT), number=REPEAT),
+        "to_container": timeit.timeit(container, number=REPEAT),
+        "render": timeit.timeit(app.render, number=REPEAT // 10) * 10,
+    }
+
+
+if __name__ == "__main__":
+    results = {
+        store.__name__: bench(store)
+        for store in (OmegaConfVariableStore, DictVariableStore)
+    }
+    print(f"elements={NUM_ELEMENTS}, repeat={REPEAT} (ms per call)")
+    names = list(results)
+    print(f"{'':>18}" + "".join(f"{n:>24}" for n in names) + f"{'speedup':>10}")
+    for op in results[names[0]]:
+        times = [results[n][op] / REPEAT * 1000 for n in names]
+        print(
+            f"{op:>18}"
+            + "".join(f"{t:>24.4f}" for t in times)
+            + f"{times[0] / times[1]:>9.1f}x"
+        )
@@ -0,0 +1,55 @@
+""" Benchmark of representative XPath selectors with and without the query planner (see `QueryPlanner`).
+
+Run with: python test/benchmark/bench_xpath_planner.py
+"""
+
+import timeit
+
+from svgrenderengine.engine.app_xml import QueryXML, QueryXPath, XMLApplication
+
+REPEAT = 100
+INDEXES = ("id", "class", "{svg_render_engine}clickable")
+
+SELECTORS = [
+    # planned
+    ("id", lambda: QueryXPath.new(".//*[@id='rect-5000']", ["width"])),
+    ("id (absolute)", lambda: QueryXPath.new("//*[@id='rect-5000']", ["width"])),
+    ("QueryXML", lambda: QueryXML.new("rect-5000", ["width"])),
+    ("tag + class", lambda: QueryXPath.new("//svg:rect[@class='c7']", ["id"])),
+    ("any + class", lambda: QueryXPath.new("//*[@class='c7']", ["id"])),
+    ("class update", lambda: QueryXPath.new("//svg:rect[@class='c7']", {"y": 1})),
+    # not planned, evaluated by lxml in both cases
+    ("tag", lambda: QueryXPath.new("//svg:circle", ["id"])),
+    ("contains", lambda: QueryXPath.new("//*[contains(@class, 'c7')]", ["id"])),
+]
+
+
+def make_svg(n):
+    elements = "".join(
+        f'<g id="g-{i // 100}">' * (i % 100 == 0)
+        + f'<rect id="rect-{i}" class="c{i % 10} tile" width="1" height="1"/>'
+        + f'<circle id="circle-{i}" r="1"/>' * (i % 50 == 0)
+        + "</g>" * (i % 100 == 99)
+        for i in range(n)
+    )
+    return f'<svg id="root" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">{elements}</svg>'
+
+
+if __name__ == "__main__":
+    for n in (1000, 10000, 100000):
+        svg_code = make_svg(n)
+        planned = XMLApplication(svg_code, indexes=INDEXES)
+        unplanned = XMLApplication(svg_code, indexes=(), query_planner=False)
+        print(f"elements={n} repeat={REPEAT} (ms per query)")
+        print(f"{'selector':>15} {'lxml':>10} {'planner':>10} {'speedup':>10}")
+        for name, new_query in SELECTORS:
+            times = [
+                timeit.timeit(lambda: app.query(new_query()), number=REPEAT)
+                for app in (unplanned, planned)
+            ]
+            print(
+                f"{name:>15}"
+                + "".join(f"{t / REPEAT * 1000:>11.3f}" for t in times)
+                + f"{times[0] / times[1]:>10.1f}x"
+            )
+        print()
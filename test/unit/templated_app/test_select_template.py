@@ -109,6 +109,69 @@ class TestSelectTemplate(unittest.TestCase):
             },
         )
 
+    def test_iter_select_template(self):
+        svg_code = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="{{id}}" width="{{rect.size.0}}" height="10"/> <g id="group"> {{text}} <rect/> </g> </svg>"""
+        app = TemplatedSVGApplication(svg_code, {})
+        query = QueryEvent.create_event(
+            QueryEvent.SELECT_TEMPLATE,
+            attributes=["{{id}}.width", "{{id}}.height", "group", "group._xml"],
+        )
+        results = app.iter_select_template(query)
+        self.assertEqual(next(results), ("{{id}}", "width", "{{rect.size.0}}"))
+        self.assertEqual(next(results), ("{{id}}", "height", 10))
+        self.assertEqual(next(results), ("group", "id", "group"))
+        element_id, attribute, value = next(results)
+        self.assertEqual((element_id, attribute), ("group", "_inner_xml"))
+        self.assertTrue(value.startswith("{{text}} <rect"))
+        element_id, attribute, value = next(results)
+        self.assertEqual((element_id, attribute), ("group", "_xml"))
+        self.assertTrue(value.startswith("<g"))
+        with self.assertRaises(StopIteration):
+            next(results)
+
+        query = QueryEvent.create_event(
+            QueryEvent.SELECT_TEMPLATE, attributes=["missing.width"]
+        )
+        with self.assertRaises(KeyError):
+            list(app.iter_select_template(query))
+
+    def test_delimiter_translation(self):
+        app = TemplatedSVGApplication("<svg/>", {})
+        value = "no delimiters here"
+        self.assertIs(app._preprocess_xml(value), value)  # fast path, no copy
+        self.assertEqual(app._preprocess_xml(100), 100)
+        pre = app._preprocess_xml("{{a}}.{{b.c}}")
+        self.assertNotIn("{{", pre)
+        self.assertEqual(app._postprocess_xml(pre), "{{a}}.{{b.c}}")
+
+        # the replacement of `open` must not be replaced again when translating `close`.
+        app = TemplatedSVGApplication(
+            "<svg/>", {}, variable_open="[", variable_close="]]"
+        )
+        self.assertEqual(app._postprocess_xml(app._preprocess_xml("[x]]")), "[x]]")
+
+    def test_render(self):
+        svg_code = """<svg id="root" xmlns="http://www.w3.org/2000/svg"><rect id="r" width="{{w}}"/></svg>"""
+        app = TemplatedSVGApplication(svg_code, {"w": 7})
+        rendered = app.render()
+        self.assertIn('width="7"', rendered)
+        # `select_rendered` renders with the static method, which must translate the delimiters in the same way
+        self.assertEqual(
+            TemplatedSVGApplication._render(
+                app._environment, app._template_root, app._variables
+            ),
+            rendered,
+        )
+        svg_code = """<svg id="root" xmlns="http://www.w3.org/2000/svg"><rect id="r" width="[[w]]"/></svg>"""
+        app = TemplatedSVGApplication(
+            svg_code, {"w": 7}, variable_open="[[", variable_close="]]"
+        )
+        rendered = TemplatedSVGApplication._render(
+            app._environment, app._template_root, app._variables
+        )
+        self.assertIn('width="7"', rendered)
+        self.assertEqual(app.render(), rendered)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+
+from svgrenderengine.engine import SVGApplication, AsyncApplication
+from svgrenderengine.event import QuerySVGEvent
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="myrect" width="100" height="200" fill="#f5f5f5"/> </svg>"""
+
+
+class TestAsyncApplication(unittest.IsolatedAsyncioTestCase):
+    async def test_query(self):
+        async with AsyncApplication(SVGApplication(svg_code=SVG_CODE)) as app:
+            query = QuerySVGEvent.create_event(
+                QuerySVGEvent.SELECT, element_id="myrect", attributes=["width"]
+            )
+            response = await app.query(query)
+        self.assertTrue(response.success)
+        self.assertEqual(response.query_event_id, query.id)
+        self.assertDictEqual(response.data, {"width": 100})
+
+    async def test_many_producers_batched(self):
+        batches = []
+        app = AsyncApplication(
+            SVGApplication(svg_code=SVG_CODE),
+            on_tick=lambda batch: batches.append(len(batch)),
+        )
+
+        async def producer(i):
+            query = QuerySVGEvent.create_event(
+                QuerySVGEvent.UPDATE, element_id="myrect", attributes={"width": i}
+            )
+            return await app.query(query)
+
+        async with app:
+            responses = await asyncio.gather(*(producer(i) for i in range(50)))
+            # queries are applied in submission order, the last update wins.
+            query = QuerySVGEvent.create_event(
+                QuerySVGEvent.SELECT, element_id="myrect", attributes=["width"]
+            )
+            response = await app.query(query)
+        self.assertTrue(all(r.success for r in responses))
+        self.assertEqual(response.data["width"], 49)
+        self.assertEqual(sum(batches), 51)
+        self.assertLess(len(batches), 51)  # some queries must have shared a tick
+
+    async def test_max_batch_size(self):
+        batches = []
+        app = AsyncApplication(
+            SVGApplication(svg_code=SVG_CODE),
+            max_batch_size=4,
+            on_tick=lambda batch: batches.append(len(batch)),
+        )
+        async with app:
+            queries = [
+                QuerySVGEvent.create_event(
+                    QuerySVGEvent.SELECT, element_id="myrect", attributes=["width"]
+                )
+                for _ in range(10)
+            ]
+            await app.query_many(queries)
+        self.assertTrue(all(size <= 4 for size in batches))
+
+    async def test_exception_propagates(self):
+        async with AsyncApplication(SVGApplication(svg_code=SVG_CODE)) as app:
+            with self.assertRaises(AssertionError):
+                await app.query("not a query")  # SVGApplication asserts the query type
+
+    async def test_on_tick_raises(self):
+        def on_tick(batch):
+            raise ValueError("render failed")
+
+        app = AsyncApplication(
+            SVGApplication(svg_code=SVG_CODE), max_batch_size=1, on_tick=on_tick
+        )
+        await app.start()
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.SELECT, element_id="myrect", attributes=["width"]
+        )
+        futures = [app.submit(query) for _ in range(3)]
+        results = await asyncio.wait_for(
+            asyncio.gather(*futures, return_exceptions=True), timeout=1
+        )
+        # the first query was applied before `on_tick` raised, the others never will be
+        self.assertTrue(results[0].success)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results[1:]))
+        self.assertFalse(app.running)
+        with self.assertRaises(ValueError):
+            await app.stop()
+        await app.stop()  # the exception is only raised once
+
+    async def test_not_running(self):
+        app = AsyncApplication(SVGApplication(svg_code=SVG_CODE))
+        with self.assertRaises(RuntimeError):
+            app.submit(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
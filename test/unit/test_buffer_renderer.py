@@ -0,0 +1,77 @@
+import sys
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from svgrenderengine.render import BufferRenderer
+
+try:
+    import cairocffi  # pylint: disable=unused-import
+
+    HAS_CAIRO = True
+except (ImportError, OSError):
+    HAS_CAIRO = False
+
+SVG_CODE = """<svg width="4" height="2" xmlns="http://www.w3.org/2000/svg"><rect width="2" height="2" fill="#ff0000"/></svg>"""
+
+
+def _native(height, width):
+    # BGRA bytes, as cairo would draw them on a little-endian machine
+    native = np.zeros((height, width, 4), dtype=np.uint8)
+    native[..., 0], native[..., 1], native[..., 2], native[..., 3] = 1, 2, 3, 4
+    return native
+
+
+@unittest.skipUnless(sys.byteorder == "little", "little-endian only")
+class TestBufferRenderer(unittest.TestCase):
+    def test_as_array(self):
+        renderer = BufferRenderer(4, 2)
+        out = bytearray(renderer.nbytes)
+        frame = renderer._as_array(out)
+        self.assertEqual(frame.shape, (2, 4, 4))
+        frame[0, 0, 0] = 7
+        self.assertEqual(out[0], 7)  # no copy
+
+        shm = shared_memory.SharedMemory(create=True, size=renderer.nbytes)
+        try:
+            renderer._as_array(shm)[1, 3, 3] = 9
+            self.assertEqual(shm.buf[renderer.nbytes - 1], 9)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        with self.assertRaises(ValueError):
+            renderer._as_array(bytearray(renderer.nbytes - 1))
+        with self.assertRaises(ValueError):
+            renderer._as_array(bytes(renderer.nbytes))
+        with self.assertRaises(ValueError):
+            renderer._as_array(np.zeros((4, 4, 4), dtype=np.uint8)[:, :2])
+        with self.assertRaises(ValueError):
+            BufferRenderer(4, 2, pixel_format="ARGB")
+
+    def test_convert(self):
+        for pixel_format, expected in (
+            ("RGBA", [3, 2, 1, 4]),
+            ("BGRA", [1, 2, 3, 4]),
+            ("RGB", [3, 2, 1]),
+        ):
+            renderer = BufferRenderer(4, 2, pixel_format=pixel_format)
+            frame = renderer.empty()
+            native = frame if renderer._frame is None else renderer._frame
+            native[...] = _native(2, 4)
+            renderer._convert(native, frame)
+            self.assertEqual(frame[1, 2].tolist(), expected, pixel_format)
+
+    @unittest.skipUnless(HAS_CAIRO, "cairo is not available")
+    def test_render(self):
+        renderer = BufferRenderer(4, 2, pixel_format="RGB", background_color="white")
+        out = np.zeros((2, 4, 3), dtype=np.uint8)
+        frame = renderer.render(SVG_CODE, out)
+        self.assertTrue(np.shares_memory(frame, out))
+        self.assertEqual(out[0, 0].tolist(), [255, 0, 0])
+        self.assertEqual(out[0, 3].tolist(), [255, 255, 255])
+
+
+if __name__ == "__main__":
+    unittest.main()
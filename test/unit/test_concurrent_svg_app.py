@@ -0,0 +1,99 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from svgrenderengine.engine import SVGApplication, ConcurrentSVGApplication
+from svgrenderengine.event import QuerySVGEvent
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="myrect" width="0" height="0" fill="#f5f5f5"/> </svg>"""
+
+
+def _update(width, height):
+    return QuerySVGEvent.create_event(
+        QuerySVGEvent.UPDATE, element_id="myrect", attributes={"width": width}
+    ), QuerySVGEvent.create_event(
+        QuerySVGEvent.UPDATE, element_id="myrect", attributes={"height": height}
+    )
+
+
+def _select():
+    return QuerySVGEvent.create_event(
+        QuerySVGEvent.SELECT, element_id="myrect", attributes=["width", "height"]
+    )
+
+
+class TestConcurrentSVGApplication(unittest.TestCase):
+    def test_batch_publish(self):
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=SVG_CODE))
+        with app.batch():
+            app.update_many(list(_update(10, 10)))
+            # nothing is published until the outermost batch exits.
+            self.assertDictEqual(app.query(_select()).data, {"width": 0, "height": 0})
+        self.assertDictEqual(app.query(_select()).data, {"width": 10, "height": 10})
+
+    def test_auto_publish(self):
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=SVG_CODE))
+        version = app.version
+        app.query(_update(5, 5)[0])
+        self.assertEqual(app.version, version + 1)
+        self.assertEqual(app.query(_select()).data["width"], 5)
+
+        app = ConcurrentSVGApplication(
+            SVGApplication(svg_code=SVG_CODE), auto_publish=False
+        )
+        app.query(_update(5, 5)[0])
+        self.assertEqual(app.query(_select()).data["width"], 0)
+        app.publish()
+        self.assertEqual(app.query(_select()).data["width"], 5)
+
+    def test_publish_on_read(self):
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=SVG_CODE))
+        snapshot = app._snapshot
+        for update in _update(5, 6):
+            app.query(update)
+        self.assertIs(app._snapshot, snapshot)  # updates do not copy the tree
+        self.assertDictEqual(app.query(_select()).data, {"width": 5, "height": 6})
+        self.assertEqual(app.version, 1)  # published once, by the read
+
+        # a read does not wait for a batch in progress on another thread
+        app.query(_update(7, 7)[0])
+        with app.batch():
+            result = []
+            thread = threading.Thread(
+                target=lambda: result.append(app.query(_select()))
+            )
+            thread.start()
+            thread.join(timeout=5)
+            self.assertEqual(result[0].data["width"], 5)
+            self.assertEqual(app.query(_select()).data["width"], 5)  # nor in the batch
+        self.assertEqual(app.query(_select()).data["width"], 7)
+
+    def test_stress_consistent_reads(self):
+        # the writer always updates width and height together, readers must never see them differ.
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=SVG_CODE))
+        done = threading.Event()
+        inconsistent = []
+
+        def reader():
+            count = 0
+            while not done.is_set():
+                data = app.query(_select()).data
+                if data["width"] != data["height"]:
+                    inconsistent.append(data)
+                count += 1
+            return count
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            readers = [pool.submit(reader) for _ in range(8)]
+            for i in range(200):
+                app.update_many(list(_update(i, i)))
+            done.set()
+            reads = sum(r.result() for r in readers)
+
+        self.assertListEqual(inconsistent, [])
+        self.assertGreater(reads, 0)
+        self.assertDictEqual(app.query(_select()).data, {"width": 199, "height": 199})
+
+
+if __name__ == "__main__":
+    unittest.main()
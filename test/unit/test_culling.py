@@ -0,0 +1,130 @@
+import unittest
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.render import LayerCache
+from svgrenderengine.render.culling import Viewport, cull
+
+from utils import element_ids, update_event
+
+SVG_CODE = """<svg id="root" width="1000" height="1000" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <defs><rect id="tile" width="10" height="10"/></defs>
+    <g id="world">
+        <rect id="near" x="10" y="10" width="10" height="10"/>
+        <rect id="far" x="900" y="900" width="10" height="10"/>
+        <g id="far-group" transform="translate(500, 500)"><circle id="c" r="5"/></g>
+        <g id="edge"><rect id="edge-in" x="95" y="0" width="10" height="10"/><rect id="edge-out" x="300" y="0" width="10" height="10"/></g>
+        <use id="far-use" xlink:href="#tile" x="800" y="0"/>
+        <use id="near-use" xlink:href="#far" x="-880" y="-880"/>
+    </g>
+    <g id="hud"><text id="label" x="900" y="900">far away</text></g>
+</svg>"""
+
+
+class TestViewport(unittest.TestCase):
+    def test_zoom(self):
+        viewport = Viewport(0, 0, 100, 50)
+        viewport.zoom(2, center=(100, 50))
+        self.assertEqual(viewport.view_box, (50, 25, 50, 25))
+        viewport.zoom(0.5)
+        self.assertEqual(viewport.view_box, (25, 12.5, 100, 50))
+        viewport.pan(-25, -12.5)
+        self.assertEqual(viewport.bounds, (0, 0, 100, 50))
+        with self.assertRaises(ValueError):
+            Viewport(0, 0, 0, 10)
+
+    def test_visible_bounds(self):
+        viewport = Viewport(0, 0, 100, 100)
+        self.assertEqual(viewport.matrix(200, 100), (1, 0, 0, 1, 50, 0))
+        self.assertEqual(viewport.visible_bounds(200, 100), (-50, 0, 150, 100))
+
+
+class TestCull(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.geometry = self.app.geometry
+        self.geometry.bounds(self.app.element_tree_root)
+
+    def test_cull(self):
+        world = SVGApplication.find_element(self.app.element_tree_root, "world")
+        culled = []
+        code = cull(world, (0, 0, 100, 100), self.geometry, culled)
+        self.assertEqual(
+            element_ids(b"<svg xmlns='http://www.w3.org/2000/svg'>" + code + b"</svg>"),
+            ["world", "near", "far", "edge", "edge-in", "near-use"],
+        )
+        # `far` is kept, it is referenced by `near-use`
+        self.assertEqual(
+            [e.get("id") for e in culled], ["far-group", "edge-out", "far-use"]
+        )
+        hud = SVGApplication.find_element(self.app.element_tree_root, "hud")
+        self.assertEqual(cull(hud, (0, 0, 100, 100), self.geometry), b"")
+
+    def test_painted(self):
+        app = SVGApplication(
+            svg_code="""<svg xmlns="http://www.w3.org/2000/svg"><g id="g">
+    <rect id="stroked" x="101" width="10" height="10" stroke="black" stroke-width="10"/>
+    <rect id="thin" x="102" y="20" width="10" height="10" stroke="black"/>
+    <line id="marked" x1="500" x2="510" marker-end="url(#arrow)"/>
+    <rect id="filtered" x="500" width="10" height="10" style="filter: url(#blur)"/>
+</g></svg>"""
+        )
+        group = SVGApplication.find_element(app.element_tree_root, "g")
+        # the stroke of `stroked` reaches into the view, elements with markers or filters may paint anywhere
+        code = cull(group, (0, 0, 100.8, 100), app.geometry)
+        self.assertEqual(element_ids(code), ["g", "stroked", "marked", "filtered"])
+
+    def test_switch(self):
+        app = SVGApplication(
+            svg_code="""<svg xmlns="http://www.w3.org/2000/svg"><switch id="switch"><rect id="far" x="500" width="10" height="10"/><circle id="near" cx="50" cy="50" r="5"/></switch></svg>"""
+        )
+        switch = SVGApplication.find_element(app.element_tree_root, "switch")
+        # the switch renders its first child, which must not be replaced by the next one
+        code = cull(switch, (0, 0, 100, 100), app.geometry)
+        self.assertEqual(element_ids(code), ["switch", "far", "near"])
+        self.assertEqual(cull(switch, (1000, 1000, 1100, 1100), app.geometry), b"")
+
+
+class TestLayerCacheViewport(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.rasterised = []
+
+        def rasterise(svg_code):
+            self.rasterised.append(svg_code)
+            return tuple(element_ids(svg_code))
+
+        self.cache = LayerCache(self.app, rasterise, size=(100, 100))
+
+    def test_viewport(self):
+        self.assertEqual(len(self.cache.render()), 2)
+        self.cache.viewport = Viewport(0, 0, 100, 100)
+        self.rasterised.clear()
+        layers = self.cache.render()
+        # the hud is outside of the viewport
+        self.assertEqual(len(layers), 1)
+        self.assertEqual(len(self.rasterised), 1)
+        self.assertIn(b'viewBox="0 0 100 100"', self.rasterised[0])
+        self.assertNotIn("far-group", layers[0])
+        self.assertIn("tile", layers[0])  # definitions are kept
+
+        self.rasterised.clear()
+        self.cache.render()
+        self.assertEqual(len(self.rasterised), 0)
+
+        # changing the viewport invalidates all layers
+        self.cache.viewport.pan(850, 850)
+        layers = self.cache.render()
+        self.assertEqual(len(self.rasterised), 2)
+        self.assertIn("label", layers[1])
+        self.assertNotIn("near", layers[0])
+
+    def test_update(self):
+        self.cache.viewport = Viewport(0, 0, 100, 100)
+        self.cache.render()
+        self.app.query(update_event("far-group", {"transform": "translate(50, 50)"}))
+        layers = self.cache.render()
+        self.assertIn("far-group", layers[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication, TemplatedSVGApplication
+from svgrenderengine.event import QueryEvent, QuerySVGEvent
+from svgrenderengine.render.export import FrameExporter, ImageSequenceSink
+
+SVG_CODE = """<svg id="root" width="20" height="10px" xmlns="http://www.w3.org/2000/svg"><rect id="myrect" width="0" height="10"/></svg>"""
+
+
+class _ListSink:
+    frame_format = "raw"
+
+    def __init__(self):
+        self.frames = []
+        self.size = None
+        self.closed = False
+
+    def open(self, width, height):
+        self.size = (width, height)
+
+    def write(self, frame):
+        self.frames.append(frame)
+
+    def close(self):
+        self.closed = True
+
+
+def _width(svg_code):
+    return ET.fromstring(svg_code)[0].get("width")
+
+
+def _update(width):
+    return QuerySVGEvent.create_event(
+        QuerySVGEvent.UPDATE, element_id="myrect", attributes={"width": width}
+    )
+
+
+class TestFrameExporter(unittest.TestCase):
+    def test_export(self):
+        sink = _ListSink()
+        in_flight, max_in_flight, lock = [0], [0], threading.Lock()
+
+        def rasterise(svg_code):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            with lock:
+                in_flight[0] -= 1
+            return _width(svg_code)
+
+        with ThreadPoolExecutor(4) as executor:
+            exporter = FrameExporter(
+                SVGApplication(svg_code=SVG_CODE),
+                sink,
+                max_pending=2,
+                executor=executor,
+                rasterise=rasterise,
+            )
+            frames = [_update(i) for i in range(10)] + [[], [_update(1), _update(2)]]
+            self.assertEqual(exporter.export(frames), 12)
+        self.assertEqual(sink.size, (20, 10))
+        self.assertEqual(sink.frames, [str(i) for i in range(10)] + ["9", "2"])
+        self.assertLessEqual(max_in_flight[0], 2)
+        self.assertTrue(sink.closed)
+
+    def test_export_templated(self):
+        sink = _ListSink()
+        app = TemplatedSVGApplication(
+            SVG_CODE.replace('width="0"', 'width="{{x}}"'), dict(x=0)
+        )
+        with ThreadPoolExecutor(2) as executor:
+            exporter = FrameExporter(
+                app, sink, width=4, height=2, executor=executor, rasterise=_width
+            )
+            frames = [
+                QueryEvent.create_event(QueryEvent.UPDATE, attributes=dict(x=x))
+                for x in range(3)
+            ]
+            exporter.export(frames)
+        self.assertEqual(sink.size, (4, 2))
+        self.assertEqual(sink.frames, ["0", "1", "2"])
+
+    def test_error(self):
+        sink = _ListSink()
+
+        def rasterise(svg_code):
+            raise RuntimeError("failed")
+
+        with ThreadPoolExecutor(2) as executor:
+            exporter = FrameExporter(
+                SVGApplication(svg_code=SVG_CODE),
+                sink,
+                executor=executor,
+                rasterise=rasterise,
+            )
+            with self.assertRaises(RuntimeError):
+                exporter.export([_update(i) for i in range(10)])
+        self.assertTrue(sink.closed)
+
+    def test_image_sequence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = ImageSequenceSink(os.path.join(directory, "frames"))
+            sink.open(20, 10)
+            sink.write(b"a")
+            sink.write(b"b")
+            sink.close()
+            self.assertEqual(
+                sorted(os.listdir(sink.directory)),
+                ["frame_000000.png", "frame_000001.png"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
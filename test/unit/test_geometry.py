@@ -0,0 +1,217 @@
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.engine.query import find_all_clickable_elements_at, in_bounds
+from svgrenderengine.render.geometry import UNBOUNDED, parse_path
+
+from utils import update_event
+
+SVG_CODE = """<svg id="root" width="400" height="400" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:svgre="svg_render_engine">
+    <defs><rect id="hidden-def" width="1000" height="1000"/></defs>
+    <symbol id="icon" viewBox="0 0 10 10"><rect width="10" height="10"/></symbol>
+    <rect id="rect" x="10" y="20" width="30" height="40" svgre:clickable="true"/>
+    <g id="group" transform="translate(100, 100)">
+        <circle id="circle" cx="10" cy="10" r="5" svgre:clickable="true"/>
+        <g id="inner" transform="scale(2)">
+            <ellipse id="ellipse" cx="10" cy="0" rx="5" ry="2"/>
+        </g>
+    </g>
+    <polygon id="polygon" points="0,300 100,300 50,350" svgre:clickable="true"/>
+    <path id="path" d="M 200 200 h 50 v 50 h -50 z" svgre:clickable="true"/>
+    <line id="line" x1="0" y1="0" x2="10" y2="0" stroke-width="2"/>
+    <use id="use" xlink:href="#icon" x="300" y="300" width="20" height="20"/>
+    <text id="text" x="10" y="100" font-size="10">abc</text>
+    <rect id="invisible" width="10" height="10" display="none"/>
+</svg>"""
+
+
+class TestGeometry(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.geometry = self.app.geometry
+
+    def element(self, element_id):
+        return SVGApplication.find_element(self.app.element_tree_root, element_id)
+
+    def assertBounds(self, element_id, expected):
+        bounds = self.geometry.bounds(self.element(element_id))
+        for actual, value in zip(bounds, expected):
+            self.assertAlmostEqual(actual, value, places=6)
+
+    def test_shapes(self):
+        self.assertBounds("rect", (10, 20, 40, 60))
+        self.assertBounds("circle", (105, 105, 115, 115))
+        self.assertBounds("ellipse", (110, 96, 130, 104))
+        self.assertBounds("polygon", (0, 300, 100, 350))
+        self.assertBounds("path", (200, 200, 250, 250))
+        self.assertBounds("line", (0, 0, 10, 0))
+        self.assertBounds("use", (300, 300, 320, 320))
+        self.assertBounds("text", (10, 92, 28, 102))
+        self.assertBounds("group", (105, 96, 130, 115))
+        self.assertIsNone(self.geometry.bounds(self.element("invisible")))
+        self.assertIsNone(self.geometry.bounds(self.element("hidden-def")))
+        self.assertBounds("root", (0, 0, 320, 350))
+
+    def test_painted_bounds(self):
+        app = SVGApplication(
+            svg_code="""<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <defs><path id="shape" d="M 0 0 h 10"/></defs>
+    <rect id="plain" width="10" height="10"/>
+    <g id="group" stroke="black" transform="scale(2, 1)">
+        <rect id="stroked" width="10" height="10" style="stroke-width: 4"/>
+        <path id="path" d="M 0 0 h 10" stroke-width="2" stroke-linejoin="round"/>
+        <path id="mitered" d="M 0 0 h 10" stroke-width="2"/>
+    </g>
+    <use id="use" xlink:href="#shape" y="100" stroke="black" stroke-width="2" stroke-linejoin="bevel"/>
+    <line id="marked" x2="10" marker-end="url(#arrow)"/>
+    <rect id="filtered" width="10" height="10" filter="url(#blur)"/>
+</svg>"""
+        )
+        painted = lambda element_id: app.geometry.painted_bounds(
+            SVGApplication.find_element(app.element_tree_root, element_id)
+        )
+        self.assertEqual(painted("plain"), (0, 0, 10, 10))
+        self.assertEqual(painted("stroked"), (-4, -2, 24, 12))
+        self.assertEqual(painted("path"), (-2, -1, 22, 1))
+        self.assertEqual(painted("mitered"), (-8, -4, 28, 4))  # miter limit 4
+        self.assertEqual(painted("group"), (-8, -4, 28, 12))
+        self.assertEqual(painted("use"), (-1, 99, 11, 101))  # inherited from the use
+        self.assertEqual(painted("marked"), UNBOUNDED)
+        self.assertEqual(painted("filtered"), UNBOUNDED)
+        self.assertEqual(app.geometry.bounds(app.element_tree_root), (0, 0, 20, 100))
+
+        # inherited properties invalidate the painted bounds of descendants
+        app.query(update_event("group", {"stroke": "none"}))
+        self.assertEqual(painted("stroked"), (0, 0, 20, 10))
+        app.query(update_event("shape", {"stroke-width": "4"}))
+        self.assertEqual(painted("use"), (-2, 98, 12, 102))
+
+    def test_rotated(self):
+        self.app.query(update_event("rect", {"transform": "rotate(90)"}))
+        self.assertBounds("rect", (-60, 10, -20, 40))
+
+    def test_contains(self):
+        contains = lambda element_id, point: self.geometry.contains(
+            self.element(element_id), point
+        )
+        self.assertTrue(contains("rect", (10, 20)))
+        self.assertFalse(contains("rect", (41, 20)))
+        self.assertTrue(contains("circle", (110, 110)))
+        self.assertFalse(contains("circle", (105.5, 105.5)))  # inside the bounds only
+        self.assertTrue(contains("polygon", (50, 310)))
+        self.assertFalse(contains("polygon", (5, 340)))
+        self.assertTrue(contains("path", (225, 225)))
+        self.assertTrue(contains("line", (5, 0.9)))
+        self.assertFalse(contains("line", (5, 1.1)))
+        self.assertTrue(contains("group", (120, 100)))
+        self.assertTrue(contains("use", (310, 310)))
+
+    def test_invalidation(self):
+        self.assertBounds("root", (0, 0, 320, 350))
+        self.assertBounds("circle", (105, 105, 115, 115))
+        self.app.query(update_event("group", {"transform": "translate(0, 0)"}))
+        self.assertBounds("circle", (5, 5, 15, 15))
+        self.assertBounds("ellipse", (10, -4, 30, 4))
+        self.assertBounds("root", (0, -4, 320, 350))
+        self.app.query(update_event("rect", {"width": 500}))
+        self.assertBounds("rect", (10, 20, 510, 60))
+        self.assertBounds("root", (0, -4, 510, 350))
+
+    def test_invalidation_use(self):
+        self.assertBounds("use", (300, 300, 320, 320))
+        symbol = self.element("icon")
+        self.app.query(update_event("icon", {"viewBox": "0 0 20 20"}))
+        self.assertIs(self.element("icon"), symbol)
+        self.assertBounds("use", (300, 300, 310, 310))
+
+    def test_invalidation_inner_xml(self):
+        self.assertBounds("group", (105, 96, 130, 115))
+        self.app.query(
+            update_event("group", {"_inner_xml": '<rect width="1" height="2"/>'})
+        )
+        self.assertBounds("group", (100, 100, 101, 102))
+
+    def test_restore(self):
+        snapshot = self.app.snapshot()
+        self.assertBounds("rect", (10, 20, 40, 60))
+        self.app.query(update_event("rect", {"x": 0}))
+        self.assertBounds("rect", (0, 20, 30, 60))
+        self.app.restore(snapshot)
+        self.assertBounds("rect", (10, 20, 40, 60))
+
+    def test_dirty_regions(self):
+        self.geometry.bounds(self.app.element_tree_root)
+        self.assertEqual(self.geometry.dirty_regions(), [])
+        self.app.query(update_event("rect", {"x": 0}))
+        self.assertEqual(
+            self.geometry.dirty_regions(), [(10, 20, 40, 60), (0, 20, 30, 60)]
+        )
+        self.app.query(update_event("rect", {"_inner_xml": ""}))
+        self.assertEqual(self.geometry.dirty_regions(), [(0, 20, 30, 60)] * 2)
+        self.app.query(update_event("line", {"x2": 5}))  # measured as part of the root
+        self.assertEqual(len(self.geometry.dirty_regions()), 2)
+        self.geometry.clear()
+        self.app.query(update_event("rect", {"x": 5}))
+        self.assertIsNone(self.geometry.dirty_regions())
+
+
+class TestHitTesting(unittest.TestCase):
+    def test_clickable_at(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        root = app.element_tree_root
+        for point, expected in [
+            ((20, 30), ["rect"]),
+            ((110, 110), ["circle"]),
+            ((50, 310), ["polygon"]),
+            ((225, 225), ["path"]),
+            ((0, 0), []),
+        ]:
+            with self.subTest(point=point):
+                elements = find_all_clickable_elements_at(
+                    root, point, geometry=app.geometry
+                )
+                self.assertEqual([e.get("id") for e in elements], expected)
+                # without a shared cache
+                elements = find_all_clickable_elements_at(root, point)
+                self.assertEqual([e.get("id") for e in elements], expected)
+
+    def test_in_bounds_transform(self):
+        root = ET.fromstring(SVG_CODE)
+        circle = SVGApplication.find_element(root, "circle")
+        self.assertTrue(in_bounds(circle, (110, 110)))
+        self.assertFalse(in_bounds(circle, (10, 10)))
+
+
+class TestParsePath(unittest.TestCase):
+    def test_commands(self):
+        (points,) = parse_path("M0,0 L10,0 H20 V10 l-10,0 z")
+        self.assertEqual(points, ((0, 0), (10, 0), (20, 0), (20, 10), (10, 10), (0, 0)))
+        subpaths = parse_path("M0 0 10 0 10 10 M 20 20 l 5 5")
+        self.assertEqual(subpaths[0], ((0, 0), (10, 0), (10, 10)))
+        self.assertEqual(subpaths[1], ((20, 20), (25, 25)))
+
+    def test_curves(self):
+        (points,) = parse_path("M0 0 C 0 10 10 10 10 0 S 20 -10 20 0", segments=4)
+        self.assertEqual(len(points), 9)
+        self.assertEqual(points[4], (10, 0))
+        self.assertAlmostEqual(points[2][1], 7.5)
+        self.assertAlmostEqual(points[6][1], -7.5)
+        (points,) = parse_path("M0 0 Q 5 10 10 0 T 20 0", segments=2)
+        self.assertEqual(points, ((0, 0), (5, 5), (10, 0), (15, -5), (20, 0)))
+
+    def test_arc(self):
+        (points,) = parse_path("M 0 0 A 10 10 0 0 1 20 0", segments=4)
+        self.assertEqual(points[-1], (20, 0))
+        ys = [p[1] for p in points]
+        self.assertAlmostEqual(min(ys), -10)  # clockwise in SVG (y down) goes up
+
+    def test_malformed(self):
+        self.assertEqual(parse_path("M 0 0 L 10"), ())
+        self.assertEqual(parse_path("L 10 10"), ())  # must start with a move-to
+        self.assertEqual(parse_path(""), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from svgrenderengine.engine import HoverTracker, SVGApplication
+from svgrenderengine.engine.query import find_all_clickable_elements_at
+from svgrenderengine.event import MouseEnterEvent, MouseLeaveEvent
+
+from utils import update_event
+
+SVG_CODE = """<svg id="root" width="1000" height="1000" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:svgre="svg_render_engine">
+    <defs><rect id="tile" width="20" height="20"/></defs>
+    <g id="panel" svgre:clickable="true">
+        <rect id="button" x="10" y="10" width="30" height="30" svgre:clickable="true"/>
+        <rect id="backdrop" x="0" y="0" width="100" height="100"/>
+    </g>
+    <circle id="far" cx="900" cy="900" r="20" svgre:clickable="true"/>
+    <use id="stamp" xlink:href="#tile" x="500" y="500" svgre:clickable="true"/>
+    <rect id="background" width="1000" height="1000" svgre:clickable="true" display="none"/>
+</svg>"""
+
+
+def _summary(events):
+    return [(type(e).__name__[5:-5], e.element_id) for e in events]
+
+
+class TestHoverTracker(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.hover = HoverTracker(self.app)
+
+    def test_enter_leave(self):
+        events = self.hover.update((20, 20), position=(2, 2))
+        self.assertEqual(_summary(events), [("Enter", "panel"), ("Enter", "button")])
+        self.assertIsInstance(events[0], MouseEnterEvent)
+        self.assertEqual(events[0].position, (2, 2))
+        self.assertEqual(self.hover.update((21, 21)), [])
+        self.assertEqual(_summary(self.hover.update((60, 60))), [("Leave", "button")])
+        events = self.hover.update((905, 905))
+        self.assertEqual(_summary(events), [("Leave", "panel"), ("Enter", "far")])
+        self.assertIsInstance(events[0], MouseLeaveEvent)
+        self.assertEqual(_summary(self.hover.update(None)), [("Leave", "far")])
+        self.assertEqual(self.hover.hovered, [])
+
+    def test_matches_full_scan(self):
+        root = self.app.element_tree_root
+        for point in [(5, 5), (20, 20), (510, 510), (900, 880), (999, 999), (-5, 0)]:
+            with self.subTest(point=point):
+                self.hover.update(point)
+                self.assertEqual(
+                    self.hover.hovered, find_all_clickable_elements_at(root, point)
+                )
+
+    def test_document_changes(self):
+        self.hover.update((20, 20))
+        self.app.query(update_event("button", {"x": 200}))
+        self.assertEqual(_summary(self.hover.refresh()), [("Leave", "button")])
+        self.app.query(update_event("far", {"cx": 20, "cy": 20}))
+        self.assertEqual(_summary(self.hover.refresh()), [("Enter", "far")])
+        self.app.query(update_event("far", {"{svg_render_engine}clickable": "false"}))
+        self.assertEqual(_summary(self.hover.refresh()), [("Leave", "far")])
+        self.assertEqual(self.hover.refresh(), [])
+        # hidden elements are not hovered until they are shown
+        self.app.query(update_event("background", {"display": "inline"}))
+        self.assertEqual(_summary(self.hover.refresh()), [("Enter", "background")])
+
+    def test_referenced_and_replaced(self):
+        self.hover.update((505, 505))
+        self.assertEqual([e.get("id") for e in self.hover.hovered], ["stamp"])
+        self.app.query(update_event("tile", {"width": 2}))
+        self.assertEqual(_summary(self.hover.refresh()), [("Leave", "stamp")])
+        self.hover.update((20, 20))
+        self.app.query(update_event("panel", {"_inner_xml": ""}))
+        self.assertEqual(
+            _summary(self.hover.refresh()), [("Leave", "button"), ("Leave", "panel")]
+        )
+
+    def test_close(self):
+        self.hover.update((20, 20))
+        self.hover.close()
+        self.assertEqual(self.hover.hovered, [])
+        self.app.query(update_event("button", {"x": 200}))  # no longer tracked
+        self.assertEqual(self.hover.refresh(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.engine.app_xml import QueryXML, QueryXPath, XMLApplication
+from svgrenderengine.engine.index import AttributeIndex, find_elements
+from svgrenderengine.engine.query import find_all_clickable_elements
+
+from utils import element_ids, update_event
+
+SVGRE_CLICKABLE = "{svg_render_engine}clickable"
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">
+    <rect id="a" class="tile red" svgre:clickable="true"/>
+    <rect id="b" class="tile"/>
+    <g id="group" class="layer">
+        <circle id="c" class="red" svgre:clickable="true"/>
+    </g>
+    <g id="lazy" svgre:lazy="true" display="none"><rect id="d" class="tile"/></g>
+</svg>"""
+
+
+class TestAttributeIndex(unittest.TestCase):
+    def test_tokens(self):
+        app = SVGApplication(svg_code=SVG_CODE, lazy_layers=False)
+        index = AttributeIndex("class")
+        index.build(app.element_tree_root)
+        self.assertCountEqual(element_ids(index.get("tile")), ["a", "b", "d"])
+        self.assertCountEqual(element_ids(index.get("red")), ["a", "c"])
+        self.assertEqual(index.count("layer"), 1)
+        self.assertEqual(index.get("missing"), [])
+
+    def test_find_elements_matches_index(self):
+        app = SVGApplication(svg_code=SVG_CODE, lazy_layers=False)
+        for attribute, value in [("class", "tile"), ("svgre:clickable", "true")]:
+            index = AttributeIndex(attribute)
+            index.build(app.element_tree_root)
+            self.assertEqual(
+                index.get(value),
+                find_elements(app.element_tree_root, attribute, value),
+            )
+
+
+class TestSVGApplicationIndexes(unittest.TestCase):
+    def test_find_elements(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["class", "svgre:clickable"])
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "red")), ["a", "c"]
+        )
+        self.assertCountEqual(
+            element_ids(app.find_elements("svgre:clickable", "true")), ["a", "c"]
+        )
+        # not indexed, the tree is scanned.
+        self.assertCountEqual(element_ids(app.find_elements("id", "b")), ["b"])
+
+    def test_clickable(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["svgre:clickable"])
+        # `b` is indexed last, but comes before `c` in the document
+        app.query(update_event("b", {SVGRE_CLICKABLE: "true"}))
+        self.assertEqual(
+            element_ids(
+                find_all_clickable_elements(app.element_tree_root, app.indexes)
+            ),
+            element_ids(find_all_clickable_elements(app.element_tree_root)),
+        )
+
+    def test_update(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["class", "svgre:clickable"])
+        app.query(update_event("b", {"class": "red", SVGRE_CLICKABLE: "true"}))
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "red")), ["a", "b", "c"]
+        )
+        self.assertCountEqual(element_ids(app.find_elements("class", "tile")), ["a"])
+        self.assertCountEqual(
+            element_ids(app.find_elements("svgre:clickable", "true")), ["a", "b", "c"]
+        )
+
+    def test_update_inner_xml(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["class"])
+        app.query(
+            update_event("group", {"_inner_xml": '<rect id="e" class="red tile"/>'})
+        )
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "red")), ["a", "e"]
+        )
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "tile")), ["a", "b", "e"]
+        )
+
+    def test_restore(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["class"])
+        snapshot = app.snapshot()
+        app.query(update_event("b", {"class": "red"}))
+        app.query(update_event("group", {"_inner_xml": ""}))
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "red")), ["a", "b"]
+        )
+        app.restore(snapshot)
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "red")), ["a", "c"]
+        )
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "tile")), ["a", "b"]
+        )
+
+    def test_lazy_layer(self):
+        app = SVGApplication(svg_code=SVG_CODE, indexes=["class"])
+        # the content of a dehydrated layer is not indexed until it is materialised.
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "tile")), ["a", "b"]
+        )
+        app.materialise("lazy")
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "tile")), ["a", "b", "d"]
+        )
+
+
+class TestXMLApplicationIndexes(unittest.TestCase):
+    def test_update(self):
+        app = XMLApplication(SVG_CODE, indexes=["class"])
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "tile")), ["a", "b", "d"]
+        )
+        app.query(QueryXPath.new("//svg:rect[@class='tile']", {"class": "blue"}))
+        self.assertCountEqual(element_ids(app.find_elements("class", "tile")), ["a"])
+        self.assertCountEqual(
+            element_ids(app.find_elements("class", "blue")), ["b", "d"]
+        )
+        app.query(QueryXPath.new("//svg:rect[@class='blue']", {"class": None}))
+        self.assertEqual(app.find_elements("class", "blue"), [])
+        app.query(QueryXML.new("c", {"class": "green"}))
+        self.assertCountEqual(element_ids(app.find_elements("class", "green")), ["c"])
+        self.assertCountEqual(element_ids(app.find_elements("class", "red")), ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
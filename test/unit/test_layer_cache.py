@@ -0,0 +1,94 @@
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.render import LayerCache
+
+from utils import update_event
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">
+    <defs><linearGradient id="gradient"/></defs>
+    <g id="background"><rect id="a" fill="url(#gradient)"/></g>
+    <rect id="b"/>
+    <!-- comment -->
+    <circle id="c"/>
+    <g id="labels"><text id="d">label</text></g>
+    <rect id="e" svgre:static="true"/>
+</svg>"""
+
+
+class TestLayerCache(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.rasterised = []
+
+        def rasterise(svg_code):
+            self.rasterised.append(svg_code)
+            root = ET.fromstring(svg_code)
+            return tuple(e.get("id") for e in root.iter() if e.get("id"))
+
+        self.cache = LayerCache(self.app, rasterise)
+
+    def test_layers(self):
+        layers = self.cache.render()
+        self.assertEqual(
+            layers,
+            [
+                ("root", "gradient", "background", "a"),
+                ("root", "gradient", "b", "c"),
+                ("root", "gradient", "labels", "d"),
+                ("root", "gradient", "e"),
+            ],
+        )
+        self.assertEqual(len(self.rasterised), 4)
+        self.assertEqual(self.cache.render(), layers)
+        self.assertEqual(len(self.rasterised), 4)
+
+    def test_invalidate(self):
+        self.cache.render()
+        self.rasterised.clear()
+        self.app.query(update_event("d", {"fill": "red"}))
+        self.app.query(update_event("c", {"fill": "red"}))
+        self.cache.render()
+        self.assertEqual(len(self.rasterised), 2)
+        self.assertIn(b'fill="red">label', self.rasterised[1])
+
+        # shared definitions and the root invalidate all layers
+        for element_id in ("gradient", "root"):
+            self.rasterised.clear()
+            self.app.query(update_event(element_id, {"x": 1}))
+            self.cache.render()
+            self.assertEqual(len(self.rasterised), 4)
+
+    def test_structure_change(self):
+        self.cache.render()
+        self.rasterised.clear()
+        self.app.query(
+            update_event("labels", {"_inner_xml": "<text id='f'>new</text>"})
+        )
+        layers = self.cache.render()
+        self.assertEqual(len(self.rasterised), 1)
+        self.assertEqual(layers[2], ("root", "gradient", "labels", "f"))
+
+    def test_restore(self):
+        snapshot = self.app.snapshot()
+        self.cache.render()
+        self.app.query(update_event("a", {"fill": "blue"}))
+        self.cache.render()
+        self.rasterised.clear()
+        self.app.restore(snapshot)
+        self.cache.render()
+        self.assertEqual(len(self.rasterised), 1)
+        self.assertNotIn(b"blue", self.rasterised[0])
+
+    def test_close(self):
+        self.cache.render()
+        self.cache.close()
+        self.rasterised.clear()
+        self.app.query(update_event("a", {"fill": "blue"}))
+        self.assertEqual(len(self.app._listeners), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication, ConcurrentSVGApplication
+from svgrenderengine.event import QuerySVGEvent
+
+from utils import element_ids, update_event
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">
+    <g id="visible" svgre:lazy="true"><rect id="a" width="1"/></g>
+    <g id="hidden" svgre:lazy="true" display="none">text<rect id="b" width="2" svgre:tag="x"/>
+        <g id="nested" svgre:lazy="true" style="display: none"><rect id="c" width="3"/></g>
+    </g>
+</svg>"""
+
+
+def _select(element_id, attributes=None):
+    return QuerySVGEvent.create_event(
+        QuerySVGEvent.SELECT, element_id=element_id, attributes=attributes or []
+    )
+
+
+class TestLazyLayers(unittest.TestCase):
+    def test_dehydrated(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        self.assertEqual(
+            element_ids(app.element_tree_root.iter()),
+            ["root", "visible", "a", "hidden"],
+        )
+        self.assertEqual(len(app._lazy_layers), 1)
+        # attributes of the layer itself do not require its content.
+        response = app.query(_select("hidden", ["display"]))
+        self.assertEqual(response.data, {"display": "none"})
+        self.assertEqual(len(app._lazy_layers), 1)
+
+        app = SVGApplication(svg_code=SVG_CODE, lazy_layers=False)
+        self.assertEqual(
+            element_ids(app.element_tree_root.iter()),
+            ["root", "visible", "a", "hidden", "b", "nested", "c"],
+        )
+
+    def test_materialise_on_query(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        response = app.query(_select("b", ["width"]))
+        self.assertTrue(response.success)
+        self.assertEqual(response.data, {"width": 2})
+        # the nested layer is still hidden, so it stays dehydrated.
+        self.assertEqual(
+            element_ids(app.element_tree_root.iter()),
+            ["root", "visible", "a", "hidden", "b", "nested"],
+        )
+        hidden = app.element_tree_root[1]
+        self.assertEqual(hidden.text, "text")
+        self.assertEqual(hidden[0].get("{svg_render_engine}tag"), "x")
+        self.assertEqual(hidden[0].tag, "{http://www.w3.org/2000/svg}rect")
+
+        response = app.query(_select("c", ["width"]))
+        self.assertEqual(response.data, {"width": 3})
+        self.assertEqual(len(app._lazy_layers), 0)
+
+    def test_materialise_on_visible(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        app.query(update_event("hidden", {"display": "inline"}))
+        self.assertEqual(
+            element_ids(app.element_tree_root.iter()),
+            ["root", "visible", "a", "hidden", "b", "nested"],
+        )
+        self.assertTrue(app.materialise("c"))
+        self.assertFalse(app.materialise("c"))
+        reference = SVGApplication(svg_code=SVG_CODE, lazy_layers=False)
+        reference.query(update_event("hidden", {"display": "inline"}))
+        self.assertEqual(
+            ET.tostring(app.element_tree_root), ET.tostring(reference.element_tree_root)
+        )
+
+    def test_materialise_error(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        payload = app._lazy_layers._payloads[app.element_tree_root[1]]
+        payload.data = None  # fails after the (shared) parser has been fed
+        with self.assertRaises(TypeError):
+            app.materialise("b")
+        # the parser is reset, so it can still be used
+        app.query(update_event("visible", {"_inner_xml": '<rect id="d"/>'}))
+        self.assertEqual(
+            element_ids(app.element_tree_root.iter()),
+            ["root", "visible", "d", "hidden"],
+        )
+
+    def test_snapshot(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        snapshot = app.snapshot()
+        app.query(update_event("b", {"width": 10}))
+        app.restore(snapshot)
+        self.assertEqual(app.query(_select("b", ["width"])).data, {"width": 2})
+
+    def test_concurrent(self):
+        app = ConcurrentSVGApplication(SVGApplication(svg_code=SVG_CODE))
+        response = app.query(_select("b", ["width"]))
+        self.assertTrue(response.success)
+        self.assertEqual(response.data, {"width": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import math
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.render import LayerCache
+from svgrenderengine.render.culling import Viewport, cull
+from svgrenderengine.render.geometry import parse_path
+from svgrenderengine.render.lod import LevelOfDetail, parse_lod, simplify
+
+from utils import element_ids
+
+_CIRCLE = " ".join(
+    f"{'M' if i == 0 else 'L'} {50 + 40 * math.cos(i * math.pi / 32):.3f} {50 + 40 * math.sin(i * math.pi / 32):.3f}"
+    for i in range(64)
+)
+
+SVG_CODE = f"""<svg id="root" width="100" height="100" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:svgre="svg_render_engine">
+    <defs>
+        <rect id="tree-simple" width="20" height="20" fill="green"/>
+        <circle id="tree-dot" cx="10" cy="10" r="10"/>
+    </defs>
+    <g id="world">
+        <g id="tree" transform="translate(10, 10)" fill="green" svgre:lod="8:#tree-simple 4:#tree-dot 1:none">
+            <rect id="trunk" x="8" y="10" width="4" height="10"/>
+            <circle id="crown" cx="10" cy="8" r="8"/>
+        </g>
+        <path id="blob" d="{_CIRCLE} Z"/>
+    </g>
+</svg>"""
+
+
+class TestSimplify(unittest.TestCase):
+    def test_simplify(self):
+        points = [(0, 0), (1, 0.1), (2, -0.1), (3, 5), (4, 6), (5, 7)]
+        self.assertEqual(simplify(points, 0.5), [(0, 0), (2, -0.1), (3, 5), (5, 7)])
+        self.assertEqual(simplify(points, 10), [(0, 0), (5, 7)])
+        self.assertEqual(simplify(points[:2], 10), points[:2])
+
+    def test_parse_lod(self):
+        self.assertEqual(
+            parse_lod("4:#dot 16:#simple 1:none"),
+            ((16, "simple"), (4, "dot"), (1, "none")),
+        )
+        with self.assertRaises(ValueError):
+            parse_lod("4:dot")
+        with self.assertRaises(ValueError):
+            parse_lod("4")
+
+
+class TestLevelOfDetail(unittest.TestCase):
+    def setUp(self):
+        self.app = SVGApplication(svg_code=SVG_CODE)
+        self.geometry = self.app.geometry
+        self.geometry.bounds(self.app.element_tree_root)
+        self.lod = LevelOfDetail()
+
+    def element(self, element_id):
+        return SVGApplication.find_element(self.app.element_tree_root, element_id)
+
+    def test_alternatives(self):
+        tree = self.element("tree")  # 20 x 20 user units
+        self.assertIsNone(self.lod.representation(tree, self.geometry, 1))
+        code = self.lod.representation(tree, self.geometry, 0.3)
+        use = ET.fromstring(code)[0]
+        self.assertEqual(use.get("{http://www.w3.org/1999/xlink}href"), "#tree-simple")
+        self.assertEqual(ET.fromstring(code).get("transform"), "translate(10, 10)")
+        self.assertIsNone(ET.fromstring(code).get("id"))
+        code = self.lod.representation(tree, self.geometry, 0.1)
+        self.assertIn(b"#tree-dot", code)
+        self.assertEqual(self.lod.representation(tree, self.geometry, 0.01), b"")
+
+    def test_simplified_path(self):
+        blob = self.element("blob")  # 80 x 80 user units
+        self.assertIsNone(self.lod.representation(blob, self.geometry, 1))
+        code = self.lod.representation(blob, self.geometry, 0.1)
+        (points,) = parse_path(ET.fromstring(code).get("d"))
+        self.assertLess(len(points), 64)
+        self.assertEqual(points[0], points[-1])  # still closed
+        coarse = self.lod.representation(blob, self.geometry, 0.02)
+        self.assertLess(len(coarse), len(code))
+        self.assertIsNone(
+            LevelOfDetail(simplify_below=0).representation(blob, self.geometry, 0.1)
+        )
+
+    def test_cull(self):
+        world = self.element("world")
+        culled = []
+        code = cull(world, None, self.geometry, culled, lod=self.lod, scale=0.01)
+        self.assertEqual(element_ids(code), ["world", "blob"])
+        self.assertEqual([e.get("id") for e in culled], ["tree"])
+        code = cull(world, None, self.geometry, lod=self.lod, scale=1)
+        self.assertEqual(element_ids(code), ["world", "tree", "trunk", "crown", "blob"])
+
+
+class TestLayerCacheLevelOfDetail(unittest.TestCase):
+    def test_render(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        rasterised = []
+        cache = LayerCache(app, rasterised.append, size=(10, 10))
+        cache.render()
+        self.assertIn(b'id="trunk"', rasterised[-1])
+        cache.level_of_detail = LevelOfDetail()
+        cache.render()  # the level of detail invalidates the cache
+        self.assertEqual(len(rasterised), 2)
+        self.assertNotIn(b'id="trunk"', rasterised[-1])
+        self.assertIn(b"#tree-dot", rasterised[-1])
+        cache.viewport = Viewport(0, 0, 30, 30)  # zoom in
+        cache.render()
+        self.assertIn(b"#tree-simple", rasterised[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
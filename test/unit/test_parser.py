@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication, TemplatedSVGApplication
+from svgrenderengine.engine.parser import (
+    ParserOptions,
+    get_parser,
+    parse_file,
+    parse_wrapped,
+    get_default_parser_options,
+    set_default_parser_options,
+)
+from svgrenderengine.engine.app_xml import XMLApplication
+from svgrenderengine.event import QueryEvent, QuerySVGEvent
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg">
+    <!-- Background rectangle -->
+    <rect id="myrect" width="100" height="200"/>
+</svg>"""
+
+
+class TestParser(unittest.TestCase):
+    def test_parser_reused(self):
+        self.assertIs(get_parser(), get_parser())
+        options = ParserOptions(remove_comments=True)
+        self.assertIs(
+            get_parser(options), get_parser(ParserOptions(remove_comments=True))
+        )
+        self.assertIsNot(get_parser(options), get_parser())
+
+    def test_parser_per_thread(self):
+        parsers = []
+        thread = threading.Thread(target=lambda: parsers.append(get_parser()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(parsers[0], get_parser())
+
+    def test_application_parser_options(self):
+        options = ParserOptions(remove_comments=True, remove_blank_text=True)
+        app = SVGApplication(svg_code=SVG_CODE, parser_options=options)
+        self.assertEqual(len(app.element_tree_root), 1)  # only the rect remains
+        self.assertIsNone(app.element_tree_root.text)
+
+        # the options also apply to `_inner_xml` updates
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="root",
+            attributes={"_inner_xml": "<!-- note --> <rect/>"},
+        )
+        self.assertTrue(app.query(query).success)
+        self.assertEqual(len(app.element_tree_root), 1)
+
+        app = SVGApplication(svg_code=SVG_CODE)
+        self.assertEqual(len(app.element_tree_root), 2)  # comment and rect
+
+        app = TemplatedSVGApplication(SVG_CODE, {}, parser_options=options)
+        self.assertNotIn("<!--", app.render_template())
+        query = QueryEvent.create_event(
+            QueryEvent.UPDATE_TEMPLATE,
+            attributes={"root._inner_xml": "<!-- note --> <rect/>"},
+        )
+        self.assertTrue(app.query(query).success)
+        self.assertNotIn("<!--", app.render_template())
+
+        app = XMLApplication(SVG_CODE, parser_options=options)
+        self.assertEqual(len(app._root), 1)
+
+    def test_default_parser_options(self):
+        default = get_default_parser_options()
+        try:
+            set_default_parser_options(remove_comments=True)
+            self.assertTrue(get_default_parser_options().remove_comments)
+            app = SVGApplication(svg_code=SVG_CODE)
+            self.assertEqual(len(app.element_tree_root), 1)
+        finally:
+            set_default_parser_options(default)
+        self.assertEqual(get_default_parser_options(), default)
+
+    def test_parse_wrapped_error(self):
+        # a failure that is not a syntax error must also reset the (reused) parser
+        with self.assertRaises(TypeError):
+            parse_wrapped(5, "<_w>", "</_w>")
+        wrapper = parse_wrapped("<rect/>", "<_w>", "</_w>")
+        self.assertEqual([child.tag for child in wrapper], ["rect"])
+        wrapper = parse_wrapped(b"<rect/><rect/>", "<_w>", "</_w>")
+        self.assertEqual(len(wrapper), 2)
+
+    def test_parse_file(self):
+        svg_code = """<?xml version="1.0" encoding="UTF-8"?>
+<svg id="root" xmlns="http://www.w3.org/2000/svg">
+    <g id="layer1" transform="scale(2)">
+        <rect id="a"/>
+        <g id="b"><circle id="c"/><text id="d">\u00e9t\u00e9</text></g>
+    </g>
+    <g id="layer2"><rect id="e"/></g>
+</svg>"""
+        with tempfile.NamedTemporaryFile("wb", suffix=".svg", delete=False) as f:
+            f.write(svg_code.encode("utf-8"))
+        self.addCleanup(os.remove, f.name)
+
+        for use_mmap in (False, True):
+            root = parse_file(f.name, use_mmap=use_mmap)
+            self.assertEqual(root.get("id"), "root")
+            self.assertEqual(root.find(".//*[@id='d']").text, "\u00e9t\u00e9")
+        with open(f.name, "rb") as file:
+            self.assertEqual(len(parse_file(file)), 2)
+
+        root = parse_file(f.name, keep_ids=["b"])
+        ids = [element.get("id") for element in root.iter()]
+        self.assertEqual(ids, ["root", "layer1", "b", "c", "d"])
+        self.assertEqual(root[0].get("transform"), "scale(2)")
+
+        app = SVGApplication(file=f.name, keep_ids=["e"], use_mmap=True)
+        ids = [element.get("id") for element in app.element_tree_root.iter()]
+        self.assertEqual(ids, ["root", "layer2", "e"])
+
+    def test_parse_file_prunes_comments(self):
+        svg_code = """<svg id="root" xmlns="http://www.w3.org/2000/svg">
+    <g id="layer1"><!-- nothing kept here --><g id="notes"><!-- note --></g></g>
+    <g id="layer2"><!-- kept --><rect id="e"/></g>
+</svg>"""
+        with tempfile.NamedTemporaryFile("wb", suffix=".svg", delete=False) as f:
+            f.write(svg_code.encode("utf-8"))
+        self.addCleanup(os.remove, f.name)
+
+        root = parse_file(f.name, keep_ids=["e"])
+        ids = [element.get("id") for element in root.iter(tag=ET.Element)]
+        self.assertEqual(ids, ["root", "layer2", "e"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine.app_xml import QueryXML, QueryXPath, XMLApplication
+from svgrenderengine.engine.index import Indexes
+from svgrenderengine.engine.planner import QueryPlanner
+
+NAMESPACES = {"svg": "http://www.w3.org/2000/svg", "svgre": "svg_render_engine"}
+
+SVG_CODE = """<svg id="root" class="c" xmlns="http://www.w3.org/2000/svg" xmlns:svgre="svg_render_engine">
+    <rect id="a" class="c"/>
+    <rect id="b" class="c d" svgre:clickable="true"/>
+    <g id="g" class="c"><!-- comment --><circle id="e" class="c"/><rect id="f" class=" c "/></g>
+    <rect id="it's" class="d"/>
+</svg>"""
+
+SELECTORS = [
+    ".//*[@id='a']",
+    "//*[@id='root']",
+    ".//*[@id='root']",
+    '//*[@id="it\'s"]',
+    "//*[@id='missing']",
+    "//svg:rect[@class='c']",
+    "//svg:rect[@class = 'c d']",
+    "//svg:rect[@class=' c ']",
+    "//*[@class='c']",
+    ".//*[@class='c']",
+    "//svg:circle[@class='c']",
+    "//rect[@class='c']",
+    "//svg:rect[@svgre:clickable='true']",
+]
+
+
+class TestQueryPlanner(unittest.TestCase):
+    def setUp(self):
+        self.root = ET.fromstring(SVG_CODE)
+        self.indexes = Indexes(self.root, ["id", "class", "svgre:clickable"])
+        self.planner = QueryPlanner(self.indexes)
+
+    def test_same_as_lxml(self):
+        for xpath in SELECTORS:
+            with self.subTest(xpath=xpath):
+                expected = ET.XPath(xpath, namespaces=NAMESPACES)(self.root)
+                self.assertIsNotNone(self.planner.plan(xpath, NAMESPACES))
+                self.assertEqual(
+                    self.planner.select(self.root, xpath, NAMESPACES), expected
+                )
+
+    def test_variable(self):
+        xpath = ".//*[@id=$id]"
+        self.assertEqual(
+            self.planner.select(self.root, xpath, id="e"),
+            ET.XPath(xpath)(self.root, id="e"),
+        )
+        # non-string values are compared by lxml.
+        self.assertIsNone(self.planner.select(self.root, xpath, id=1))
+
+    def test_fallback(self):
+        for xpath in [
+            "//svg:rect",
+            "//svg:rect[@class='c'][1]",
+            "//svg:g/svg:rect[@class='c']",
+            "//*[contains(@class, 'c')]",
+            "//*[@width='1']",  # not indexed
+            "//svg:rect[@class='']",
+        ]:
+            with self.subTest(xpath=xpath):
+                self.assertIsNone(self.planner.select(self.root, xpath, NAMESPACES))
+        # not the document root
+        self.assertIsNone(self.planner.select(self.root[0], "//*[@id='a']"))
+
+    def test_iter_select(self):
+        unindexed = QueryPlanner(Indexes(self.root, []))
+        for xpath in SELECTORS + [
+            "//svg:rect",
+            ".//svg:rect",
+            "//rect",
+            "//*",
+            ".//*",
+            "//*[@class]",
+            "//svg:rect[@svgre:clickable]",
+            "//svg:rect[@class='']",
+        ]:
+            for planner in (self.planner, unindexed):
+                for context in (self.root, self.root[2]):
+                    with self.subTest(xpath=xpath, context=context.get("id")):
+                        expected = ET.XPath(xpath, namespaces=NAMESPACES)(context)
+                        elements = planner.iter_select(context, xpath, NAMESPACES)
+                        self.assertNotIsInstance(elements, list)
+                        self.assertEqual(list(elements), expected)
+        self.assertIsNone(self.planner.iter_select(self.root, "//svg:rect/@id"))
+        self.assertIsNone(self.planner.iter_select(self.root, ".//*[@id=$id]", id=1))
+
+    def test_document_order(self):
+        self.indexes.on_change(self.root[0], "class", "c", "x")
+        self.root[0].set("class", "x")
+        self.indexes.on_change(self.root[0], "class", "x", "c")
+        self.root[0].set("class", "c")
+        xpath = "//*[@class='c']"
+        self.assertEqual(
+            self.planner.select(self.root, xpath),
+            ET.XPath(xpath)(self.root),
+        )
+
+
+class TestXMLApplicationPlanner(unittest.TestCase):
+    def test_queries(self):
+        apps = [
+            XMLApplication(SVG_CODE, indexes=["id", "class"]),
+            XMLApplication(SVG_CODE, query_planner=False),
+        ]
+        for query in [
+            QueryXPath.new("//svg:rect[@class='c']", ["id"]),
+            QueryXPath.new(".//*[@id='b']", []),
+            QueryXML.new("it's", ["class"]),
+            QueryXPath.new("//svg:rect[@class='c']", {"class": "d"}),
+            QueryXPath.new("//*[@class='d']", ["id"]),
+            QueryXML.new("missing", ["class"]),
+        ]:
+            planned, unplanned = (app.query(query) for app in apps)
+            self.assertEqual(planned.success, unplanned.success)
+            if planned.success:
+                self.assertEqual(planned.data, unplanned.data)
+
+    def test_iter_query(self):
+        app = XMLApplication(SVG_CODE, indexes=["class"])
+        query = QueryXPath.new("//*[@class='c']", ["id"])
+        self.assertEqual(
+            list(app.iter_query(query, offset=1, limit=2)), [{"id": "a"}, {"id": "g"}]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
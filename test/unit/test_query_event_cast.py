@@ -2,6 +2,7 @@ import unittest
 from svgrenderengine.event import (
     QueryEvent,
     QuerySVGEvent,
+    QueryKeys,
 )  # Adjust the import according to your module structure
 
 
@@ -96,6 +97,44 @@ class TestQuerySVGEvent(unittest.TestCase):
 
     # Add more test cases as needed
 
+    def test_from_query_event_compiled_keys(self):
+        keys = QueryKeys(["{{id}}.width", "{{id}}.height"])
+        self.assertEqual(len(keys), 2)
+        query_event = QueryEvent(
+            id="test_id",
+            timestamp=1234567890,
+            action=QuerySVGEvent.SELECT,
+            attributes=["{{id}}.width", "{{id}}.height", "{{group.id}}.fill"],
+        )
+        result = QuerySVGEvent.from_query_event(query_event, keys=keys)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0].element_id, "{{id}}")
+        self.assertListEqual(result[0].attributes, ["width", "height"])
+        self.assertEqual(result[1].element_id, "{{group.id}}")
+        self.assertListEqual(result[1].attributes, ["fill"])
+        # keys that were not given up-front are kept once parsed.
+        self.assertIn("{{group.id}}.fill", keys)
+
+    def test_compiled_keys_bounded(self):
+        keys = QueryKeys(["a.x", "b.x"], maxsize=2)
+        self.assertEqual(
+            keys.split("a.x"), ("a", "x")
+        )  # `b.x` is now the least recently used
+        keys.split("c.x")
+        self.assertEqual(len(keys), 2)
+        self.assertNotIn("b.x", keys)
+        self.assertIn("a.x", keys)
+        with self.assertRaises(ValueError):
+            QueryKeys(maxsize=0)
+
+    def test_split_by_first_dot_cached(self):
+        from svgrenderengine.event.queryevent import split_by_first_dot
+
+        split_by_first_dot.cache_clear()
+        self.assertEqual(split_by_first_dot("{{a.b}}.c"), ("{{a.b}}", "c"))
+        self.assertEqual(split_by_first_dot("{{a.b}}.c"), ("{{a.b}}", "c"))
+        self.assertEqual(split_by_first_dot.cache_info().hits, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+
+from svgrenderengine.engine import SVGApplication, TemplatedSVGApplication
+from svgrenderengine.event import QueryEvent, QuerySVGEvent
+
+
+class TestSVGApplicationSnapshot(unittest.TestCase):
+    SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="myrect" width="100" height="200"/> <g id="mygroup"> hello </g> </svg>"""
+
+    def _update(self, app, element_id, attributes):
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE, element_id=element_id, attributes=attributes
+        )
+        self.assertTrue(app.query(query).success)
+
+    def _select(self, app, element_id, attributes):
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.SELECT, element_id=element_id, attributes=attributes
+        )
+        return app.query(query).data
+
+    def test_restore(self):
+        app = SVGApplication(svg_code=self.SVG_CODE)
+        base = app.snapshot()
+        self._update(app, "myrect", {"width": 1, "fill": "red"})
+        self._update(app, "mygroup", {"_inner_xml": "<rect/>"})
+        changed = app.snapshot()
+        self.assertEqual(changed.depth, 3)
+
+        app.restore(base)
+        self.assertDictEqual(
+            self._select(app, "myrect", []),
+            {"id": "myrect", "width": 100, "height": 200},
+        )
+        self.assertEqual(
+            self._select(app, "mygroup", ["_inner_xml"])["_inner_xml"], "hello"
+        )
+
+        app.restore(changed)
+        self.assertDictEqual(
+            self._select(app, "myrect", ["width", "fill"]), {"width": 1, "fill": "red"}
+        )
+        self.assertIn(
+            "<rect", self._select(app, "mygroup", ["_inner_xml"])["_inner_xml"]
+        )
+
+    def test_restore_branch(self):
+        app = SVGApplication(svg_code=self.SVG_CODE)
+        base = app.snapshot()
+        self._update(app, "myrect", {"width": 1})
+        branch_a = app.snapshot()
+        app.restore(base)
+        self._update(app, "myrect", {"width": 2})
+        self._update(app, "myrect", {"height": 3})
+        branch_b = app.snapshot()
+
+        app.restore(branch_a)
+        self.assertDictEqual(
+            self._select(app, "myrect", ["width", "height"]),
+            {"width": 1, "height": 200},
+        )
+        app.restore(branch_b)
+        self.assertDictEqual(
+            self._select(app, "myrect", ["width", "height"]), {"width": 2, "height": 3}
+        )
+
+    def test_listener_notified_on_restore(self):
+        app = SVGApplication(svg_code=self.SVG_CODE)
+        changes = []
+        app.add_listener(lambda element, key, old, new: changes.append((key, old, new)))
+        base = app.snapshot()
+        self._update(app, "myrect", {"width": 1})
+        app.restore(base)
+        self.assertListEqual(changes, [("width", "100", "1"), ("width", "1", "100")])
+
+    def test_restore_foreign_snapshot(self):
+        app1 = SVGApplication(svg_code=self.SVG_CODE)
+        app2 = SVGApplication(svg_code=self.SVG_CODE)
+        with self.assertRaises(ValueError):
+            app1.restore(app2.snapshot())
+
+
+class TestTemplatedSVGApplicationSnapshot(unittest.TestCase):
+    SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="{{rect.id}}" width="{{rect.size.0}}" height="{{rect.size.1}}"/> </svg>"""
+
+    def test_restore_variables(self):
+        data = {"rect": {"id": "myrect", "size": [100, 200]}}
+        app = TemplatedSVGApplication(self.SVG_CODE, data)
+        base = app.snapshot()
+        query = QueryEvent.create_event(
+            QueryEvent.UPDATE,
+            attributes={"rect.size.0": 1, "rect": {"fill": "red"}, "new.key": 2},
+        )
+        app.query(query)
+        changed = app.snapshot()
+
+        select_all = lambda: app.query(
+            QueryEvent.create_event(QueryEvent.SELECT, attributes=[])
+        ).data
+        app.restore(base)
+        self.assertDictEqual(select_all(), data)
+        app.restore(changed)
+        self.assertDictEqual(
+            select_all(),
+            {
+                "rect": {"id": "myrect", "size": [1, 200], "fill": "red"},
+                "new": {"key": 2},
+            },
+        )
+
+    def test_restore_template(self):
+        app = TemplatedSVGApplication(
+            self.SVG_CODE, {"rect": {"id": "myrect", "size": [1, 2]}}
+        )
+        base = app.snapshot()
+        template = app.render_template()
+        query = QueryEvent.create_event(
+            QueryEvent.UPDATE_TEMPLATE, attributes={"root.fill": "red"}
+        )
+        app.query(query)
+        self.assertIn('fill="red"', app.render_template())
+        app.restore(base)
+        self.assertEqual(app.render_template(), template)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from lxml import etree as ET
+
+from svgrenderengine.engine import SVGApplication
+from svgrenderengine.event import QuerySVGEvent
+from svgrenderengine.render import LayerCache
+from svgrenderengine.render.sprites import plan_sprites
+from svgrenderengine.render.transform import (
+    IDENTITY,
+    apply,
+    document_matrix,
+    parse_transform,
+)
+
+SVG_CODE = """<svg id="root" width="200" height="100" viewBox="0 0 100 50" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <defs><symbol id="icon" viewBox="0 0 10 10"><rect width="10" height="10"/></symbol></defs>
+    <rect id="background" width="100" height="50"/>
+    <g id="icons" transform="translate(10, 0)">
+        <title>icons</title>
+        <use id="a" href="#icon" width="10" height="10"/>
+        <use id="b" xlink:href="#icon" x="20" y="10" width="10" height="10"/>
+        <use id="c" href="#icon" width="10" height="10" transform="rotate(90)"/>
+        <use id="d" href="#icon" width="10" height="10" fill="red"/>
+        <use id="e" href="#icon" width="10" height="10" transform="scale(1, -1)"/>
+    </g>
+</svg>"""
+
+
+def _points_close(test, a, b):
+    for p, q in zip(a, b):
+        test.assertAlmostEqual(p[0], q[0])
+        test.assertAlmostEqual(p[1], q[1])
+
+
+class TestTransform(unittest.TestCase):
+    def test_parse_transform(self):
+        self.assertEqual(parse_transform(None), IDENTITY)
+        m = parse_transform("translate(10 20) scale(2)")
+        _points_close(self, apply(m, [(1, 1)]), [(12, 22)])
+        m = parse_transform("rotate(90, 5, 5)")
+        _points_close(self, apply(m, [(10, 5)]), [(5, 10)])
+        m = parse_transform("matrix(1,0,0,1,3,4) skewX(45)")
+        _points_close(self, apply(m, [(0, 1)]), [(4, 5)])
+
+    def test_document_matrix(self):
+        root = ET.fromstring(SVG_CODE)
+        self.assertEqual(document_matrix(root, 200, 100), (2, 0, 0, 2, 0, 0))
+        root.attrib.pop("viewBox")
+        self.assertEqual(document_matrix(root, 400, 100), (2, 0, 0, 1, 0, 0))
+
+
+class TestSprites(unittest.TestCase):
+    def test_plan(self):
+        root = ET.fromstring(SVG_CODE)
+        matrix = document_matrix(root, 200, 100)
+        instances = plan_sprites([root[2]], root, matrix)
+        self.assertEqual(len(instances), 5)
+        a, b, c, d, e = instances
+        self.assertEqual(
+            (a.size, a.position, a.angle, a.flip), ((20, 20), (20, 0), 0, False)
+        )
+        self.assertEqual(b.position, (60, 20))
+        self.assertAlmostEqual(c.angle, 90)
+        self.assertEqual(c.position, (0, 0))
+        self.assertTrue(e.flip)
+        self.assertEqual(e.position, (20, -20))
+        # instances of the same sprite share the same code
+        self.assertIs(a.svg, b.svg)
+        self.assertIsNot(a.svg, d.svg)
+        self.assertIn(b'fill="red"', d.svg)
+        sprite = ET.fromstring(a.svg)
+        self.assertEqual(
+            (sprite.get("width"), sprite.get("viewBox")), ("20", "0 0 10 10")
+        )
+
+    def test_class(self):
+        root = ET.fromstring(SVG_CODE)
+        icons = root[2]
+        icons.set("class", "hud")
+        icons[2].set("class", "alarm")  # `b`
+        instances = plan_sprites([icons], root, document_matrix(root, 200, 100))
+        a, b = instances[:2]
+        # the class changes which style sheet rules apply, the sprites must differ
+        self.assertIsNot(a.svg, b.svg)
+        sprite = ET.fromstring(b.svg)
+        self.assertEqual(sprite[0].get("class"), "hud")
+        self.assertEqual(sprite[0][0].get("class"), "alarm")
+
+    def test_unsupported(self):
+        root = ET.fromstring(SVG_CODE)
+        matrix = document_matrix(root, 200, 100)
+        self.assertIsNone(plan_sprites([root[1]], root, matrix))
+        root[2][1].set("transform", "skewX(30)")
+        self.assertIsNone(plan_sprites([root[2]], root, matrix))
+
+    def test_layer_cache(self):
+        app = SVGApplication(svg_code=SVG_CODE)
+        rasterised, drawn = [], []
+        cache = LayerCache(
+            app,
+            lambda svg: rasterised.append(svg) or "raster",
+            draw_sprites=lambda instances: drawn.append(instances) or "sprites",
+            size=(200, 100),
+        )
+        self.assertEqual(cache.render(), ["raster", "sprites"])
+        self.assertEqual((len(rasterised), len(drawn)), (1, 1))
+        app.query(
+            QuerySVGEvent.create_event(
+                QuerySVGEvent.UPDATE, element_id="a", attributes={"x": 50}
+            )
+        )
+        cache.render()
+        self.assertEqual((len(rasterised), len(drawn)), (1, 2))
+        self.assertEqual(drawn[-1][0].position, (120, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -225,6 +225,72 @@ class TestSVGApplication(unittest.TestCase):
             },
         )
 
+    def test_update_element_inner_elements(self):
+        from lxml import etree as ET
+        from svgrenderengine.engine import SVGApplication
+        from svgrenderengine.event import QuerySVGEvent
+
+        svg_code = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"><g id="mygroup">old<rect/></g></svg>"""
+        app = SVGApplication(svg_code=svg_code)
+        new_children = [ET.Element("circle", r=str(i)) for i in range(3)]
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="mygroup",
+            attributes={"_inner_xml": new_children},
+        )
+        self.assertTrue(app.query(query).success)
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="mygroup",
+            attributes={"_inner_xml": b"<text>bytes</text>"},
+        )
+        self.assertTrue(app.query(query).success)
+        group = app.element_tree_root[0]
+        self.assertEqual(len(group), 1)
+        self.assertEqual(group[0].text, "bytes")
+
+    def test_update_element_inner_invalid(self):
+        from lxml import etree as ET
+        from svgrenderengine.engine import SVGApplication
+        from svgrenderengine.event import QuerySVGEvent
+
+        svg_code = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"><g id="mygroup"/></svg>"""
+        app = SVGApplication(svg_code=svg_code)
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="mygroup",
+            attributes={"_inner_xml": "<rect>"},
+        )
+        with self.assertRaises(ET.XMLSyntaxError):
+            app.query(query)
+        # the (reused) parser must still work after an error
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="mygroup",
+            attributes={"_inner_xml": "<rect/><rect/>"},
+        )
+        self.assertTrue(app.query(query).success)
+        self.assertEqual(len(app.element_tree_root[0]), 2)
+
+    def test_update_element_inner_not_string(self):
+        from svgrenderengine.engine import SVGApplication
+        from svgrenderengine.event import QuerySVGEvent
+
+        svg_code = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"><g id="mygroup"/></svg>"""
+        app = SVGApplication(svg_code=svg_code)
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE, element_id="mygroup", attributes={"_inner_xml": 5}
+        )
+        self.assertTrue(app.query(query).success)
+        self.assertEqual(app.element_tree_root[0].text.strip(), "5")
+        query = QuerySVGEvent.create_event(
+            QuerySVGEvent.UPDATE,
+            element_id="mygroup",
+            attributes={"_inner_xml": "<rect/>"},
+        )
+        self.assertTrue(app.query(query).success)
+        self.assertEqual(len(app.element_tree_root[0]), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from svgrenderengine.engine import (
+    TemplatedSVGApplication,
+    DictVariableStore,
+    OmegaConfVariableStore,
+)
+from svgrenderengine.engine.variables import MISSING
+from svgrenderengine.event import QueryEvent
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="{{rect.id}}" width="{{rect.size.0}}" height="{{rect.size.1}}"/> </svg>"""
+
+
+class TestVariableStore(unittest.TestCase):
+    # every store must behave in the same way.
+    STORES = (DictVariableStore, OmegaConfVariableStore)
+
+    def _data(self):
+        return {"rect": {"id": "myrect", "size": [100, {"height": 200}]}}
+
+    def test_select(self):
+        for store_type in self.STORES:
+            with self.subTest(store=store_type.__name__):
+                store = store_type(self._data())
+                self.assertEqual(store.select("rect.id"), "myrect")
+                self.assertEqual(store.select("rect.size.0"), 100)
+                self.assertEqual(store.select("rect.size[1].height"), 200)
+                self.assertEqual(store.select("rect.size"), [100, {"height": 200}])
+                self.assertIs(store.select("rect.missing"), MISSING)
+                self.assertIs(store.select("missing.key"), MISSING)
+
+    def test_update(self):
+        for store_type in self.STORES:
+            with self.subTest(store=store_type.__name__):
+                store = store_type(self._data())
+                store.update("rect.size.0", 1)
+                store.update("rect", {"fill": "red"})  # merged
+                store.update("new.key", 2)  # created
+                self.assertDictEqual(
+                    store.to_container(),
+                    {
+                        "rect": {
+                            "id": "myrect",
+                            "size": [1, {"height": 200}],
+                            "fill": "red",
+                        },
+                        "new": {"key": 2},
+                    },
+                )
+                store.set("rect", {"id": "other"})  # replaced
+                store.delete("new.key")
+                self.assertDictEqual(
+                    store.to_container(), {"rect": {"id": "other"}, "new": {}}
+                )
+
+    def test_missing_prefix(self):
+        for store_type in self.STORES:
+            with self.subTest(store=store_type.__name__):
+                store = store_type(self._data())
+                self.assertEqual(store.missing_prefix("rect.size.0"), "rect.size.0")
+                self.assertEqual(store.missing_prefix("a.b.c"), "a")
+                self.assertEqual(store.missing_prefix("rect.a.b"), "rect.a")
+
+    def test_select_copies(self):
+        store = DictVariableStore(self._data())
+        store.select("rect")["id"] = "changed"
+        store.to_container()["rect"]["id"] = "changed"
+        self.assertEqual(store.select("rect.id"), "myrect")
+
+    def test_application_store(self):
+        for store_type in self.STORES:
+            with self.subTest(store=store_type.__name__):
+                app = TemplatedSVGApplication(
+                    SVG_CODE, self._data(), variable_store=store_type
+                )
+                app.query(
+                    QueryEvent.create_event(
+                        QueryEvent.UPDATE, attributes={"rect.size.0": 5}
+                    )
+                )
+                result = app.query(
+                    QueryEvent.create_event(
+                        QueryEvent.SELECT, attributes=["rect.size[0]", "rect.id"]
+                    )
+                )
+                self.assertDictEqual(
+                    result.data, {"rect": {"size": {"0": 5}, "id": "myrect"}}
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
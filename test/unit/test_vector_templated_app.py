@@ -0,0 +1,118 @@
+import unittest
+
+import numpy as np
+
+from svgrenderengine.engine import VectorTemplatedSVGApplication
+from svgrenderengine.event import QueryEvent
+
+SVG_CODE = """<svg id="root" width="200" height="320" xmlns="http://www.w3.org/2000/svg"> <rect id="{{rect.id}}" width="{{rect.size.0}}" height="{{rect.size.1}}" fill="{{rect.fill}}"/> </svg>"""
+
+
+class TestVectorTemplatedSVGApplication(unittest.TestCase):
+    def setUp(self):
+        self.variables = [
+            {"rect": {"id": f"rect-{i}", "size": [10 * i, 20], "fill": "red"}}
+            for i in range(4)
+        ]
+        self.app = VectorTemplatedSVGApplication(SVG_CODE, self.variables)
+
+    def test_select_stacked(self):
+        result = self.app.query(
+            QueryEvent.create_event(
+                QueryEvent.SELECT, attributes=["rect.size.0", "rect.id"]
+            )
+        )
+        self.assertTrue(result.success)
+        self.assertIsInstance(result.data["rect"]["size"]["0"], np.ndarray)
+        np.testing.assert_array_equal(result.data["rect"]["size"]["0"], [0, 10, 20, 30])
+        self.assertListEqual(result.data["rect"]["id"], [f"rect-{i}" for i in range(4)])
+
+    def test_select_missing(self):
+        result = self.app.query(
+            QueryEvent.create_event(QueryEvent.SELECT, attributes=["rect.missing"])
+        )
+        self.assertFalse(result.success)
+
+    def test_update_batched_and_broadcast(self):
+        self.app.query(
+            QueryEvent.create_event(
+                QueryEvent.UPDATE,
+                attributes={
+                    "rect.size[1]": np.array([1, 2, 3, 4]),
+                    "rect.fill": "blue",
+                },
+            )
+        )
+        self.assertDictEqual(
+            self.app.get_variables(2),
+            {"rect": {"id": "rect-2", "size": [20, 3], "fill": "blue"}},
+        )
+
+    def test_update_env_ids(self):
+        self.app.query(
+            QueryEvent.create_event(QueryEvent.UPDATE, attributes={"rect.size.0": 0.5}),
+            env_ids=[1, 3],
+        )
+        result = self.app.query(
+            QueryEvent.create_event(QueryEvent.SELECT, attributes=["rect.size.0"]),
+            env_ids=[0, 1, 3],
+        )
+        np.testing.assert_array_equal(result.data["rect"]["size"]["0"], [0, 0.5, 0.5])
+
+    def test_update_widens_column(self):
+        app = VectorTemplatedSVGApplication(SVG_CODE, {"v": True, "n": 0}, num_envs=3)
+        update = lambda attributes, env_ids: app.query(
+            QueryEvent.create_event(QueryEvent.UPDATE, attributes=attributes),
+            env_ids=env_ids,
+        )
+        update({"v": 5, "n": 2**40}, [1])
+        self.assertEqual(app.get_variables(1), {"v": 5, "n": 2**40})
+        self.assertEqual(app.get_variables(0), {"v": 1, "n": 0})
+        # does not fit into int64, the column holds python objects instead
+        update({"n": 2**70}, [2])
+        self.assertEqual(
+            [app.get_variables(i)["n"] for i in range(3)], [0, 2**40, 2**70]
+        )
+        update({"v": 0.5}, [0])
+        self.assertEqual([app.get_variables(i)["v"] for i in range(3)], [0.5, 5, 1])
+
+    def test_update_new_key(self):
+        self.app.query(
+            QueryEvent.create_event(
+                QueryEvent.UPDATE, attributes={"rect": {"stroke": 1}}
+            )
+        )
+        self.assertDictEqual(
+            self.app.get_variables(0),
+            {"rect": {"id": "rect-0", "size": [0, 20], "fill": "red", "stroke": 1}},
+        )
+        self.app.query(
+            QueryEvent.create_event(QueryEvent.UPDATE, attributes={"other.value": 1}),
+            env_ids=[0],
+        )
+        self.assertEqual(self.app.get_variables(0)["other"], {"value": 1})
+        self.assertEqual(self.app.get_variables(1)["other"], {"value": None})
+
+    def test_render_and_reset(self):
+        self.app.query(
+            QueryEvent.create_event(
+                QueryEvent.UPDATE, attributes={"rect.fill": "blue"}
+            ),
+            env_ids=[0],
+        )
+        svgs = self.app.render()
+        self.assertEqual(len(svgs), 4)
+        self.assertIn('fill="blue"', svgs[0])
+        self.assertIn('id="rect-3" width="30"', svgs[3])
+        self.app.reset()
+        self.assertIn('fill="red"', self.app.render(env_ids=[0])[0])
+
+    def test_num_envs(self):
+        app = VectorTemplatedSVGApplication(SVG_CODE, self.variables[0], num_envs=8)
+        self.assertEqual(len(app), 8)
+        with self.assertRaises(ValueError):
+            VectorTemplatedSVGApplication(SVG_CODE, self.variables[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+
+from svgrenderengine.engine.app_xml import (
+    QueryXML,
+    QueryXPath,
+    XMLApplication,
+    XPathCache,
+    XPathMatch,
+)
+
+SVG_CODE = """<svg id="root" xmlns="http://www.w3.org/2000/svg"> <rect id="rect-1" class="a" width="100"/> <rect id="it's" class="a" width="200"/> <circle id="c" class="b"/> </svg>"""
+
+
+class TestXPathCache(unittest.TestCase):
+    def test_cache(self):
+        cache = XPathCache(maxsize=2)
+        namespaces = {"svg": "http://www.w3.org/2000/svg"}
+        xpath = cache.get("//svg:rect", namespaces)
+        self.assertIs(cache.get("//svg:rect", dict(namespaces)), xpath)
+        self.assertIsNot(cache.get("//svg:rect", {"svg": "other"}), xpath)
+        cache.get("//svg:circle", namespaces)  # evicts the least recently used
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get("//svg:rect", namespaces), xpath)
+
+    def test_application_cache(self):
+        # planned queries are answered from the indexes and never compiled.
+        app = XMLApplication(SVG_CODE, query_planner=False)
+        for _ in range(3):
+            app.query(QueryXPath.new("//svg:rect", ["width"]))
+            app.query(QueryXML.new("rect-1", ["width"]))
+        self.assertEqual(len(app._xpath_cache), 2)
+
+    def test_quoted_id(self):
+        app = XMLApplication(SVG_CODE)
+        response = app.query(QueryXML.new("it's", ["width"]))
+        self.assertTrue(response.success)
+        self.assertDictEqual(response.data, {"it's": {"width": 200}})
+        response = app.query(QueryXML.new("x' or '1'='1", ["width"]))
+        self.assertFalse(response.success)
+
+
+class TestIterQuery(unittest.TestCase):
+    def test_iter_query(self):
+        app = XMLApplication(SVG_CODE)
+        results = list(app.iter_query(QueryXPath.new("//svg:*[@class]", [])))
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(r, XPathMatch) for r in results))
+        self.assertIsNone(results[0]._xml)  # not serialised until asked
+        self.assertEqual(
+            results[0].xml,
+            app.query(QueryXPath.new("//svg:*[@class]", [])).data[0],
+        )
+        self.assertEqual(results[2].get("id"), "c")
+
+    def test_paging(self):
+        app = XMLApplication(SVG_CODE)
+        query = QueryXPath.new("//svg:*[@class]", ["id"])
+        page = list(app.iter_query(query, offset=1, limit=1))
+        self.assertEqual(page, [{"id": "it's"}])
+        self.assertEqual(list(app.iter_query(query, offset=3)), [])
+        ids = list(app.iter_query(QueryXPath.new("//svg:rect/@id", [])))
+        self.assertEqual(ids, ["rect-1", "it's"])
+
+    def test_aiter_query(self):
+        app = XMLApplication(SVG_CODE)
+
+        async def collect():
+            query = QueryXPath.new("//svg:rect", ["id"])
+            return [r async for r in app.aiter_query(query, limit=2, batch_size=1)]
+
+        self.assertEqual(asyncio.run(collect()), [{"id": "rect-1"}, {"id": "it's"}])
+
+    def test_invalid(self):
+        app = XMLApplication(SVG_CODE)
+        with self.assertRaises(ValueError):
+            list(app.iter_query(QueryXPath.new("//svg:rect", {"width": 1})))
+        with self.assertRaises(ValueError):
+            list(app.iter_query(QueryXML.new("c", [])))
+
+
+class TestXPathUpdate(unittest.TestCase):
+    def test_update(self):
+        app = XMLApplication(SVG_CODE)
+        response = app.query(
+            QueryXPath.new("//svg:*[@class='a']", {"fill": "red", "width": 10})
+        )
+        self.assertTrue(response.success)
+        self.assertDictEqual(
+            response.data,
+            {"count": 2, "old": {"fill": {None: 2}, "width": {"100": 1, "200": 1}}},
+        )
+        response = app.query(QueryXPath.new("//svg:*[@class]", ["fill", "width"]))
+        self.assertListEqual(
+            response.data,
+            [
+                {"fill": "red", "width": "10"},
+                {"fill": "red", "width": "10"},
+                {"fill": None, "width": None},
+            ],
+        )
+        response = app.query(QueryXPath.new("//svg:rect", {"fill": None}))
+        self.assertDictEqual(response.data, {"count": 2, "old": {"fill": {"red": 2}}})
+        response = app.query(QueryXPath.new("//svg:rect[@fill]", ["id"]))
+        self.assertListEqual(response.data, [])
+
+    def test_update_no_match(self):
+        app = XMLApplication(SVG_CODE)
+        response = app.query(QueryXPath.new("//svg:line", {"fill": "red"}))
+        self.assertDictEqual(response.data, {"count": 0, "old": {"fill": {}}})
+
+    def test_update_non_element(self):
+        app = XMLApplication(SVG_CODE)
+        with self.assertRaises(ValueError):
+            app.query(QueryXPath.new("//svg:rect/@id", {"fill": "red"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
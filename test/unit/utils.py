@@ -0,0 +1,19 @@
+""" Helpers shared by the unit tests. """
+
+from lxml import etree as ET
+
+from svgrenderengine.event import QuerySVGEvent
+
+
+def update_event(element_id, attributes):
+    """Creates a `QuerySVGEvent.UPDATE` event that sets `attributes` on the element with id `element_id`."""
+    return QuerySVGEvent.create_event(
+        QuerySVGEvent.UPDATE, element_id=element_id, attributes=attributes
+    )
+
+
+def element_ids(elements):
+    """The ids of the elements that have one, in order. `elements` is an iterable of elements or svg code (str or bytes), whose elements are taken in document order."""
+    if isinstance(elements, (str, bytes)):
+        elements = ET.fromstring(elements).iter()
+    return [e.get("id") for e in elements if e.get("id")]